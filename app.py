@@ -1,15 +1,55 @@
+import time
+
+_import_started = time.perf_counter()
+
 from flask import Flask
 from route.main_routes import main_bp
+from service.container import ServiceContainer, load_config_from_env
+from service.logging_service import setup_logging
+from service.response_compression import create_json_provider
 
-def create_app():
+IMPORT_MS = round((time.perf_counter() - _import_started) * 1000, 2)
+
+def create_app(config=None, start_watcher=True):
+    started = time.perf_counter()
     app = Flask(__name__)
     
+    # 서비스 설정: 기본값 < 환경 변수 < create_app 인자
+    service_config = load_config_from_env()
+    service_config.update(config or {})
+    services = ServiceContainer(service_config)
+    app.extensions['services'] = services
+    
+    # 로그는 큐에 넣고 백그라운드 스레드가 출력 (요청 스레드가 파일 I/O를 기다리지 않도록)
+    setup_logging(services.config)
+    
+    # API JSON 직렬화 (orjson이 있으면 사용)
+    app.json = create_json_provider(app, services.config['JSON_ENCODER'])
+    
     # 블루프린트 등록
     app.register_blueprint(main_bp)
     
+    # 데이터셋 인덱스 미리 로드 (WARMUP=none이면 첫 요청 때 로드)
+    warmup = services.config['WARMUP']
+    if warmup == 'sync':
+        services.warm_up(background=False)
+    elif warmup == 'background':
+        services.warm_up(background=True)
+    
+    # 데이터셋 파일 변경 감시 시작 (DATASET_WATCH_INTERVAL=0이면 비활성화)
+    # 백그라운드 작업자도 같은 조건으로 시작 (JOB_WORKERS=0이면 별도 작업자 프로세스 사용)
+    if start_watcher:
+        services.reloader.start()
+        services.jobs.start()
+    
+    app.config['STARTUP_TIMINGS'] = {
+        'import_ms': IMPORT_MS,
+        'create_app_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
     return app
 
 if __name__ == '__main__':
     app = create_app()
+    print(f"시작 시간: {app.config['STARTUP_TIMINGS']}")
     # debug=True로 하되 use_reloader=False로 설정하여 자동 리로드 비활성화
     app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
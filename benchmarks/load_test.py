@@ -0,0 +1,326 @@
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+# index.html / image_detail.html에서 브라우저가 따라가는 링크와 질문 목록
+_DETAIL_LINK = re.compile(r"window\.location\.href='/image/([^/']+)/([^']+)'")
+_STATUS_IMAGE = re.compile(r'class="completion-status[^"]*" data-image-name="([^"]+)"')
+_THUMBNAIL = re.compile(r'<img src="(/images/[^"]+)"')
+_FEATURE_INPUT = re.compile(r'name="feature_([^"]+)" value="([^"]+)"')
+
+WRITE_ENDPOINTS = ('POST /api/feature-answers', 'POST /api/log-activity', 'DELETE /api/feature-answers')
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # nearest-rank 방식
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+
+class LoadStats:
+    """엔드포인트별 지연 시간과 오류를 모읍니다 (스레드 안전)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def add(self, endpoint: str, elapsed_ms: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+            if error:
+                counts = self.errors.setdefault(endpoint, {})
+                counts[error] = counts.get(error, 0) + 1
+
+    def summary(self, duration: float) -> Dict:
+        with self._lock:
+            latencies = {endpoint: sorted(values) for endpoint, values in self.latencies.items()}
+            errors = {endpoint: dict(counts) for endpoint, counts in self.errors.items()}
+
+        endpoints = {}
+        total_requests = total_errors = 0
+        for endpoint, values in sorted(latencies.items()):
+            error_count = sum(errors.get(endpoint, {}).values())
+            total_requests += len(values)
+            total_errors += error_count
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'throughput_rps': round(len(values) / duration, 2),
+                'p50_ms': percentile(values, 50),
+                'p95_ms': percentile(values, 95),
+                'p99_ms': percentile(values, 99),
+                'max_ms': round(values[-1], 2),
+                'error_rate': round(error_count / len(values), 4),
+                'errors': errors.get(endpoint, {}),
+            }
+
+        write_latencies = sorted(v for endpoint in WRITE_ENDPOINTS for v in latencies.get(endpoint, []))
+        return {
+            'duration_s': round(duration, 2),
+            'requests': total_requests,
+            'throughput_rps': round(total_requests / duration, 2) if duration else 0.0,
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+            'write_p95_ms': percentile(write_latencies, 95),
+            'write_p99_ms': percentile(write_latencies, 99),
+            'endpoints': endpoints,
+        }
+
+
+class Annotator(threading.Thread):
+    """판독자 한 명의 브라우저 동작을 흉내 냅니다.
+
+    main.js: 목록 페이지를 열면 화면의 모든 이미지에 대해 완료 상태(GET /api/feature-answers)를 조회
+    image_detail.js: 상세 페이지에서 답변을 불러오고, 라디오 변경 300ms 후 해당 특징만 자동 저장,
+                     해설 입력은 1초 뒤 저장, 초기화 시 DELETE
+    activity_logger.js: 라디오 변경마다, 그리고 초기화 후 POST /api/log-activity
+    """
+
+    def __init__(self, number: int, base_url: str, stats: LoadStats, deadline: float, args, seed: int):
+        super().__init__(name=f'annotator-{number}', daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.deadline = deadline
+        self.args = args
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+    def request(self, label: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.args.timeout, **kwargs)
+        except requests.Timeout:
+            self.stats.add(label, (time.perf_counter() - started) * 1000, 'timeout')
+            return None
+        except requests.RequestException as e:
+            self.stats.add(label, (time.perf_counter() - started) * 1000, f'connection: {type(e).__name__}')
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.add(label, elapsed_ms, self.classify_error(response))
+        return response
+
+    @staticmethod
+    def classify_error(response: requests.Response) -> Optional[str]:
+        body = response.text if response.headers.get('Content-Type', '').startswith(('application/json', 'text')) else ''
+        if 'database is locked' in body:
+            return 'database is locked'
+        if response.status_code == 409:
+            # 다른 판독자가 같은 특징을 먼저 저장함 (expected_version 불일치)
+            return 'conflict'
+        if response.status_code >= 400:
+            return f'http {response.status_code}'
+        if response.request.method == 'POST' and response.request.path_url.startswith('/api/feature-answers/'):
+            # 서버는 DB 오류(database is locked 포함)를 삼키고 saved_count만 줄여서 200을 반환함
+            try:
+                data = response.json()
+            except ValueError:
+                return 'invalid json'
+            if data.get('saved_count', 0) < data.get('total_count', 0):
+                return 'save failed'
+        return None
+
+    def think(self, mean: float) -> bool:
+        """사용자 대기 시간. 종료 시각을 넘기면 False."""
+        delay = self.rng.expovariate(1 / mean) if mean > 0 else 0
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        return time.monotonic() < self.deadline
+
+    # -----------------------------
+    # 시나리오
+    # -----------------------------
+    def open_index(self) -> List[Tuple[str, str]]:
+        response = self.request('GET /', 'GET', '/')
+        if response is None or response.status_code != 200:
+            return []
+        html = response.text
+        for image_name in _STATUS_IMAGE.findall(html):
+            self.request('GET /api/feature-answers', 'GET', f'/api/feature-answers/{quote(image_name)}')
+        if self.args.thumbnails:
+            for path in _THUMBNAIL.findall(html)[:self.args.thumbnails]:
+                self.request('GET /images/<thumbnail>', 'GET', path)
+        return _DETAIL_LINK.findall(html)
+
+    def annotate(self, category_id: str, filename: str) -> None:
+        page_url = f'/image/{category_id}/{filename}'
+        response = self.request('GET /image/<category>/<filename>', 'GET', f'/image/{quote(category_id)}/{quote(filename)}')
+        if response is None or response.status_code != 200:
+            return
+        self.request('GET /images/<category>/<filename>', 'GET', f'/images/{quote(category_id)}/{quote(filename)}')
+        answers_path = f'/api/feature-answers/{quote(filename)}'
+        response = self.request('GET /api/feature-answers', 'GET', answers_path)
+        # image_detail.js와 같이 불러온 버전을 expected_version으로 보냄
+        versions: Dict[str, int] = {}
+        if response is not None and response.status_code == 200:
+            versions = {fid: answer.get('version', 0) for fid, answer in response.json().get('answers', {}).items()}
+
+        options: Dict[str, List[str]] = {}
+        for feature_id, value in _FEATURE_INPUT.findall(response.text):
+            options.setdefault(feature_id, []).append(value)
+
+        for feature_id, values in options.items():
+            if not self.think(self.args.think_time):
+                return
+            answer = self.rng.choice(values)
+            # activity_logger.js: change 이벤트 즉시 기록 (name 속성이 feature_id로 전송됨)
+            self.request('POST /api/log-activity', 'POST', '/api/log-activity', json={
+                'action': 'answer_check',
+                'page_url': page_url,
+                'image_name': filename,
+                'feature_id': f'feature_{feature_id}',
+                'answer': answer,
+                'is_checked': True,
+                'element_type': 'radio',
+            })
+            # image_detail.js: 300ms 뒤 해당 특징만 자동 저장
+            time.sleep(0.3)
+            answer_data = {'answer': answer, 'reason': '', 'explanation': '', 'timestamp': datetime.now().isoformat()}
+            self.save(answers_path, feature_id, answer_data, versions)
+            if self.rng.random() < self.args.explanation_rate:
+                # 해설 입력: 타이핑이 끝나고 1초 뒤 다시 저장
+                time.sleep(1.0)
+                answer_data['explanation'] = 'load test explanation'
+                self.save(answers_path, feature_id, answer_data, versions)
+
+        if self.rng.random() < self.args.clear_rate:
+            response = self.request('DELETE /api/feature-answers', 'DELETE', answers_path)
+            if response is not None and response.status_code == 200:
+                versions.clear()
+                self.request('POST /api/log-activity', 'POST', '/api/log-activity', json={
+                    'action': 'answer_delete', 'page_url': page_url, 'image_name': filename,
+                })
+
+    def save(self, answers_path: str, feature_id: str, answer_data: Dict, versions: Dict[str, int]) -> None:
+        """특징 하나를 자동 저장하고, 응답(저장 버전 또는 409의 현재 버전)으로 versions를 갱신합니다."""
+        payload = dict(answer_data, expected_version=versions.get(feature_id, 0))
+        response = self.request('POST /api/feature-answers', 'POST', answers_path,
+                                json={'answers': {feature_id: payload}})
+        if response is None or response.status_code not in (200, 409):
+            return
+        data = response.json()
+        versions.update(data.get('versions', {}))
+        conflict = data.get('conflicts', {}).get(feature_id)
+        if conflict is not None:
+            versions[feature_id] = (conflict['current'] or {}).get('version', 0)
+
+    def run(self) -> None:
+        images = self.open_index()
+        while time.monotonic() < self.deadline:
+            if not images:
+                if not self.think(self.args.think_time):
+                    return
+                images = self.open_index()
+                continue
+            self.annotate(*self.rng.choice(images))
+            if not self.think(self.args.think_time):
+                return
+            if self.rng.random() < self.args.index_rate:
+                images = self.open_index()
+
+
+def run_level(base_url: str, annotators: int, args) -> Dict:
+    """annotators명을 ramp_up초에 걸쳐 투입하고 duration초 동안 부하를 겁니다."""
+    stats = LoadStats()
+    started = time.monotonic()
+    deadline = started + args.ramp_up + args.duration
+    workers = []
+    for number in range(annotators):
+        worker = Annotator(number, base_url, stats, deadline, args, seed=args.seed * 10007 + number)
+        worker.start()
+        workers.append(worker)
+        if args.ramp_up and annotators > 1:
+            time.sleep(args.ramp_up / annotators)
+    for worker in workers:
+        worker.join(timeout=max(0.0, deadline - time.monotonic()) + args.timeout + 5)
+
+    result = stats.summary(time.monotonic() - started)
+    result['annotators'] = annotators
+    return result
+
+
+def within_slo(result: Dict, args) -> bool:
+    write_p95 = result['write_p95_ms']
+    return (result['error_rate'] <= args.max_error_rate
+            and (write_p95 is None or write_p95 <= args.max_write_p95_ms))
+
+
+def print_level(result: Dict) -> None:
+    print(f"\n== 판독자 {result['annotators']}명: {result['requests']} 요청, "
+          f"{result['throughput_rps']} req/s, 오류율 {result['error_rate']:.2%}, "
+          f"쓰기 p95 {result['write_p95_ms']}ms")
+    print(f"{'엔드포인트':<36} {'요청':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'오류율':>8}")
+    for endpoint, row in result['endpoints'].items():
+        print(f"{endpoint:<36} {row['requests']:>7} {row['throughput_rps']:>8} {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['error_rate']:>8.2%}")
+        for error, count in row['errors'].items():
+            print(f"    - {error}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 서버에 여러 판독자의 동시 작업 부하를 겁니다')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='대상 서버 주소')
+    parser.add_argument('--annotators', default='5', help='동시 판독자 수. "5,10,20,40"처럼 주면 단계별로 실행')
+    parser.add_argument('--duration', type=float, default=60.0, help='단계별 측정 시간(초)')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='판독자 투입 시간(초)')
+    parser.add_argument('--think-time', type=float, default=2.0, help='조작 사이 평균 대기 시간(초, 지수 분포)')
+    parser.add_argument('--explanation-rate', type=float, default=0.2, help='특징마다 해설을 입력할 확률')
+    parser.add_argument('--clear-rate', type=float, default=0.05, help='이미지마다 답변을 초기화할 확률')
+    parser.add_argument('--index-rate', type=float, default=0.3, help='이미지를 마친 뒤 목록으로 돌아갈 확률')
+    parser.add_argument('--thumbnails', type=int, default=12, help='목록 페이지에서 받을 썸네일 수 (lazy loading)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='요청 타임아웃(초)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='수용 가능한 오류율')
+    parser.add_argument('--max-write-p95-ms', type=float, default=500.0, help='수용 가능한 쓰기 요청 p95(ms)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.annotators.split(',') if level.strip()]
+    results = []
+    capacity = 0
+    for annotators in levels:
+        result = run_level(args.url, annotators, args)
+        result['within_slo'] = within_slo(result, args)
+        results.append(result)
+        print_level(result)
+        if not result['within_slo']:
+            break
+        capacity = annotators
+
+    print(f"\n기준(오류율 <= {args.max_error_rate:.2%}, 쓰기 p95 <= {args.max_write_p95_ms}ms)을 만족한 "
+          f"최대 동시 판독자 수: {capacity or '없음'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.now().isoformat(),
+                    'url': args.url,
+                    'options': {key: value for key, value in vars(args).items() if key != 'output'},
+                },
+                'capacity': capacity,
+                'levels': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f'결과 저장: {args.output}')
+
+    if not results or not results[0]['within_slo']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic_data import generate_dataset
+
+
+def measure(func: Callable[[], object], repeat: int = 50, warmup: int = 3) -> Dict:
+    """func를 repeat번 실행한 시간 분포(ms)를 반환합니다. 서비스의 print 출력은 버립니다."""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            func()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(samples[0], 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        'max_ms': round(samples[-1], 4),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -----------------------------
+# 마이크로 벤치마크
+# -----------------------------
+def bench_services(services, images: List, repeat: int) -> Dict:
+    """DiagnosisService / ImageService / DatabaseService 메서드별 시간."""
+    diagnosis = services.diagnosis
+    image = services.image
+    database = services.database
+    category_id, filename, diagnosis_id = images[len(images) // 2]
+    diagnosis_name = diagnosis.get_diagnosis_by_id(diagnosis_id)['revised_answer_final']
+    counter = iter(range(10 ** 9))
+
+    def save_new_answer():
+        database.save_feature_answer(f'bench-{next(counter)}.png', 'f1', 'yes', 'reason')
+
+    def delete_answers():
+        name = f'bench-delete-{next(counter)}.png'
+        database.save_feature_answer(name, 'f1', 'yes')
+        database.delete_feature_answers(name)
+
+    cases = {
+        'diagnosis.get_diagnosis_by_image': lambda: diagnosis.get_diagnosis_by_image(category_id, filename),
+        'diagnosis.get_diagnosis_by_filename': lambda: diagnosis.get_diagnosis_by_filename(filename),
+        'diagnosis.get_diagnosis_by_id': lambda: diagnosis.get_diagnosis_by_id(diagnosis_id),
+        'diagnosis.get_extracted_features_by_diagnosis_id':
+            lambda: diagnosis.get_extracted_features_by_diagnosis_id(diagnosis_id),
+        'diagnosis.get_all_diagnoses': diagnosis.get_all_diagnoses,
+        'diagnosis.get_images_by_diagnosis': lambda: diagnosis.get_images_by_diagnosis(diagnosis_name),
+        'diagnosis.reload_changed(force)': lambda: diagnosis.reload_changed(force=True),
+        'image.get_categories': image.get_categories,
+        'image.get_images_in_category': lambda: image.get_images_in_category(category_id),
+        'image.get_category_by_id': lambda: image.get_category_by_id(category_id),
+        'image.reload_changed(force)': lambda: image.reload_changed(force=True),
+        'database.get_feature_answers': lambda: database.get_feature_answers(filename),
+        'database.save_feature_answer': lambda: database.save_feature_answer(filename, 'f1', 'yes', 'reason'),
+        'database.save_feature_answer(new)': save_new_answer,
+        'database.save_and_delete_feature_answers': delete_answers,
+        'database.get_all_answers': database.get_all_answers,
+        'database.log_answer_activity': lambda: database.log_answer_activity(
+            filename, 'answer_check', 'f1', 'yes', True, 'radio', 'featureForm', '/api/feature-answers'),
+        'database.get_answer_activity_logs': lambda: database.get_answer_activity_logs(limit=50),
+        'database.get_answer_logs_count': database.get_answer_logs_count,
+        'database.get_feature_answer_changes': lambda: database.get_feature_answer_changes(
+            since_version=database.get_current_version() - 50),
+        'search.search': lambda: services.search.search('feature', per_page=20),
+        'analytics.compute': services.analytics.compute,
+        # 첫 실행만 해시하고 이후는 stat 비교만 하는 재스캔 경로
+        'image_hashes.scan': services.image_hashes.scan,
+        'database.get_image_answer_summary': database.get_image_answer_summary,
+        'database.get_image_answer_summary_by_diagnosis':
+            lambda: database.get_image_answer_summary_by_diagnosis('SD001'),
+    }
+    # 전체 스캔/재구성은 느리므로 반복 횟수를 줄임
+    heavy = {'diagnosis.reload_changed(force)', 'image.reload_changed(force)', 'database.get_all_answers',
+             'database.get_image_answer_summary', 'database.get_image_answer_summary_by_diagnosis',
+             'analytics.compute', 'image_hashes.scan'}
+    return {
+        name: measure(func, repeat=max(5, repeat // 5) if name in heavy else repeat)
+        for name, func in cases.items()
+    }
+
+
+# -----------------------------
+# 엔드투엔드 (Flask 테스트 클라이언트)
+# -----------------------------
+def bench_endpoints(app, images: List, repeat: int) -> Dict:
+    client = app.test_client()
+    category_id, filename, _ = images[len(images) // 2]
+    answers = {'answers': {'f1': {'answer': 'yes', 'reason': 'bench'}}}
+    activity = {'image_name': filename, 'action': 'answer_check', 'feature_id': 'f1',
+                'answer': 'yes', 'is_checked': True, 'element_type': 'radio'}
+
+    def request(method: str, url: str, **kwargs):
+        def call():
+            response = client.open(url, method=method, **kwargs)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{method} {url} -> {response.status_code}')
+            response.close()
+        return call
+
+    cases = {
+        'GET /': request('GET', '/'),
+        'GET /?category': request('GET', f'/?category={category_id}'),
+        'GET /image/<category>/<filename>': request('GET', f'/image/{category_id}/{filename}'),
+        'GET /images/<category>/<filename>': request('GET', f'/images/{category_id}/{filename}'),
+        'GET /api/feature-answers': request('GET', f'/api/feature-answers/{filename}'),
+        'GET /api/image-detail': request('GET', f'/api/image-detail/{category_id}/{filename}'),
+        'GET /category (gzip)': request('GET', f'/category/{category_id}', headers={'Accept-Encoding': 'gzip'}),
+        'GET /api/feature-answers/changes': request('GET', f'/api/feature-answers/changes?category={category_id}'),
+        'POST /api/feature-answers': request('POST', f'/api/feature-answers/{filename}', json=answers),
+        'DELETE /api/feature-answers': request('DELETE', f'/api/feature-answers/bench-missing.png'),
+        'POST /api/log-activity': request('POST', '/api/log-activity', json=activity),
+        'GET /admin/logs': request('GET', '/admin/logs'),
+        'GET /admin/answers': request('GET', '/admin/answers'),
+        'GET /admin/queries': request('GET', '/admin/queries'),
+        'GET /admin/analytics': request('GET', '/admin/analytics'),
+        'GET /api/search': request('GET', '/api/search?q=synthetic+feature'),
+        'GET /admin/export/answers': request('GET', '/admin/export/answers?format=jsonl'),
+    }
+    heavy = {'GET /', 'GET /admin/answers', 'GET /admin/export/answers'}
+    return {
+        name: measure(func, repeat=max(5, repeat // 5) if name in heavy else repeat)
+        for name, func in cases.items()
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """중앙값이 threshold 배 이상 느려진 항목을 찾습니다."""
+    regressions = []
+    for section in ('services', 'endpoints'):
+        for name, result in current.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous or not previous['median_ms']:
+                continue
+            ratio = result['median_ms'] / previous['median_ms']
+            if ratio >= threshold:
+                regressions.append(f'{section}/{name}: {previous["median_ms"]}ms -> {result["median_ms"]}ms (x{ratio:.2f})')
+    return regressions
+
+
+def run(categories: int, images_per_category: int, answers: int, logs: int, repeat: int,
+        seed: int = 0, data_dir: Optional[str] = None) -> Dict:
+    with tempfile.TemporaryDirectory(prefix='annotation-bench-') as tmp:
+        root = data_dir or tmp
+        generate_started = time.perf_counter()
+        dataset = generate_dataset(root, categories=categories, images_per_category=images_per_category,
+                                   answers=answers, logs=logs, seed=seed)
+        generate_ms = (time.perf_counter() - generate_started) * 1000
+
+        # create_app import 시점의 환경 변수 설정이 섞이지 않도록 여기서 import
+        from app import IMPORT_MS, create_app
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            # 로그 출력 비용이 측정값에 섞이지 않도록 경고 이상만 기록
+            app = create_app(dict(dataset['config'], LOG_LEVEL='WARNING'), start_watcher=False)
+        services = app.extensions['services']
+
+        results = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'git_commit': _git_commit(),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'dataset': dataset['params'],
+                'repeat': repeat,
+            },
+            'startup': dict(app.config['STARTUP_TIMINGS'], import_ms=IMPORT_MS,
+                            generate_ms=round(generate_ms, 2), **services.timings),
+            'services': bench_services(services, dataset['images'], repeat),
+            'endpoints': bench_endpoints(app, dataset['images'], repeat),
+        }
+        services.database.reset_connections()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 데이터셋으로 서비스/엔드포인트 벤치마크 실행')
+    parser.add_argument('--categories', type=int, default=8)
+    parser.add_argument('--images-per-category', type=int, default=40)
+    parser.add_argument('--answers', type=int, default=2000)
+    parser.add_argument('--logs', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help='합성 데이터를 남겨 둘 폴더 (기본: 임시 폴더)')
+    parser.add_argument('--output', '-o', help='결과 JSON 저장 경로 (기본: 표준 출력)')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=1.25, help='회귀로 볼 중앙값 배율')
+    args = parser.parse_args()
+
+    results = run(args.categories, args.images_per_category, args.answers, args.logs,
+                  args.repeat, seed=args.seed, data_dir=args.data_dir)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f'결과 저장: {args.output}')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f'회귀: {line}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
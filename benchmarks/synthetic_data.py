@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from service.database_service import DatabaseService
+
+ACTIONS = ('answer_check', 'form_submit', 'answer_delete')
+ANSWERS = ('yes', 'no', 'uncertain')
+
+
+def _tiny_png() -> bytes:
+    """1x1 회색 PNG (실제 이미지 디코딩 없이 send_from_directory 경로만 측정하기 위한 더미)."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(b'\x00\x80')) + chunk(b'IEND', b''))
+
+
+def generate_dataset(root: str, categories: int = 8, images_per_category: int = 40,
+                     features_per_image: int = 5, answers: int = 2000, logs: int = 10000,
+                     seed: int = 0) -> Dict:
+    """root 아래에 벤치마크용 이미지 폴더, 매니페스트, 특징 파일, 답변 DB를 만듭니다.
+
+    반환값의 'config'는 create_app()/ServiceContainer에 그대로 넘길 수 있는 설정이고,
+    'images'는 (category_id, filename, diagnosis_id) 목록입니다.
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    images_folder = os.path.join(root, 'downloaded_images')
+    png = _tiny_png()
+
+    manifest: List[Dict] = []
+    features: List[Dict] = []
+    images: List[Tuple[str, str, int]] = []
+    next_id = 100000
+    for category_index in range(categories):
+        diagnosis = f'Synthetic Diagnosis {category_index:03d} (SD{category_index})'
+        category_id = diagnosis.replace(' ', '_')
+        os.makedirs(os.path.join(images_folder, category_id), exist_ok=True)
+        for image_index in range(images_per_category):
+            next_id += 1
+            filename = f'SD{category_index:03d}-{image_index:05d}.png'
+            with open(os.path.join(images_folder, category_id, filename), 'wb') as f:
+                f.write(png)
+            manifest.append({
+                'id': next_id,
+                'usage': 'train',
+                'dataset': 'Synthetic',
+                'type': 'Diagnosis',
+                'image': f'/data/Synthetic/SD{category_index}/{filename}',
+                'diagnosis': f'SD{category_index}',
+                'rationale': '**[Rationale]**\n' + ' '.join(['finding'] * 200),
+                'question': 'What is the specific condition based on the findings?',
+                'revised_answer_final': diagnosis,
+                'image_type': 'Synthetic',
+                'hf_image': f'https://example.invalid/Synthetic/{filename}',
+                'sampled_diagnosis': diagnosis,
+            })
+            features.append({
+                'id': next_id,
+                'original_text': ' '.join(['feature text'] * 50),
+                'extracted_features': {'features': [
+                    {'id': f'f{n}', 'label': f'feature {n}', 'description': f'synthetic feature {n}'}
+                    for n in range(1, features_per_image + 1)
+                ]},
+                'processing_timestamp': datetime.now().isoformat(),
+            })
+            images.append((category_id, filename, next_id))
+
+    manifest_path = os.path.join(root, 'sampled_by_diagnosis.json')
+    features_path = os.path.join(root, 'extracted_features.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    with open(features_path, 'w', encoding='utf-8') as f:
+        json.dump(features, f, ensure_ascii=False)
+
+    db_path = os.path.join(root, 'medical_features.db')
+    _populate_database(db_path, images, features_per_image, answers, logs, rng)
+
+    return {
+        'root': root,
+        'images': images,
+        'config': {
+            'IMAGES_FOLDER': images_folder,
+            # 카탈로그 없이 폴더 스캔 경로를 사용
+            'IMAGE_CATALOG_PATH': os.path.join(root, 'image_catalog.json'),
+            'DIAGNOSIS_MANIFESTS': [manifest_path],
+            'FEATURES_FILES': [features_path],
+            'DATABASE_PATH': db_path,
+            'DATASET_WATCH_INTERVAL': 0,
+            'WARMUP': 'sync',
+        },
+        'params': {
+            'categories': categories,
+            'images_per_category': images_per_category,
+            'features_per_image': features_per_image,
+            'answers': answers,
+            'logs': logs,
+            'seed': seed,
+        },
+    }
+
+
+def _populate_database(db_path: str, images: List[Tuple[str, str, int]], features_per_image: int,
+                       answers: int, logs: int, rng: random.Random) -> None:
+    """스키마는 DatabaseService로 만들고, 행은 executemany로 한 번에 채웁니다."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    DatabaseService(db_path=db_path).init_database()
+
+    started = datetime.now() - timedelta(days=7)
+    feature_ids = [f'f{n}' for n in range(1, features_per_image + 1)] + ['image_label_match']
+    pairs = [(filename, feature_id) for _, filename, _ in images for feature_id in feature_ids]
+    answer_rows = [
+        (filename, feature_id, rng.choice(ANSWERS), 'reason', '',
+         (started + timedelta(seconds=rng.randint(0, 7 * 86400))).isoformat(), version)
+        for version, (filename, feature_id) in enumerate(rng.sample(pairs, min(answers, len(pairs))), start=1)
+    ]
+    log_rows = []
+    for _ in range(logs):
+        _, filename, _ = rng.choice(images)
+        log_rows.append((
+            filename, rng.choice(ACTIONS), rng.choice(feature_ids), rng.choice(ANSWERS),
+            rng.random() < 0.5, 'radio', 'featureForm', '/api/feature-answers',
+            (started + timedelta(seconds=rng.randint(0, 7 * 86400))).isoformat(),
+        ))
+
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO feature_answers
+            (image_name, feature_id, answer, reason, explanation, timestamp, version)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', answer_rows)
+        conn.execute('UPDATE change_counter SET version = ? WHERE id = 1', (len(answer_rows),))
+        conn.executemany('''
+            INSERT INTO answer_activity_logs
+            (image_name, action, feature_id, answer, is_checked, element_type, form_id, form_action, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', log_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='벤치마크용 합성 데이터셋 생성')
+    parser.add_argument('output', help='데이터를 만들 폴더')
+    parser.add_argument('--categories', type=int, default=8)
+    parser.add_argument('--images-per-category', type=int, default=40)
+    parser.add_argument('--features-per-image', type=int, default=5)
+    parser.add_argument('--answers', type=int, default=2000)
+    parser.add_argument('--logs', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = generate_dataset(
+        args.output, categories=args.categories, images_per_category=args.images_per_category,
+        features_per_image=args.features_per_image, answers=args.answers, logs=args.logs, seed=args.seed,
+    )
+    print(json.dumps(dataset['config'], ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""gunicorn 운영 설정
+
+환경 변수로 조정합니다.
+    GUNICORN_BIND     (기본 0.0.0.0:5000)
+    GUNICORN_WORKERS  (기본 CPU 수 * 2 + 1)
+    GUNICORN_THREADS  (워커당 스레드 수, 기본 4)
+    GUNICORN_TIMEOUT  (기본 60초)
+
+SIGHUP을 보내면 진행 중인 요청을 마친 뒤 워커를 차례로 교체합니다 (graceful reload).
+    kill -HUP $(cat gunicorn.pid)
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# 읽기 전용 데이터셋 인덱스를 마스터에서 미리 로드하여 워커들이 메모리를 공유
+preload_app = True
+
+pidfile = 'gunicorn.pid'
+accesslog = '-'
+errorlog = '-'
+
+
+def on_reload(server):
+    """SIGHUP 시 새 워커를 fork하기 전에 마스터의 인덱스를 최신 상태로 갱신합니다."""
+    from wsgi import services
+
+    services.reloader.reload(force=False)
+    # 리로드 중 연 연결이 마스터에 남아 새 워커로 상속되지 않도록 닫음
+    services.database.close_connection()
+
+
+def post_fork(server, worker):
+    """워커마다 부모의 SQLite 연결을 버리고, 데이터셋 감시 스레드와 작업 실행 스레드를 새로 시작합니다."""
+    from wsgi import services
+
+    services.after_fork()
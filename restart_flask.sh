@@ -1,5 +1,34 @@
 #!/bin/bash
 
+# 데이터셋만 다시 읽을 때는 프로세스를 재시작하지 않음: ./restart_flask.sh reload
+if [ "$1" == "reload" ]; then
+    echo "🔄 데이터셋 리로드 요청 중..."
+    curl -s -X POST http://localhost:5000/admin/reload
+    echo ""
+    exit 0
+fi
+
+# 운영 모드(gunicorn): 실행 중이면 SIGHUP으로 graceful reload, 아니면 새로 시작
+#   ./restart_flask.sh prod
+if [ "$1" == "prod" ]; then
+    cd /home/ubuntu/medical_vlm
+    if [ -f gunicorn.pid ] && kill -0 "$(cat gunicorn.pid)" 2>/dev/null; then
+        echo "🔄 gunicorn graceful reload (SIGHUP)..."
+        kill -HUP "$(cat gunicorn.pid)"
+    else
+        echo "🚀 gunicorn 시작..."
+        nohup gunicorn -c gunicorn.conf.py wsgi:app > flask.log 2>&1 &
+        sleep 3
+        echo "🆔 마스터 프로세스 ID: $(cat gunicorn.pid)"
+    fi
+    # 백그라운드 작업은 웹 워커가 아닌 별도 작업자 프로세스가 실행
+    if ! pgrep -f "service.job_queue worker" > /dev/null; then
+        echo "🛠️  작업자 프로세스 시작..."
+        nohup python -m service.job_queue worker > job_worker.log 2>&1 &
+    fi
+    exit 0
+fi
+
 echo "🚀 Flask 앱 재시작 시작..."
 
 # Flask 앱 디렉토리로 이동 (실제 경로로 수정하세요)
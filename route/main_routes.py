@@ -1,14 +1,89 @@
-from flask import Blueprint, render_template, jsonify, send_from_directory, redirect, request
-from service.image_service import ImageService
-from service.diagnosis_service import DiagnosisService
-from service.database_service import DatabaseService
+from flask import Blueprint, render_template, jsonify, send_from_directory, redirect, request, current_app, g, Response, stream_with_context, make_response, url_for
+from werkzeug.local import LocalProxy
+from service.event_service import MarkerCache, events
+from service.export_service import CONTENT_TYPES, AnnotationExporter
+from service.search_service import SEARCH_SOURCES
+from service.static_assets import IMMUTABLE_CACHE_CONTROL, MIMETYPES
+from service.metrics_service import metrics
+import json
+import logging
 import os
+import queue
+import time
 from datetime import datetime, timedelta
 
 main_bp = Blueprint('main', __name__)
-image_service = ImageService()
-diagnosis_service = DiagnosisService()
-database_service = DatabaseService()
+logger = logging.getLogger(__name__)
+
+
+def get_services():
+    """create_app이 등록한 서비스 컨테이너를 반환합니다."""
+    return current_app.extensions['services']
+
+
+# 서비스는 import 시점이 아니라 요청에서 처음 사용할 때 컨테이너가 생성
+image_service = LocalProxy(lambda: get_services().image)
+diagnosis_service = LocalProxy(lambda: get_services().diagnosis)
+database_service = LocalProxy(lambda: get_services().database)
+dataset_reloader = LocalProxy(lambda: get_services().reloader)
+activity_archive = LocalProxy(lambda: get_services().archive)
+database_backup = LocalProxy(lambda: get_services().backup)
+search_service = LocalProxy(lambda: get_services().search)
+annotation_analytics = LocalProxy(lambda: get_services().analytics)
+feature_vocabulary = LocalProxy(lambda: get_services().vocabulary)
+image_hashes = LocalProxy(lambda: get_services().image_hashes)
+response_compressor = LocalProxy(lambda: get_services().compression)
+static_assets = LocalProxy(lambda: get_services().assets)
+job_queue = LocalProxy(lambda: get_services().jobs)
+
+@main_bp.before_app_request
+def _start_request_timer():
+    """요청 시작 시각 기록 및 처리 중 요청 수 증가"""
+    g.request_started = time.perf_counter()
+    metrics.gauge_add('http_requests_in_flight', 1)
+
+@main_bp.after_app_request
+def _record_request_metrics(response):
+    """엔드포인트별 처리 시간과 상태 코드 기록"""
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.endpoint or 'not_found'
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                        endpoint=endpoint, method=request.method)
+        metrics.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                    status=response.status_code)
+    return response
+
+@main_bp.after_app_request
+def _compress_response(response):
+    """Accept-Encoding에 따라 본문 압축 (메트릭 훅보다 먼저 실행되어 압축 시간도 요청 시간에 포함)"""
+    return response_compressor.compress_response(response)
+
+@main_bp.teardown_app_request
+def _finish_request(exc):
+    if g.pop('request_started', None) is not None:
+        metrics.gauge_add('http_requests_in_flight', -1)
+
+@main_bp.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 형식 메트릭 (워커 프로세스별 값)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@main_bp.route('/healthz')
+def healthz():
+    """프로세스 생존 확인 (서비스 로드 여부와 무관)"""
+    return jsonify({'status': 'ok'})
+
+@main_bp.route('/readyz')
+def readyz():
+    """서비스와 데이터셋 인덱스가 준비되었는지 확인하고 시작 시간 측정값을 보고"""
+    services = get_services()
+    ready = services.is_ready()
+    return jsonify({
+        'status': 'ready' if ready else 'starting',
+        'error': services.warmup_error,
+        'startup': dict(current_app.config.get('STARTUP_TIMINGS', {}), **services.timings)
+    }), 200 if ready else 503
 
 @main_bp.route('/')
 def index():
@@ -28,36 +103,17 @@ def index():
             # 존재하지 않는 카테고리면 첫 번째 카테고리로 리다이렉트
             return redirect('/')
         # 특정 카테고리 선택 시 해당 카테고리의 이미지만 표시
-        images = image_service.get_images_in_category(selected_category['id'])
-        
-        # 각 이미지에 진단 정보 추가
-        for image in images:
-            image_diagnosis = diagnosis_service.get_diagnosis_by_filename(image['filename'])
-            if image_diagnosis:
-                image['diagnosis_id'] = image_diagnosis.get('id', 'N/A')
-                image['has_diagnosis'] = True
-            else:
-                image['diagnosis_id'] = 'N/A'
-                image['has_diagnosis'] = False
+        images = _category_thumbnails(selected_category['id'])
     else:
         # 쿼리 파라미터가 없으면 모든 이미지 표시
         selected_category = None
         all_images = []
         for category in categories:
-            category_images = image_service.get_images_in_category(category['id'])
-            # 각 이미지에 카테고리 정보와 진단 정보 추가
+            category_images = _category_thumbnails(category['id'])
+            # 각 이미지에 카테고리 정보 추가
             for img in category_images:
                 img['category_name'] = category['name']
                 img['category_id'] = category['id']
-                
-                # 진단 정보 추가
-                image_diagnosis = diagnosis_service.get_diagnosis_by_filename(img['filename'])
-                if image_diagnosis:
-                    img['diagnosis_id'] = image_diagnosis.get('id', 'N/A')
-                    img['has_diagnosis'] = True
-                else:
-                    img['diagnosis_id'] = 'N/A'
-                    img['has_diagnosis'] = False
             all_images.extend(category_images)
         images = all_images
     
@@ -69,65 +125,149 @@ def index():
 @main_bp.route('/category/<category_id>')
 def category(category_id):
     """특정 카테고리의 이미지들을 JSON으로 반환"""
-    images = image_service.get_images_in_category(category_id)
-    return jsonify({'images': images})
+    # 이미지 스냅샷이 바뀌기 전까지 직렬화/압축한 본문을 재사용
+    return response_compressor.cached_json(
+        ('category', category_id), image_service.get_filenames(category_id),
+        lambda: {'images': image_service.get_images_in_category(category_id)})
+
+def _image_links(category_id, filename):
+    """이미지 하나의 상세 페이지/이미지 파일/상세 데이터 URL"""
+    if not filename:
+        return None
+    return {
+        'filename': filename,
+        'url': url_for('main.image_detail', category_id=category_id, filename=filename),
+        'image_url': url_for('main.serve_image', category_id=category_id, filename=filename),
+        'data_url': url_for('main.api_image_detail', category_id=category_id, filename=filename),
+    }
+
+def _prefetch_link_header(detail):
+    """현재 이미지는 preload, 다음 상세 페이지와 그 이미지는 prefetch하도록 하는 Link 헤더 값"""
+    links = [f'<{detail["image_url"]}>; rel=preload; as=image']
+    if detail['next']:
+        links.append(f'<{detail["next"]["url"]}>; rel=prefetch; as=document')
+        links.append(f'<{detail["next"]["image_url"]}>; rel=prefetch; as=image')
+    return ', '.join(links)
+
+def _category_thumbnails(category_id):
+    """카테고리 이미지 목록과 각 이미지의 진단 ID.
+    
+    진단 ID는 이미지 스냅샷/진단 뷰가 바뀔 때만 다시 계산되므로 이미지마다 조회하지 않습니다.
+    """
+    filenames = image_service.get_filenames(category_id)
+    diagnosis_ids = diagnosis_service.get_diagnosis_ids(category_id, filenames)
+    category_path = os.path.join(image_service.images_folder, category_id)
+    return [
+        {
+            'filename': filename,
+            'path': f'/images/{category_id}/{filename}',
+            'full_path': os.path.join(category_path, filename),
+            'diagnosis_id': diagnosis_id if diagnosis_id is not None else 'N/A',
+            'has_diagnosis': diagnosis_id is not None,
+        }
+        for filename, diagnosis_id in zip(filenames, diagnosis_ids)
+    ]
+
+def _feature_questions(category_id, filename):
+    """이미지의 진단 정보와 특징 질문 목록 (id, label, description)"""
+    diagnosis_info = diagnosis_service.get_diagnosis_by_image(category_id, filename)
+    features = []
+    if diagnosis_info:
+        extracted_features = diagnosis_service.get_extracted_features_by_diagnosis_id(diagnosis_info.get('id'))
+        if extracted_features:
+            features = [
+                {'id': feature.get('id'), 'label': feature.get('label', ''), 'description': feature.get('description', '')}
+                for feature in extracted_features.get('extracted_features', {}).get('features', [])
+            ]
+    return diagnosis_info, features
+
+def _image_detail_data(category_id, filename):
+    """상세 페이지에 필요한 데이터 묶음 (진단 요약, 특징 질문, 저장된 답변, 이전/다음 이미지).
+    
+    version은 답변을 읽기 직전의 변경 버전이므로, 클라이언트는 프리페치해 둔 묶음을 쓰더라도
+    /api/feature-answers/changes?since=<version>으로 그 뒤의 변경만 받아 최신 상태로 맞출 수 있습니다.
+    """
+    diagnosis_info, features = _feature_questions(category_id, filename)
+    
+    version = database_service.get_current_version()
+    answers = database_service.get_feature_answers(filename)
+    prev_filename, next_filename = image_service.get_neighbors(category_id, filename)
+    return {
+        'category_id': category_id,
+        'filename': filename,
+        'image_url': url_for('main.serve_image', category_id=category_id, filename=filename),
+        'diagnosis': {
+            'id': diagnosis_info.get('id'),
+            'diagnosis': diagnosis_info.get('revised_answer_final', ''),
+        } if diagnosis_info else None,
+        'features': features,
+        'answers': answers,
+        'version': version,
+        # 이미지 라벨 일치 여부 질문 1개 + 특징 질문들
+        'total_questions': 1 + len(features) if features else 0,
+        'answered_questions': len(answers),
+        'prev': _image_links(category_id, prev_filename),
+        'next': _image_links(category_id, next_filename),
+    }
 
 @main_bp.route('/image/<category_id>/<filename>')
 def image_detail(category_id, filename):
-    """이미지 상세보기 페이지"""
-    categories = image_service.get_categories()
+    """이미지 상세보기 페이지 (저장된 답변까지 함께 렌더링)"""
     selected_category = image_service.get_category_by_id(category_id)
     
     if not selected_category:
         return "카테고리를 찾을 수 없습니다.", 404
     
-    # JSON 데이터에서 진단 정보 가져오기
-    diagnosis_info = diagnosis_service.get_diagnosis_by_image(category_id, filename)
+    # 진단 요약, 특징 질문, 저장된 답변, 이전/다음 이미지를 한 번에 조회 (상세 데이터 API와 같은 묶음)
+    detail = _image_detail_data(category_id, filename)
+    if detail['diagnosis'] and not detail['features']:
+        logger.info("ID %s에 대한 특징 데이터를 찾을 수 없습니다.", detail['diagnosis']['id'],
+                    extra={'event': 'features_missing'})
     
     # 현재 이미지 정보
     current_image = {
         'filename': filename,
-        'path': f'/images/{category_id}/{filename}',
+        'path': detail['image_url'],
         'category_id': category_id,
-        'id': diagnosis_info.get('id', 'N/A') if diagnosis_info else 'N/A'
+        'id': detail['diagnosis']['id'] if detail['diagnosis'] else 'N/A'
     }
     
-    # extracted_features.json에서 특징 데이터 가져오기
-    extracted_features = None
-    if diagnosis_info:
-        # diagnosis_service를 통해 특징 데이터 가져오기
-        extracted_features = diagnosis_service.get_extracted_features_by_diagnosis_id(diagnosis_info.get('id'))
-        
-        if extracted_features:
-            print(f"특징 데이터 찾음: ID {extracted_features.get('id')}")
-        else:
-            print(f"ID {diagnosis_info.get('id')}에 대한 특징 데이터를 찾을 수 없습니다.")
-    
-    # 카테고리의 모든 이미지
-    images = image_service.get_images_in_category(category_id)
-    
-    # 각 이미지에 진단 정보 추가
-    for image in images:
-        image_diagnosis = diagnosis_service.get_diagnosis_by_filename(image['filename'])
-        if image_diagnosis:
-            image['diagnosis_id'] = image_diagnosis.get('id', 'N/A')
-            image['has_diagnosis'] = True
-        else:
-            image['diagnosis_id'] = 'N/A'
-            image['has_diagnosis'] = False
-    
-    return render_template('image_detail.html', 
-                         categories=categories,
+    response = make_response(render_template('image_detail.html', 
+                         categories=image_service.get_categories(),
                          selected_category=selected_category,
                          current_image=current_image,
-                         images=images,
-                         diagnosis_info=diagnosis_info,
-                         extracted_features=extracted_features)
+                         images=_category_thumbnails(category_id),
+                         detail=detail))
+    # 다음 이미지의 상세 페이지와 이미지 파일은 미리 받아 두도록 Link 헤더로 알림
+    response.headers['Link'] = _prefetch_link_header(detail)
+    return response
 
 @main_bp.route('/images/<category_id>/<filename>')
 def serve_image(category_id, filename):
     """이미지 파일을 서빙합니다."""
-    return send_from_directory(os.path.join('downloaded_images', category_id), filename)
+    return send_from_directory(os.path.join(image_service.images_folder, category_id), filename)
+
+@main_bp.app_template_global()
+def asset_url(filename):
+    """템플릿용 정적 파일 URL: 빌드된 파일이 있으면 내용 해시가 붙은 /assets 경로, 없으면 /static 경로"""
+    hashed = static_assets.hashed_path(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('main.serve_asset', filename=hashed)
+
+@main_bp.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """빌드된 정적 파일 - 미리 압축된 .br/.gz 중 클라이언트가 받는 것을 보내고, 재검증 없이 캐시하도록 함"""
+    path, encoding = static_assets.select(filename, request.accept_encodings)
+    if path is None:
+        return "파일을 찾을 수 없습니다.", 404
+    response = send_from_directory(os.path.abspath(static_assets.dist_dir), path,
+                                   mimetype=MIMETYPES.get(os.path.splitext(filename)[1]))
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
 
 @main_bp.route('/debug/diagnosis/<category_id>/<filename>')
 def debug_diagnosis(category_id, filename):
@@ -142,24 +282,19 @@ def debug_diagnosis(category_id, filename):
 @main_bp.route('/debug/category/<category_id>')
 def debug_category(category_id):
     """카테고리의 모든 이미지와 진단 정보 디버깅용 라우트"""
-    images = image_service.get_images_in_category(category_id)
+    def build():
+        images = _category_thumbnails(category_id)
+        return {
+            'category_id': category_id,
+            'images': images,
+            'total_images': len(images),
+            'images_with_diagnosis': sum(1 for img in images if img['has_diagnosis'])
+        }
     
-    # 각 이미지에 진단 정보 추가
-    for image in images:
-        image_diagnosis = diagnosis_service.get_diagnosis_by_filename(image['filename'])
-        if image_diagnosis:
-            image['diagnosis_id'] = image_diagnosis.get('id', 'N/A')
-            image['has_diagnosis'] = True
-        else:
-            image['diagnosis_id'] = 'N/A'
-            image['has_diagnosis'] = False
-    
-    return jsonify({
-        'category_id': category_id,
-        'images': images,
-        'total_images': len(images),
-        'images_with_diagnosis': sum(1 for img in images if img['has_diagnosis'])
-    })
+    # 파일명 튜플과 진단 ID 튜플은 스냅샷/진단 뷰가 바뀌기 전까지 같은 객체
+    filenames = image_service.get_filenames(category_id)
+    marker = (filenames, diagnosis_service.get_diagnosis_ids(category_id, filenames))
+    return response_compressor.cached_json(('debug_category', category_id), marker, build)
 
 @main_bp.route('/debug/features/<diagnosis_id>')
 def debug_features(diagnosis_id):
@@ -176,28 +311,126 @@ def debug_features(diagnosis_id):
     except ValueError:
         return jsonify({'error': 'Invalid diagnosis ID'}), 400
 
+@main_bp.route('/api/feature-answers/changes', methods=['GET'])
+def get_feature_answer_changes():
+    """since 버전(또는 since_timestamp) 이후 변경된 답변만 반환합니다.
+    
+    범위: image=<파일명> (여러 개 가능), category=<카테고리 ID>, 없으면 전체.
+    응답의 version을 다음 요청의 since로 넘기고, has_more가 true면 바로 이어서 요청합니다.
+    """
+    since = request.args.get('since', 0, type=int)
+    since_timestamp = request.args.get('since_timestamp')
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+    
+    image_names = request.args.getlist('image') or None
+    category_id = request.args.get('category')
+    if category_id:
+        if not image_service.get_category_by_id(category_id):
+            return jsonify({'error': 'Unknown category'}), 404
+        category_images = [image['filename'] for image in image_service.get_images_in_category(category_id)]
+        image_names = [name for name in image_names if name in set(category_images)] if image_names else category_images
+    
+    changes = database_service.get_feature_answer_changes(
+        since_version=since, image_names=image_names, since_timestamp=since_timestamp, limit=limit
+    )
+    if changes is None:
+        return jsonify({'error': 'Failed to load changes'}), 500
+    return jsonify(changes)
+
+def _search_from_request():
+    """q, source(rationale|feature|answer, 여러 개 가능), page, per_page 파라미터로 검색합니다."""
+    sources = [source for source in request.args.getlist('source') if source in SEARCH_SOURCES]
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    return search_service.search(request.args.get('q', ''), sources or list(SEARCH_SOURCES),
+                                 page=page, per_page=per_page), sources
+
+@main_bp.route('/api/search', methods=['GET'])
+def api_search():
+    """rationale, 특징 라벨/설명, 판독자 reason/explanation 전문 검색 (bm25 순위, 페이지 단위)"""
+    if not request.args.get('q', '').strip():
+        return jsonify({'error': 'Missing query'}), 400
+    result, _ = _search_from_request()
+    for item in result['results']:
+        item.pop('snippet_html', None)
+    return jsonify(result), 400 if 'error' in result else 200
+
+@main_bp.route('/api/analytics', methods=['GET'])
+def api_analytics():
+    """특징별 답변 비율, 진단별 image_label_match 불일치율, 판독자 간 일치도 (답변이 바뀔 때만 다시 계산)"""
+    try:
+        return jsonify(annotation_analytics.get())
+    except Exception as e:
+        logger.exception("답변 분석 오류: %s", e)
+        return jsonify({'error': 'Failed to compute analytics'}), 500
+
+@main_bp.route('/api/feature-vocabulary', methods=['GET'])
+def api_feature_vocabulary():
+    """canonical 특징 목록과 묶인 원래 라벨들. ?label=<라벨>이면 그 라벨이 붙을 canonical만 반환합니다."""
+    try:
+        label = request.args.get('label', '').strip()
+        if label:
+            return jsonify(feature_vocabulary.match(label))
+        version = feature_vocabulary.version()
+        return response_compressor.cached_json(
+            'feature_vocabulary', version,
+            lambda: {'version': version, 'features': feature_vocabulary.canonical_features()})
+    except Exception as e:
+        logger.exception("특징 어휘 조회 오류: %s", e)
+        return jsonify({'error': 'Failed to load feature vocabulary'}), 500
+
+# 요청으로 받을 수 있는 최대 pHash 거리 (16이면 16비트 조각마다 4비트 이하 반전, 조각당 마스크 2517개)
+MAX_DISTANCE_LIMIT = 16
+
+def _parse_max_distance(value):
+    """?max_distance 값을 해석합니다 (없으면 None = 설정 기본값, 0~MAX_DISTANCE_LIMIT 밖이면 ValueError)."""
+    if value is None:
+        return None
+    distance = int(value)
+    if not 0 <= distance <= MAX_DISTANCE_LIMIT:
+        raise ValueError(distance)
+    return distance
+
+@main_bp.route('/api/duplicates', methods=['GET'])
+def api_duplicates():
+    """지각 해시 인덱스에서 찾은 중복/유사 이미지 그룹 (?max_distance=<pHash 해밍 거리, 0~16>)"""
+    try:
+        max_distance = _parse_max_distance(request.args.get('max_distance'))
+    except ValueError:
+        return jsonify({'error': f'Invalid max_distance (0-{MAX_DISTANCE_LIMIT})'}), 400
+    try:
+        return jsonify(image_hashes.find_duplicates(max_distance))
+    except Exception as e:
+        logger.exception("중복 이미지 조회 오류: %s", e)
+        return jsonify({'error': 'Failed to find duplicates'}), 500
+
+@main_bp.route('/api/image-detail/<category_id>/<filename>', methods=['GET'])
+def api_image_detail(category_id, filename):
+    """상세 페이지 데이터 묶음 (진단 요약, 특징 질문, 저장된 답변, 이전/다음 이미지)"""
+    if not image_service.get_category_by_id(category_id):
+        return jsonify({'error': 'Category not found'}), 404
+    try:
+        response = jsonify(_image_detail_data(category_id, filename))
+        # 프리페치한 응답도 답변이 바뀌면 버전으로 보정하므로 브라우저가 잠시 재사용해도 됨
+        response.headers['Cache-Control'] = 'private, max-age=60'
+        return response
+    except Exception as e:
+        logger.exception("상세 데이터 조회 오류: %s", e)
+        return jsonify({'error': 'Failed to load image detail'}), 500
+
 @main_bp.route('/api/feature-answers/<image_name>', methods=['GET'])
 def get_feature_answers(image_name):
     """특정 이미지의 특징 답변을 가져옵니다."""
     try:
         answers = database_service.get_feature_answers(image_name)
         
-        # 이미지의 총 질문 개수 계산
+        # 이미지의 총 질문 개수 계산: 이미지가 들어 있는 카테고리 중 특징 데이터가 있는 첫 카테고리 기준
         total_questions = 0
-        # 모든 카테고리에서 해당 이미지 찾기
-        for category in image_service.get_categories():
-            category_images = image_service.get_images_in_category(category['id'])
-            for img in category_images:
-                if img['filename'] == image_name:
-                    # 해당 이미지의 특징 데이터 확인
-                    diagnosis_info = diagnosis_service.get_diagnosis_by_image(category['id'], image_name)
-                    if diagnosis_info:
-                        extracted_features = diagnosis_service.get_extracted_features_by_diagnosis_id(diagnosis_info.get('id'))
-                        if extracted_features and extracted_features.get('extracted_features', {}).get('features'):
-                            # 이미지 라벨 일치 여부 질문 1개 + 특징 질문들
-                            total_questions = 1 + len(extracted_features['extracted_features']['features'])
-                    break
-            if total_questions > 0:
+        for category_id in image_service.find_categories(image_name):
+            _, features = _feature_questions(category_id, image_name)
+            if features:
+                # 이미지 라벨 일치 여부 질문 1개 + 특징 질문들
+                total_questions = 1 + len(features)
                 break
         
         return jsonify({
@@ -214,33 +447,52 @@ def save_feature_answers(image_name):
     
     data = request.get_json()
     if not data or 'answers' not in data:
-        print(f"저장 실패: 잘못된 데이터 - {data}")
+        # 답변 내용은 로그에 남기지 않음
+        logger.warning("저장 실패: 잘못된 데이터", extra={'image_name': image_name})
         return jsonify({'error': 'Invalid data'}), 400
     
-    print(f"저장 시도: {image_name} - {data}")
+    # 일부만 저장된 뒤 400이 되지 않도록 먼저 모두 검사
+    for feature_id, answer_data in data['answers'].items():
+        expected_version = answer_data.get('expected_version')
+        if expected_version is not None and (
+                not isinstance(expected_version, int) or isinstance(expected_version, bool) or expected_version < 0):
+            return jsonify({'error': f'Invalid expected_version for {feature_id}'}), 400
     
     success_count = 0
+    versions = {}
+    conflicts = {}
     for feature_id, answer_data in data['answers'].items():
-        print(f"특징 {feature_id} 저장 시도: {answer_data}")
-        if database_service.save_feature_answer(
+        # expected_version: 클라이언트가 마지막으로 본 버전 (없으면 확인 없이 저장, 0이면 새 답변)
+        expected_version = answer_data.get('expected_version')
+        result = database_service.save_feature_answer_versioned(
             image_name, 
             feature_id, 
             answer_data.get('answer', ''),
             answer_data.get('reason', ''),
-            answer_data.get('explanation', '')
-        ):
+            answer_data.get('explanation', ''),
+            expected_version=expected_version
+        )
+        if result['status'] == 'saved':
             success_count += 1
-            print(f"특징 {feature_id} 저장 성공")
+            versions[feature_id] = result['version']
+        elif result['status'] == 'conflict':
+            conflicts[feature_id] = {'expected_version': result['expected_version'], 'current': result['current']}
         else:
-            print(f"특징 {feature_id} 저장 실패")
+            logger.warning("특징 %s 저장 실패", feature_id, extra={'image_name': image_name})
     
-    print(f"저장 완료: {success_count}/{len(data['answers'])} 성공")
+    logger.info("저장 완료: %d/%d 성공", success_count, len(data['answers']),
+                extra={'event': 'answer_saved', 'image_name': image_name})
+    if conflicts:
+        logger.info("저장 충돌: %s", ', '.join(conflicts), extra={'image_name': image_name})
     
+    # 충돌한 특징이 있으면 409와 함께 해당 특징의 현재 값만 돌려주어 클라이언트가 그 특징만 갱신하게 함
     return jsonify({
-        'success': True,
+        'success': not conflicts,
         'saved_count': success_count,
-        'total_count': len(data['answers'])
-    })
+        'total_count': len(data['answers']),
+        'versions': versions,
+        'conflicts': conflicts
+    }), 409 if conflicts else 200
 
 @main_bp.route('/api/feature-answers/<image_name>', methods=['DELETE'])
 def delete_feature_answers(image_name):
@@ -271,12 +523,13 @@ def log_answer_activity():
         )
         
         if success:
+            logger.debug("답변 활동 로그 기록: %s", data['action'], extra={'event': 'activity_logged'})
             return jsonify({'success': True})
         else:
             return jsonify({'error': 'Failed to log activity'}), 500
             
     except Exception as e:
-        print(f"답변 활동 로그 기록 오류: {e}")
+        logger.exception("답변 활동 로그 기록 오류: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @main_bp.route('/admin/logs')
@@ -316,9 +569,73 @@ def admin_logs():
                              total_pages=total_pages)
                              
     except Exception as e:
-        print(f"답변 활동 로그 페이지 로드 오류: {e}")
+        logger.exception("답변 활동 로그 페이지 로드 오류: %s", e)
         return "로그를 불러올 수 없습니다.", 500
 
+@main_bp.route('/admin/logs/archive')
+def admin_logs_archive():
+    """보관된 활동 로그 조회.
+    
+    start 없이 호출하면 보관된 날짜 목록을, start(~end)를 주면 해당 기간의 로그를 최대 limit개 반환합니다.
+    """
+    start = request.args.get('start')
+    if not start:
+        return jsonify({'partitions': activity_archive.partitions()})
+    
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end', start), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date (YYYY-MM-DD)'}), 400
+    if (end_date - start_date).days > 366:
+        return jsonify({'error': 'Date range too large'}), 400
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), 10000)
+    
+    try:
+        logs = []
+        truncated = False
+        for row in activity_archive.iter_logs(start_date, end_date,
+                                              image_name=request.args.get('image') or None,
+                                              action=request.args.get('action') or None):
+            if len(logs) >= limit:
+                truncated = True
+                break
+            logs.append(row)
+        return jsonify({'logs': logs, 'count': len(logs), 'truncated': truncated})
+    except Exception as e:
+        logger.exception("보관 로그 조회 오류: %s", e)
+        return jsonify({'error': 'Failed to read archive'}), 500
+
+@main_bp.route('/admin/search')
+def admin_search():
+    """관리자용 전문 검색 페이지"""
+    result, sources = _search_from_request()
+    return render_template('admin_search.html', result=result, sources=sources,
+                           all_sources=SEARCH_SOURCES)
+
+@main_bp.route('/admin/analytics')
+def admin_analytics():
+    """관리자용 답변 분석 페이지"""
+    try:
+        return render_template('admin_analytics.html', analytics=annotation_analytics.get())
+    except Exception as e:
+        logger.exception("답변 분석 페이지 로드 오류: %s", e)
+        return "답변 분석을 불러올 수 없습니다.", 500
+
+@main_bp.route('/admin/duplicates')
+def admin_duplicates():
+    """관리자용 중복/유사 이미지 페이지"""
+    try:
+        max_distance = _parse_max_distance(request.args.get('max_distance'))
+    except ValueError:
+        return f"max_distance는 0~{MAX_DISTANCE_LIMIT} 사이의 정수여야 합니다.", 400
+    try:
+        report = image_hashes.find_duplicates(max_distance)
+        return render_template('admin_duplicates.html', report=report, max_distance_limit=MAX_DISTANCE_LIMIT)
+    except Exception as e:
+        logger.exception("중복 이미지 페이지 로드 오류: %s", e)
+        return "중복 이미지 목록을 불러올 수 없습니다.", 500
+
 @main_bp.route('/admin/answers')
 def admin_answers():
     """관리자용 이미지별 답변 요약 페이지"""
@@ -344,7 +661,8 @@ def admin_answers():
         # 각 이미지에 진단 정보 추가
         for summary in summaries:
             # 이미지명으로 진단 정보 찾기
-            image_diagnosis = diagnosis_service.get_diagnosis_by_filename(summary['image_name'])
+            image_diagnosis = diagnosis_service.get_diagnosis_by_filename(
+                summary['image_name'], image_service.find_categories(summary['image_name']))
             if image_diagnosis:
                 summary['diagnosis_label'] = image_diagnosis.get('revised_answer_final', 'Unknown')
                 summary['diagnosis_id'] = image_diagnosis.get('id', 'N/A')
@@ -373,7 +691,218 @@ def admin_answers():
                              total_pages=total_pages)
                              
     except Exception as e:
-        print(f"답변 요약 페이지 로드 오류: {e}")
+        logger.exception("답변 요약 페이지 로드 오류: %s", e)
         return "답변 요약을 불러올 수 없습니다.", 500
 
 
+
+
+@main_bp.route('/admin/export/answers')
+def export_answers():
+    """전체 답변을 진단/특징 메타데이터와 함께 CSV 또는 JSONL로 스트리밍합니다 (?format=csv|jsonl).
+    
+    행을 읽는 대로 조각 단위로 전송하므로 DB 크기와 관계없이 메모리 사용량이 일정합니다.
+    Parquet은 파일로 저장해야 하므로 CLI(python -m service.export_service --format parquet)를 사용합니다.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in CONTENT_TYPES:
+        return jsonify({'error': 'Unsupported format (csv, jsonl)'}), 400
+    
+    exporter = AnnotationExporter(database_service._get_current_object(), diagnosis_service._get_current_object(),
+                                  images=image_service._get_current_object())
+    filename = f"feature_answers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    
+    def generate():
+        try:
+            for chunk in exporter.iter_format(export_format):
+                yield chunk
+        except Exception as e:
+            # 헤더는 이미 전송되었으므로 로그만 남기고 스트림을 끊음 (클라이언트는 불완전한 파일을 받음)
+            logger.exception("답변 내보내기 오류: %s", e)
+            raise
+    
+    logger.info("답변 내보내기 시작: %s", export_format)
+    return Response(stream_with_context(generate()), mimetype=CONTENT_TYPES[export_format], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Content-Type-Options': 'nosniff',
+    })
+
+
+@main_bp.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """데이터셋 인덱스 리로드 상태 조회(GET) 및 백그라운드 리로드 시작(POST)"""
+    if request.method == 'POST':
+        force = request.args.get('force', '1') != '0'
+        started = dataset_reloader.request_reload(force=force)
+        return jsonify({
+            'started': started,
+            'status': dataset_reloader.status()
+        }), 202 if started else 409
+
+    return jsonify(dataset_reloader.status())
+
+@main_bp.route('/admin/backup', methods=['GET', 'POST'])
+def admin_backup():
+    """DB 백업 상태/스냅샷 목록 조회(GET) 및 백그라운드 온라인 백업 시작(POST)"""
+    if request.method == 'POST':
+        started = database_backup.request_backup()
+        return jsonify({
+            'started': started,
+            'status': database_backup.status()
+        }), 202 if started else 409
+
+    return jsonify(database_backup.status())
+
+@main_bp.route('/api/jobs', methods=['GET', 'POST'])
+def api_jobs():
+    """최근 작업 목록(GET, ?status=&limit=) 및 작업 등록(POST, {"kind": ..., "params": {...}})"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            job_id = job_queue.submit(data.get('kind', ''), data.get('params') or {})
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("작업 등록 오류: %s", e)
+            return jsonify({'error': 'Failed to submit job'}), 500
+        return jsonify(job_queue.get(job_id)), 202
+
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    return jsonify({
+        'jobs': job_queue.list(limit=limit, status=request.args.get('status') or None),
+        'workers': job_queue.status(),
+    })
+
+@main_bp.route('/api/jobs/<int:job_id>', methods=['GET'])
+def api_job(job_id):
+    """작업 하나의 상태/진행률/결과"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@main_bp.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def api_job_cancel(job_id):
+    """작업 취소 (대기 중이면 바로, 실행 중이면 다음 진행 보고 때 중단)"""
+    if job_queue.cancel(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_queue.get(job_id))
+
+@main_bp.route('/admin/jobs')
+def admin_jobs():
+    """관리자용 백그라운드 작업 페이지 (작업 등록, 진행률, 취소)"""
+    return render_template('admin_jobs.html',
+                           kinds=job_queue.describe_kinds(),
+                           jobs=job_queue.list(limit=50),
+                           workers=job_queue.status())
+
+@main_bp.route('/admin/exports/<path:filename>')
+def admin_export_file(filename):
+    """답변 내보내기 작업이 EXPORT_DIR에 저장한 파일 다운로드"""
+    export_dir = os.path.abspath(get_services().config['EXPORT_DIR'])
+    return send_from_directory(export_dir, filename, as_attachment=True)
+
+@main_bp.route('/admin/queries')
+def admin_queries():
+    """관리자용 SQLite 쿼리 프로파일 페이지 (누적 시간 상위 쿼리와 최근 느린 쿼리)"""
+    profiler = database_service.profiler
+    order_by = request.args.get('order', 'total_ms')
+    if order_by not in ('total_ms', 'calls', 'max_ms', 'avg_ms', 'slow_count'):
+        order_by = 'total_ms'
+
+    return render_template('admin_queries.html',
+                         slow_query_ms=profiler.slow_query_ms,
+                         method_totals=profiler.method_totals(),
+                         top_queries=profiler.top_queries(limit=30, order_by=order_by),
+                         slow_queries=profiler.slow_queries())
+
+@main_bp.route('/admin/queries/reset', methods=['POST'])
+def admin_queries_reset():
+    """쿼리 프로파일 집계 초기화"""
+    database_service.profiler.reset()
+    return redirect('/admin/queries')
+
+# 진행 현황 집계는 변경 표식이 바뀐 경우에만 다시 계산 (연결된 모든 스트림이 공유)
+_progress_cache = MarkerCache()
+
+def _sse(event: str, data, event_id: str = None) -> str:
+    message = f'event: {event}\n'
+    if event_id:
+        message += f'id: {event_id}\n'
+    return message + f'data: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+def _parse_event_cursor(value):
+    """'<답변 버전>-<로그 ID>' 형식의 이벤트 ID를 해석합니다."""
+    try:
+        version, log_id = value.split('-', 1)
+        return int(version), int(log_id)
+    except (AttributeError, ValueError):
+        return None
+
+@main_bp.route('/admin/events')
+def admin_events():
+    """관리자 대시보드용 Server-Sent Events 스트림 (answer, answers_deleted, activity, progress)
+    
+    쓰기 경로의 in-process pub/sub 알림으로 즉시 깨어나고, 실제 데이터는 DB에서 버전/ID 순으로 읽으므로
+    다른 워커의 쓰기도 SSE_POLL_INTERVAL 안에 전달됩니다. 이벤트 ID로 재연결 시 이어서 받을 수 있습니다.
+    """
+    config = get_services().config
+    cursor = (_parse_event_cursor(request.headers.get('Last-Event-ID'))
+              or _parse_event_cursor(request.args.get('since'))
+              or database_service.get_change_marker())
+    poll_interval = float(config['SSE_POLL_INTERVAL'])
+    heartbeat = float(config['SSE_HEARTBEAT'])
+    max_seconds = float(config['SSE_MAX_STREAM_SECONDS'])
+    
+    # 연결 수 확인과 구독을 한 번에 (스트림 생성기가 시작되기 전에 자리를 확보)
+    subscription = events.subscribe(limit=int(config['SSE_MAX_CLIENTS']))
+    if subscription is None:
+        return jsonify({'error': 'Too many live connections'}), 503
+    
+    def stream():
+        version, log_id = cursor
+        started = last_sent = time.monotonic()
+        sent_marker = None
+        try:
+            # 연결이 끊기면 브라우저가 3초 뒤 마지막 이벤트 ID로 재연결
+            yield 'retry: 3000\n\n'
+            while time.monotonic() - started < max_seconds:
+                changes = database_service.get_feature_answer_changes(since_version=version, limit=200)
+                if changes:
+                    for answer in changes['answers']:
+                        yield _sse('answer', answer, f"{answer['version']}-{log_id}")
+                    for deleted in changes['deleted']:
+                        yield _sse('answers_deleted', deleted, f"{deleted['version']}-{log_id}")
+                    version = changes['version']
+                for log in database_service.get_activity_logs_since(log_id, limit=200):
+                    log_id = log['id']
+                    yield _sse('activity', log, f'{version}-{log_id}')
+                
+                marker = database_service.get_change_marker()
+                if marker != sent_marker:
+                    progress = _progress_cache.get(marker, database_service.get_progress_counts)
+                    yield _sse('progress', dict(progress, version=version, log_id=log_id), f'{version}-{log_id}')
+                    sent_marker = marker
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= heartbeat:
+                    # 프록시/클라이언트 연결 유지 및 끊긴 연결 감지용 주석 줄
+                    yield ': keepalive\n\n'
+                    last_sent = time.monotonic()
+                
+                # 새 쓰기 알림이 오면 즉시, 아니면 poll_interval 뒤에 다시 확인
+                try:
+                    subscription.get(timeout=max(0.0, min(poll_interval, max_seconds - (time.monotonic() - started))))
+                    while not subscription.empty():
+                        subscription.get_nowait()
+                except queue.Empty:
+                    pass
+        finally:
+            events.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # 스트림이 시작되기 전에 연결이 닫혀도 확보한 자리를 반환
+    response.call_on_close(lambda: events.unsubscribe(subscription))
+    return response
@@ -0,0 +1,209 @@
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMATS = ('jsonl', 'parquet')
+ARCHIVE_FIELDS = ('id', 'image_name', 'action', 'feature_id', 'answer', 'is_checked',
+                  'element_type', 'form_id', 'form_action', 'timestamp')
+
+
+class ActivityArchive:
+    """오래된 answer_activity_logs를 날짜별 압축 파일로 옮기고, 필요할 때 다시 읽습니다.
+
+    - 보관 파일: <archive_dir>/YYYY/MM/activity-YYYY-MM-DD.jsonl.gz (Parquet이면 배치마다 part 파일)
+    - 배치 하나 = 파일에 추가하고 fsync한 뒤 같은 ID를 짧은 트랜잭션 하나로 삭제.
+      배치 사이에 pause초 쉬어 자동 저장이 쓰기 잠금을 오래 기다리지 않게 합니다.
+    - 파일 기록 후 삭제 전에 중단되면 다음 실행에서 같은 행이 다시 기록될 수 있으므로, 읽기 경로는 ID로 중복을 제거합니다.
+    """
+
+    def __init__(self, database, archive_dir: str = 'activity_archive', archive_format: str = 'jsonl'):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"알 수 없는 보관 형식: {archive_format}")
+        self.database = database
+        self.archive_dir = archive_dir
+        self.archive_format = archive_format
+
+    # -----------------------------
+    # 보관 (hot 테이블 → 파일)
+    # -----------------------------
+    def archive_older_than(self, days: int, batch_size: int = 5000, pause: float = 0.05,
+                           max_batches: Optional[int] = None, vacuum_pages: int = 0) -> Dict:
+        """days일보다 오래된 로그(자정 기준, 하루 단위)를 보관하고 삭제한 뒤 incremental vacuum을 실행합니다."""
+        cutoff = (date.today() - timedelta(days=days)).isoformat()
+        started = time.perf_counter()
+        summary = {'cutoff': cutoff, 'archived': 0, 'deleted': 0, 'batches': 0, 'partitions': []}
+        partitions = set()
+
+        while max_batches is None or summary['batches'] < max_batches:
+            rows = self.database.get_activity_logs_before(cutoff, limit=batch_size)
+            if not rows:
+                break
+            partitions.update(self._write_batch(rows))
+            deleted = self.database.delete_activity_logs([row['id'] for row in rows])
+            if deleted == 0:
+                # 삭제 실패: 같은 행을 계속 다시 기록하지 않도록 중단
+                logger.warning("활동 로그 삭제 실패로 보관 중단 (배치 %d)", summary['batches'] + 1)
+                break
+            summary['archived'] += len(rows)
+            summary['deleted'] += deleted
+            summary['batches'] += 1
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause)
+
+        summary['partitions'] = sorted(partitions)
+        summary['vacuum'] = self.database.incremental_vacuum(vacuum_pages)
+        summary['elapsed_s'] = round(time.perf_counter() - started, 2)
+        metrics.inc('activity_logs_archived_total', summary['archived'])
+        logger.info("활동 로그 보관: %d행, %d개 배치, 기준 %s", summary['archived'], summary['batches'], cutoff)
+        return summary
+
+    def _partition_dir(self, day: str) -> str:
+        return os.path.join(self.archive_dir, day[:4], day[5:7])
+
+    def _write_batch(self, rows: List[Dict]) -> List[str]:
+        """rows를 날짜별로 나누어 기록하고 기록한 날짜 목록을 반환합니다."""
+        by_day: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_day.setdefault(str(row['timestamp'])[:10], []).append(row)
+
+        for day, day_rows in by_day.items():
+            os.makedirs(self._partition_dir(day), exist_ok=True)
+            if self.archive_format == 'parquet':
+                self._write_parquet(day, day_rows)
+            else:
+                # gzip 멤버를 이어 붙이면 gzip.open()이 하나의 스트림으로 읽음
+                path = os.path.join(self._partition_dir(day), f'activity-{day}.jsonl.gz')
+                with open(path, 'ab') as raw:
+                    with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                        for row in day_rows:
+                            f.write((json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8'))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+        return list(by_day)
+
+    def _write_parquet(self, day: str, rows: List[Dict]) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError('Parquet 보관에는 pyarrow가 필요합니다: pip install pyarrow') from e
+
+        # Parquet 파일은 이어 쓸 수 없으므로 배치의 첫 ID로 part 파일을 나눔
+        path = os.path.join(self._partition_dir(day), f"activity-{day}-{rows[0]['id']}.parquet")
+        table = pa.Table.from_pylist(rows)
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    # -----------------------------
+    # 조회 (파일 → 행)
+    # -----------------------------
+    def partitions(self) -> List[Dict]:
+        """보관된 날짜 목록 (날짜, 파일 수, 압축 크기)."""
+        by_day: Dict[str, Dict] = {}
+        for path in glob.glob(os.path.join(self.archive_dir, '*', '*', 'activity-*')):
+            day = os.path.basename(path)[len('activity-'):len('activity-') + 10]
+            entry = by_day.setdefault(day, {'date': day, 'files': 0, 'bytes': 0})
+            entry['files'] += 1
+            entry['bytes'] += os.path.getsize(path)
+        return [by_day[day] for day in sorted(by_day)]
+
+    def _day_files(self, day: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self._partition_dir(day), f'activity-{day}*')))
+
+    def _read_file(self, path: str) -> Iterator[Dict]:
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise RuntimeError('Parquet 보관 파일을 읽으려면 pyarrow가 필요합니다: pip install pyarrow') from e
+            for batch in pq.ParquetFile(path).iter_batches():
+                yield from batch.to_pylist()
+        elif path.endswith('.jsonl.gz'):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def iter_logs(self, start: date, end: date, image_name: Optional[str] = None,
+                  action: Optional[str] = None) -> Iterator[Dict]:
+        """start~end(포함) 날짜의 보관 로그를 날짜순으로 반환합니다. 메모리에는 하루치 ID만 유지합니다."""
+        day = start
+        while day <= end:
+            seen = set()
+            for path in self._day_files(day.isoformat()):
+                for row in self._read_file(path):
+                    if row['id'] in seen:
+                        continue
+                    seen.add(row['id'])
+                    if image_name and row.get('image_name') != image_name:
+                        continue
+                    if action and row.get('action') != action:
+                        continue
+                    yield row
+            day += timedelta(days=1)
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='오래된 활동 로그를 압축 파일로 보관하고 조회합니다.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    archive_parser = subparsers.add_parser('archive', help='오래된 로그를 보관하고 hot 테이블에서 삭제')
+    archive_parser.add_argument('--days', type=int, help='보존 기간(일). 기본: ACTIVITY_RETENTION_DAYS')
+    archive_parser.add_argument('--batch-size', type=int, default=5000)
+    archive_parser.add_argument('--pause', type=float, default=0.05, help='배치 사이 대기(초)')
+    archive_parser.add_argument('--max-batches', type=int)
+    archive_parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                                help='기존 DB를 auto_vacuum=INCREMENTAL로 변환 (전체 VACUUM, 한 번만)')
+
+    query_parser = subparsers.add_parser('query', help='보관된 로그를 JSONL로 출력')
+    query_parser.add_argument('--start', type=_parse_date, required=True, help='YYYY-MM-DD')
+    query_parser.add_argument('--end', type=_parse_date, help='YYYY-MM-DD (기본: start)')
+    query_parser.add_argument('--image')
+    query_parser.add_argument('--action')
+
+    subparsers.add_parser('list', help='보관된 날짜 목록')
+    args = parser.parse_args()
+
+    from service.container import ServiceContainer, load_config_from_env
+
+    services = ServiceContainer(load_config_from_env())
+    archive = services.archive
+
+    if args.command == 'archive':
+        if args.enable_incremental_vacuum and not services.database.enable_incremental_vacuum():
+            print('auto_vacuum 변경 실패', file=sys.stderr)
+            sys.exit(1)
+        days = args.days if args.days is not None else int(services.config['ACTIVITY_RETENTION_DAYS'])
+        summary = archive.archive_older_than(days, batch_size=args.batch_size, pause=args.pause,
+                                             max_batches=args.max_batches)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        if summary['vacuum'].get('mode') not in (None, 2):
+            print('참고: auto_vacuum이 INCREMENTAL이 아니라 파일 크기는 줄지 않습니다 '
+                  '(--enable-incremental-vacuum으로 한 번 변환)', file=sys.stderr)
+    elif args.command == 'query':
+        for row in archive.iter_logs(args.start, args.end or args.start, image_name=args.image, action=args.action):
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + '\n')
+    else:
+        for entry in archive.partitions():
+            print(f"{entry['date']}  파일 {entry['files']}개  {entry['bytes']} bytes")
+
+
+if __name__ == '__main__':
+    main()
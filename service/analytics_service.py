@@ -0,0 +1,437 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from service.event_service import MarkerCache
+from service.feature_vocabulary import normalize_label
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+LABEL_MATCH_FEATURE = 'image_label_match'
+PRIMARY_ANNOTATOR = 'primary'
+# 답변 키 = 이미지 코드 * FEATURE_STRIDE + 특징 ID 코드
+FEATURE_STRIDE = 1 << 20
+# 마지막 반영 이후 변경이 이보다 많으면 변경분 대신 전체를 다시 읽음
+MAX_INCREMENTAL_CHANGES = 20000
+
+
+class Vocabulary:
+    """문자열 ↔ 정수 코드. 새 값은 뒤에 추가되므로 한 번 받은 코드는 바뀌지 않습니다."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, value: str) -> int:
+        return self._codes.get(value, -1)
+
+    def encode(self, values: Sequence[str]) -> np.ndarray:
+        """여러 값을 한 번에 코드화합니다. 고유값만 파이썬에서 처리하고 나머지는 np.unique의 역인덱스로 펼칩니다."""
+        if len(values) == 0:
+            return np.array([], dtype=np.int64)
+        uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        mapping = np.fromiter((self.code(value) for value in uniques.tolist()), dtype=np.int64, count=len(uniques))
+        return mapping[inverse.reshape(-1)]
+
+
+class AnswerFrame:
+    """한 판독자의 답변: 정렬된 키 배열과 같은 순서의 답변 코드 배열 (-1 = 삭제됨)."""
+
+    def __init__(self, keys: np.ndarray, answers: np.ndarray, version: Optional[int]):
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.answers = answers[order]
+        self.version = version
+
+    def apply(self, keys: np.ndarray, answers: np.ndarray) -> None:
+        """버전 순으로 정렬된 변경분을 반영합니다 (같은 키는 마지막 변경만)."""
+        if len(keys) == 0:
+            return
+        last = len(keys) - 1 - np.unique(keys[::-1], return_index=True)[1]
+        keys, answers = keys[last], answers[last]
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+        self.answers[positions[found]] = answers[found]
+        new = ~found & (answers >= 0)
+        if new.any():
+            self.keys = np.insert(self.keys, positions[new], keys[new])
+            self.answers = np.insert(self.answers, positions[new], answers[new])
+
+    def live(self) -> np.ndarray:
+        return self.answers >= 0
+
+
+def cohen_kappa(matrix: np.ndarray) -> Optional[float]:
+    total = matrix.sum()
+    if total == 0:
+        return None
+    observed = np.trace(matrix) / total
+    expected = float(matrix.sum(axis=1) @ matrix.sum(axis=0)) / (total * total)
+    if expected >= 1:
+        return 1.0 if observed >= 1 else None
+    return float((observed - expected) / (1 - expected))
+
+
+def fleiss_kappa(counts: np.ndarray) -> Optional[float]:
+    """counts: 항목 × 범주 행렬 (모든 행의 합 = 판독자 수)."""
+    if counts.shape[0] == 0:
+        return None
+    raters = counts[0].sum()
+    if raters < 2:
+        return None
+    agreement = ((counts * counts).sum(axis=1) - raters) / (raters * (raters - 1))
+    proportions = counts.sum(axis=0) / counts.sum()
+    expected = float((proportions * proportions).sum())
+    if expected >= 1:
+        return 1.0 if agreement.mean() >= 1 else None
+    return float((agreement.mean() - expected) / (1 - expected))
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
+
+
+class AnnotationAnalytics:
+    """특징별 답변 비율, 진단별 image_label_match 불일치율, 판독자 간 일치도(Cohen/Fleiss kappa)를 계산합니다.
+
+    - 답변은 판독자마다 (정렬된 키, 답변 코드) NumPy 배열로 메모리에 두고, 집계는 모두 np.bincount 기반
+      group-by로 계산합니다. 문자열은 Vocabulary로 정수 코드화하므로 계산 중에는 문자열을 다루지 않습니다.
+    - 현재 DB(primary)는 처음에 열 단위 쿼리 한 번으로 읽고, 이후에는 get_feature_answer_changes()의
+      변경분만 배열에 반영합니다. 답변이 수백만 개여도 저장 뒤의 재계산에 전체 재로드가 필요 없습니다.
+    - 다른 판독자는 reader_databases(다른 판독자 인스턴스의 DB 파일)로 지정합니다. feature_answers는
+      (image_name, feature_id)마다 한 행이므로 판독자 구분은 DB 단위이며, 이 파일들은 읽기 전용으로
+      열고 change_counter 버전이 바뀌었을 때만 다시 읽습니다.
+    - 특징별 통계는 FeatureVocabulary의 canonical 특징 단위로 묶습니다 (어휘에 없는 특징은 정규화한 라벨 단위).
+    - 결과는 (각 DB 버전, 데이터셋 뷰, 어휘 버전) 표식으로 캐시하므로 아무것도 바뀌지 않았으면 계산하지 않습니다.
+    """
+
+    def __init__(self, database, diagnosis, vocabulary=None, reader_databases: Optional[List[str]] = None,
+                 top_features: int = 50):
+        self.database = database
+        self.diagnosis = diagnosis
+        self.vocabulary = vocabulary
+        self.reader_databases = list(reader_databases or [])
+        self.top_features = top_features
+        self.images = Vocabulary()
+        self.features = Vocabulary()
+        self.answers = Vocabulary()
+        self._frames: Dict[str, AnswerFrame] = {}
+        self._lock = threading.Lock()
+        self._cache = MarkerCache()
+        self._dataset_cache = MarkerCache()
+
+    @staticmethod
+    def _reader_name(path: str) -> str:
+        return os.path.splitext(os.path.basename(path))[0]
+
+    @staticmethod
+    def _open_reader(path: str) -> sqlite3.Connection:
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True, isolation_level=None)
+
+    def _reader_version(self, path: str) -> Optional[int]:
+        try:
+            with closing(self._open_reader(path)) as conn:
+                row = conn.execute('SELECT version FROM change_counter WHERE id = 1').fetchone()
+                return row[0] if row else 0
+        except sqlite3.Error:
+            return None
+
+    def _marker(self) -> tuple:
+        return (
+            self.database.get_current_version(),
+            tuple(self._reader_version(path) for path in self.reader_databases),
+            self._dataset_marker(),
+        )
+
+    def _dataset_marker(self) -> tuple:
+        return id(self.diagnosis.diagnosis_data), self.vocabulary.version() if self.vocabulary else None
+
+    def get(self) -> Dict:
+        """캐시된 결과 (답변이나 데이터셋이 바뀌었으면 다시 계산)."""
+        return self._cache.get(self._marker(), self.compute)
+
+    # -----------------------------
+    # 답변 배열
+    # -----------------------------
+    def _key(self, image_name: str, feature_id: str) -> int:
+        return self.images.code(image_name) * FEATURE_STRIDE + self.features.code(feature_id)
+
+    def _frame_from_columns(self, columns: Dict) -> AnswerFrame:
+        keys = self.images.encode(columns['image_name']) * FEATURE_STRIDE + self.features.encode(columns['feature_id'])
+        return AnswerFrame(keys, self.answers.encode(columns['answer']), columns['version'])
+
+    def _refresh_primary(self) -> None:
+        frame = self._frames.get(PRIMARY_ANNOTATOR)
+        if frame is not None and frame.version is not None:
+            if self.database.get_current_version() - frame.version <= MAX_INCREMENTAL_CHANGES:
+                if self._apply_changes(frame):
+                    return
+        self._frames[PRIMARY_ANNOTATOR] = self._frame_from_columns(self.database.get_answer_columns())
+
+    def _apply_changes(self, frame: AnswerFrame) -> bool:
+        """마지막 반영 버전 이후의 저장/삭제를 배열에 반영합니다. 조회에 실패하면 False (전체 재로드)."""
+        changed = []
+        version = frame.version
+        while True:
+            changes = self.database.get_feature_answer_changes(since_version=version, limit=5000)
+            if changes is None:
+                return False
+            for change in changes['answers']:
+                changed.append((change['version'], self._key(change['image_name'], change['feature_id']),
+                                self.answers.code(change['answer'])))
+            for change in changes['deleted']:
+                changed.append((change['version'], self._key(change['image_name'], change['feature_id']), -1))
+            version = changes['version']
+            if not changes['has_more']:
+                break
+        if changed:
+            # 저장과 삭제가 따로 모여 있으므로 버전 순으로 다시 정렬
+            changed.sort()
+            frame.apply(np.fromiter((key for _, key, _ in changed), dtype=np.int64, count=len(changed)),
+                        np.fromiter((code for _, _, code in changed), dtype=np.int64, count=len(changed)))
+        frame.version = version
+        return True
+
+    def _refresh_reader(self, path: str) -> None:
+        name = self._reader_name(path)
+        version = self._reader_version(path)
+        if version is None:
+            logger.warning("판독자 DB를 열 수 없음: %s", path)
+            self._frames.pop(name, None)
+            return
+        frame = self._frames.get(name)
+        if frame is not None and frame.version == version:
+            return
+        with closing(self._open_reader(path)) as conn:
+            self._frames[name] = self._frame_from_columns(self.database.read_answer_columns(conn))
+
+    # -----------------------------
+    # 데이터셋 (진단 / 특징 라벨)
+    # -----------------------------
+    def _dataset_index(self) -> Dict:
+        """이미지 코드 → 진단 코드, 답변 키 → 특징 그룹 코드 배열을 만듭니다 (데이터셋 뷰/어휘 버전마다 한 번)."""
+        return self._dataset_cache.get(self._dataset_marker(), self._build_dataset_index)
+
+    def _build_dataset_index(self) -> Dict:
+        diagnoses = Vocabulary()
+        groups = Vocabulary()
+        labels: List[Dict] = []
+        mapping = self.vocabulary.mapping() if self.vocabulary else {'canonical_of': {}, 'labels': {}}
+        unknown = diagnoses.code('Unknown')
+
+        def group(key: str, label: str, canonical_id: Optional[int]) -> int:
+            code = groups.code(key)
+            if code == len(labels):
+                labels.append({'label': label, 'canonical_id': canonical_id})
+            return code
+
+        image_diagnosis: Dict[int, int] = {}
+        pair_labels: Dict[int, int] = {}
+        for item in self.diagnosis.diagnosis_data:
+            image_name = os.path.basename(item.get('image', ''))
+            if not image_name:
+                continue
+            image_diagnosis[self.images.code(image_name)] = diagnoses.code(item.get('revised_answer_final') or 'Unknown')
+            extracted = self.diagnosis.get_extracted_features_by_diagnosis_id(item.get('id')) or {}
+            for feature in (extracted.get('extracted_features') or {}).get('features', []):
+                feature_id = str(feature.get('id', ''))
+                label = str(feature.get('label') or feature_id)
+                canonical_id = mapping['canonical_of'].get((str(item.get('id')), feature_id))
+                if canonical_id is not None:
+                    code = group(f'canonical:{canonical_id}', mapping['labels'][canonical_id], canonical_id)
+                else:
+                    code = group(f'label:{normalize_label(label) or label}', label, None)
+                pair_labels[self._key(image_name, feature_id)] = code
+
+        diagnosis_of_image = np.full(len(self.images), unknown, dtype=np.int64)
+        if image_diagnosis:
+            diagnosis_of_image[np.fromiter(image_diagnosis, dtype=np.int64)] = list(image_diagnosis.values())
+        pair_keys = np.fromiter(pair_labels, dtype=np.int64, count=len(pair_labels))
+        pair_values = np.fromiter(pair_labels.values(), dtype=np.int64, count=len(pair_labels))
+        order = np.argsort(pair_keys)
+        return {
+            'diagnoses': diagnoses.values,
+            'unknown_diagnosis': unknown,
+            'diagnosis_of_image': diagnosis_of_image,
+            'labels': labels,
+            'pair_keys': pair_keys[order],
+            'pair_labels': pair_values[order],
+        }
+
+    @staticmethod
+    def _diagnosis_codes(index: Dict, images: np.ndarray) -> np.ndarray:
+        """이미지 코드 → 진단 코드 (데이터셋 뷰를 만든 뒤 처음 본 이미지는 Unknown)."""
+        table = index['diagnosis_of_image']
+        known = images < len(table)
+        result = np.full(len(images), index['unknown_diagnosis'], dtype=np.int64)
+        result[known] = table[images[known]]
+        return result
+
+    @staticmethod
+    def _label_codes(index: Dict, keys: np.ndarray) -> np.ndarray:
+        """답변 키 → 특징 그룹 코드. 추출 특징에 없는 ID는 len(labels) + 특징 ID 코드 (ID 자체를 라벨로)."""
+        result = len(index['labels']) + keys % FEATURE_STRIDE
+        pair_keys = index['pair_keys']
+        if len(pair_keys) and len(keys):
+            positions = np.searchsorted(pair_keys, keys)
+            positions[positions >= len(pair_keys)] = 0
+            found = pair_keys[positions] == keys
+            result[found] = index['pair_labels'][positions[found]]
+        return result
+
+    # -----------------------------
+    # 계산
+    # -----------------------------
+    def compute(self) -> Dict:
+        with self._lock:
+            return self._compute()
+
+    def _compute(self) -> Dict:
+        started = time.perf_counter()
+        self._refresh_primary()
+        for path in self.reader_databases:
+            self._refresh_reader(path)
+        index = self._dataset_index()
+        loaded = time.perf_counter()
+
+        annotators = [PRIMARY_ANNOTATOR] + [name for name in map(self._reader_name, self.reader_databases)
+                                            if name in self._frames]
+        frames = [self._frames[name] for name in annotators]
+        live = [frame.live() for frame in frames]
+        keys = np.concatenate([frame.keys[mask] for frame, mask in zip(frames, live)])
+        answers = np.concatenate([frame.answers[mask] for frame, mask in zip(frames, live)])
+        annotator = np.repeat(np.arange(len(frames), dtype=np.int64), [int(mask.sum()) for mask in live])
+
+        is_label_match = (keys % FEATURE_STRIDE) == self.features.get(LABEL_MATCH_FEATURE)
+        result = {
+            'annotators': annotators,
+            'answer_values': list(self.answers.values),
+            'total_answers': int(len(keys)),
+            'features': self._feature_rates(index, keys[~is_label_match], answers[~is_label_match]),
+            'label_match': self._label_match_by_diagnosis(index, keys[is_label_match], answers[is_label_match]),
+            'agreement': self._agreement(annotators, keys, answers, annotator),
+        }
+        finished = time.perf_counter()
+        metrics.observe('analytics_compute_duration_seconds', finished - started)
+        result['timings'] = {
+            'load_ms': round((loaded - started) * 1000, 2),
+            'compute_ms': round((finished - loaded) * 1000, 2),
+        }
+        return result
+
+    def _feature_rates(self, index: Dict, keys: np.ndarray, answers: np.ndarray) -> List[Dict]:
+        """canonical 특징별 답변 분포와 yes 비율 (답변 수가 많은 순으로 top_features개)."""
+        if len(keys) == 0:
+            return []
+        k = len(self.answers)
+        labels = index['labels']
+        n = len(labels) + len(self.features)
+        counts = np.bincount(self._label_codes(index, keys) * k + answers, minlength=n * k).reshape(n, k)
+        totals = counts.sum(axis=1)
+        present = np.flatnonzero(totals)
+        order = present[np.argsort(-totals[present], kind='stable')][:self.top_features]
+        yes_code = self.answers.get('yes')
+        return [
+            {
+                **(labels[code] if code < len(labels)
+                   else {'label': self.features.values[code - len(labels)], 'canonical_id': None}),
+                'total': int(totals[code]),
+                'counts': {self.answers.values[answer]: int(counts[code, answer])
+                           for answer in np.flatnonzero(counts[code])},
+                'yes_rate': round(float(counts[code, yes_code] / totals[code]), 4) if yes_code >= 0 else None,
+            }
+            for code in order
+        ]
+
+    def _label_match_by_diagnosis(self, index: Dict, keys: np.ndarray, answers: np.ndarray) -> List[Dict]:
+        """진단별 image_label_match 답변 수와 'no'(라벨 불일치) 비율 (불일치율 높은 순)."""
+        if len(keys) == 0:
+            return []
+        diagnosis = self._diagnosis_codes(index, keys // FEATURE_STRIDE)
+        n = len(index['diagnoses'])
+        totals = np.bincount(diagnosis, minlength=n)
+        disagree = np.bincount(diagnosis, weights=(answers == self.answers.get('no')), minlength=n)
+        present = np.flatnonzero(totals)
+        rates = disagree[present] / totals[present]
+        order = present[np.lexsort((-totals[present], -rates))]
+        return [
+            {
+                'diagnosis': index['diagnoses'][code],
+                'total': int(totals[code]),
+                'disagree': int(disagree[code]),
+                'disagreement_rate': round(float(disagree[code] / totals[code]), 4),
+            }
+            for code in order
+        ]
+
+    def _agreement(self, annotators: List[str], keys: np.ndarray, answers: np.ndarray,
+                   annotator: np.ndarray) -> Dict:
+        """같은 (이미지, 특징)에 답한 판독자들 사이의 일치도.
+
+        판독자 쌍마다 공통 항목의 혼동 행렬과 Cohen's kappa, 모든 판독자가 답한 항목의 Fleiss' kappa를
+        전체 / image_label_match / 특징 질문으로 나누어 계산합니다.
+        """
+        if len(annotators) < 2:
+            return {'available': False, 'annotators': annotators}
+
+        m = len(annotators)
+        k = max(len(self.answers), 1)
+        items, item_codes = np.unique(keys, return_inverse=True)
+        # 항목 × 판독자 답변 행렬 (-1 = 답하지 않음)
+        matrix = np.full((len(items), m), -1, dtype=np.int64)
+        matrix[item_codes.reshape(-1), annotator] = answers
+        item_is_label_match = (items % FEATURE_STRIDE) == self.features.get(LABEL_MATCH_FEATURE)
+
+        scopes = {
+            'all': np.ones(len(items), dtype=bool),
+            LABEL_MATCH_FEATURE: item_is_label_match,
+            'features': ~item_is_label_match,
+        }
+        result = {'available': True, 'annotators': annotators, 'scopes': {}}
+        for scope, scope_mask in scopes.items():
+            scoped = matrix[scope_mask]
+            answered = scoped >= 0
+            pairs = []
+            for first in range(m):
+                for second in range(first + 1, m):
+                    both = answered[:, first] & answered[:, second]
+                    confusion = np.bincount(scoped[both, first] * k + scoped[both, second],
+                                            minlength=k * k).reshape(k, k)
+                    used = np.flatnonzero(confusion.sum(axis=0) + confusion.sum(axis=1))
+                    total = int(confusion.sum())
+                    pairs.append({
+                        'annotators': [annotators[first], annotators[second]],
+                        'items': total,
+                        'agreement': round(float(np.trace(confusion) / total), 4) if total else None,
+                        'cohen_kappa': _round(cohen_kappa(confusion)),
+                        'labels': [int(code) for code in used],
+                        'confusion_matrix': confusion[np.ix_(used, used)].tolist(),
+                    })
+            complete = scoped[answered.all(axis=1)]
+            rows = np.repeat(np.arange(len(complete), dtype=np.int64), m)
+            counts = np.bincount(rows * k + complete.reshape(-1), minlength=len(complete) * k).reshape(-1, k)
+            result['scopes'][scope] = {
+                'items_multi_rated': int((answered.sum(axis=1) >= 2).sum()),
+                'items_all_rated': int(len(complete)),
+                'fleiss_kappa': _round(fleiss_kappa(counts)),
+                'pairs': pairs,
+            }
+        return result
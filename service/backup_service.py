@@ -0,0 +1,221 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BackupService:
+    """SQLite 온라인 백업 API로 DB 스냅샷을 만들고 검증/보존 개수를 관리합니다.
+
+    - sqlite3.Connection.backup()으로 pages_per_step 페이지씩 복사하고 단계 사이에 step_sleep초 쉽니다.
+    - 원본 연결에서 읽기 트랜잭션을 열어 둔 채 복사합니다. WAL에서는 이 스냅샷이 쓰기를 막지 않고,
+      다른 연결의 쓰기 때문에 백업이 처음부터 다시 시작되는 일도 없습니다 (열어 두지 않으면 자동 저장이 잦을 때 끝나지 않음).
+    - 복사본에 PRAGMA integrity_check를 실행해 'ok'일 때만 최종 파일명으로 바꾸고, 최근 keep개만 남깁니다.
+    """
+
+    def __init__(self, db_path: str, backup_dir: str = 'backups', keep: int = 7,
+                 pages_per_step: int = 256, step_sleep: float = 0.05, busy_timeout: float = 5.0):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._status = {
+            'in_progress': False,
+            'progress': None,
+            'last_started': None,
+            'last_finished': None,
+            'last_result': None,
+            'last_error': None,
+        }
+
+    def _snapshot_prefix(self) -> str:
+        return os.path.splitext(os.path.basename(self.db_path))[0] + '-'
+
+    # -----------------------------
+    # 백업
+    # -----------------------------
+    def request_backup(self) -> bool:
+        """백업을 백그라운드 스레드로 시작합니다. 이미 진행 중이면 False."""
+        if self._lock.locked():
+            return False
+        threading.Thread(target=self.create_snapshot, kwargs={'blocking': False},
+                         name='db-backup', daemon=True).start()
+        return True
+
+    def create_snapshot(self, blocking: bool = True,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Optional[Dict]:
+        """스냅샷을 만들고 결과를 반환합니다. 다른 백업이 진행 중이고 blocking=False면 None.
+
+        progress는 복사 단계마다 (복사한 페이지 수, 전체 페이지 수)로 호출됩니다.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return None
+        started = time.perf_counter()
+        self._status.update({
+            'in_progress': True,
+            'progress': None,
+            'last_started': datetime.now().isoformat(),
+            'last_error': None,
+        })
+        os.makedirs(self.backup_dir, exist_ok=True)
+        path = os.path.join(self.backup_dir,
+                            f"{self._snapshot_prefix()}{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+        tmp_path = path + '.tmp'
+        try:
+            if not os.path.exists(self.db_path):
+                # connect()가 빈 DB를 새로 만들어 버리므로 미리 확인
+                raise FileNotFoundError(f'DB 파일이 없습니다: {self.db_path}')
+            steps = self._copy(tmp_path, progress)
+            integrity = self._verify(tmp_path)
+            if integrity != 'ok':
+                raise RuntimeError(f'integrity_check 실패: {integrity}')
+            os.replace(tmp_path, path)
+
+            result = {
+                'path': path,
+                'bytes': os.path.getsize(path),
+                'steps': steps,
+                'integrity': integrity,
+                'duration_s': round(time.perf_counter() - started, 2),
+                'removed': self.prune(),
+            }
+            self._status['last_result'] = result
+            metrics.inc('db_backups_total', result='ok')
+            metrics.observe('db_backup_duration_seconds', time.perf_counter() - started)
+            logger.info("DB 백업 완료: %s (%d bytes, %.2fs)", path, result['bytes'], result['duration_s'])
+            return result
+        except Exception as e:
+            self._status['last_error'] = str(e)
+            metrics.inc('db_backups_total', result='error')
+            logger.exception("DB 백업 오류: %s", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if blocking:
+                raise
+            return None
+        finally:
+            self._status.update({
+                'in_progress': False,
+                'last_finished': datetime.now().isoformat(),
+            })
+            self._lock.release()
+
+    def _copy(self, dest_path: str, on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+        steps = 0
+
+        def progress(status, remaining, total):
+            nonlocal steps
+            steps += 1
+            self._status['progress'] = {'copied_pages': total - remaining, 'total_pages': total}
+            if on_progress:
+                on_progress(total - remaining, total)
+            if remaining:
+                # 단계 사이에 쉬어 백업이 I/O를 독점하지 않게 함
+                time.sleep(self.step_sleep)
+
+        with closing(sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)) as source, \
+                closing(sqlite3.connect(dest_path)) as dest:
+            # 복사 내내 같은 스냅샷을 보도록 읽기 트랜잭션 시작
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            try:
+                source.backup(dest, pages=self.pages_per_step, progress=progress)
+            finally:
+                source.execute('ROLLBACK')
+            # 복사본은 -wal 파일 없이 단독으로 옮길 수 있게 rollback 저널 모드로 둠
+            dest.execute('PRAGMA journal_mode=DELETE')
+        return steps
+
+    @staticmethod
+    def _verify(path: str) -> str:
+        with closing(sqlite3.connect(path)) as conn:
+            rows = conn.execute('PRAGMA integrity_check').fetchall()
+        return '; '.join(str(row[0]) for row in rows)
+
+    # -----------------------------
+    # 보존 / 조회
+    # -----------------------------
+    def list_snapshots(self) -> List[Dict]:
+        """스냅샷 목록 (최신순)."""
+        paths = glob.glob(os.path.join(self.backup_dir, f'{self._snapshot_prefix()}*.db'))
+        return [
+            {
+                'path': path,
+                'bytes': os.path.getsize(path),
+                'created': datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds'),
+            }
+            for path in sorted(paths, reverse=True)
+        ]
+
+    def prune(self) -> List[str]:
+        """최근 keep개를 제외한 스냅샷을 삭제하고 삭제한 경로를 반환합니다."""
+        if self.keep <= 0:
+            return []
+        removed = []
+        for snapshot in self.list_snapshots()[self.keep:]:
+            try:
+                os.remove(snapshot['path'])
+                removed.append(snapshot['path'])
+            except OSError as e:
+                logger.warning("오래된 백업 삭제 실패: %s (%s)", snapshot['path'], e)
+        return removed
+
+    def status(self) -> Dict:
+        status = dict(self._status)
+        status['snapshots'] = self.list_snapshots()
+        status['keep'] = self.keep
+        return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='서버를 멈추지 않고 SQLite DB 스냅샷을 만듭니다.')
+    parser.add_argument('--list', action='store_true', help='스냅샷 목록만 출력')
+    parser.add_argument('--verify', metavar='PATH', help='스냅샷 파일의 integrity_check만 실행')
+    parser.add_argument('--keep', type=int, help='남길 스냅샷 수 (기본: BACKUP_KEEP)')
+    parser.add_argument('--pages-per-step', type=int, help='단계마다 복사할 페이지 수')
+    parser.add_argument('--step-sleep', type=float, help='단계 사이 대기(초)')
+    args = parser.parse_args()
+
+    from service.container import ServiceContainer, load_config_from_env
+
+    config = load_config_from_env()
+    for key, value in (('BACKUP_KEEP', args.keep), ('BACKUP_PAGES_PER_STEP', args.pages_per_step),
+                       ('BACKUP_STEP_SLEEP', args.step_sleep)):
+        if value is not None:
+            config[key] = value
+    backup = ServiceContainer(config).backup
+
+    if args.verify:
+        integrity = BackupService._verify(args.verify)
+        print(integrity)
+        sys.exit(0 if integrity == 'ok' else 1)
+    if args.list:
+        for snapshot in backup.list_snapshots():
+            print(f"{snapshot['created']}  {snapshot['bytes']:>12}  {snapshot['path']}")
+        return
+
+    try:
+        result = backup.create_snapshot()
+    except Exception as e:
+        print(f'백업 실패: {e}', file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from service.diagnosis_service import DEFAULT_FEATURES, DEFAULT_MANIFESTS
+from service.logging_service import restart_listener
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'IMAGES_FOLDER': 'downloaded_images',
+    'IMAGE_CATALOG_PATH': 'image_catalog.json',
+    'DIAGNOSIS_MANIFESTS': list(DEFAULT_MANIFESTS),
+    'FEATURES_FILES': list(DEFAULT_FEATURES),
+    'DATABASE_PATH': 'medical_features.db',
+    # 이 시간(ms) 이상 걸린 쿼리는 실행 계획과 함께 느린 쿼리로 기록
+    'SLOW_QUERY_MS': 100.0,
+    'DATASET_WATCH_INTERVAL': 2.0,
+    # 'background': 백그라운드 스레드에서 미리 로드, 'sync': create_app 안에서 로드, 'none': 첫 요청 때 로드
+    'WARMUP': 'background',
+    # 워밍업이 실패하면 /readyz 확인 때 이 간격(초)마다 백그라운드에서 다시 시도
+    'WARMUP_RETRY_SECONDS': 30.0,
+    # 로그: LOG_FILE이 없으면 표준 출력, LOG_ROTATE='size'면 크기 기준 회전, 'watched'면 logrotate용
+    'LOG_LEVEL': 'INFO',
+    'LOG_FORMAT': 'text',
+    'LOG_FILE': None,
+    'LOG_ROTATE': 'size',
+    'LOG_MAX_BYTES': 10 * 1024 * 1024,
+    'LOG_BACKUP_COUNT': 5,
+    # 자동 저장/활동 로그처럼 자주 발생하는 INFO 로그의 기록 비율
+    'LOG_SAMPLE_RATE': 0.1,
+    # 관리자 실시간 스트림(SSE): DB 변경 확인 주기(초), 유휴 시 keepalive 주기(초),
+    # 프로세스당 최대 연결 수, 연결 최대 유지 시간(초, 이후 브라우저가 Last-Event-ID로 재연결)
+    # 최대 연결 수는 gunicorn 워커 스레드 수(gunicorn.conf.py와 같은 기본값 4)보다 2개 적게 두어
+    # 스트림이 모든 스레드를 점유해 일반 요청이 막히지 않도록 함
+    'SSE_POLL_INTERVAL': 1.0,
+    'SSE_HEARTBEAT': 15.0,
+    'SSE_MAX_CLIENTS': max(1, int(os.environ.get('GUNICORN_THREADS', 4)) - 2),
+    'SSE_MAX_STREAM_SECONDS': 300.0,
+    # 활동 로그 보관: 보존 기간(일)이 지난 로그를 날짜별 압축 파일('jsonl' 또는 'parquet')로 옮김
+    'ACTIVITY_ARCHIVE_DIR': 'activity_archive',
+    'ACTIVITY_ARCHIVE_FORMAT': 'jsonl',
+    'ACTIVITY_RETENTION_DAYS': 30,
+    # 온라인 백업: 저장 위치, 남길 스냅샷 수, 단계마다 복사할 페이지 수와 단계 사이 대기(초)
+    'BACKUP_DIR': 'backups',
+    'BACKUP_KEEP': 7,
+    'BACKUP_PAGES_PER_STEP': 256,
+    'BACKUP_STEP_SLEEP': 0.05,
+    # 답변 분석: 판독자 간 일치도를 계산할 다른 판독자 인스턴스의 DB 파일 목록 (읽기 전용으로 열림)
+    'ANALYTICS_READER_DATABASES': [],
+    'ANALYTICS_TOP_FEATURES': 50,
+    # 특징 어휘: 새 라벨을 기존 canonical 특징에 붙일 최소 유사도 (0~1)
+    'FEATURE_MATCH_THRESHOLD': 0.75,
+    # 중복 이미지: 같은 이미지로 볼 pHash 해밍 거리(64비트 중), 해시 프로세스 수 (0이면 CPU 수)
+    'DUPLICATE_MAX_DISTANCE': 6,
+    'DUPLICATE_SCAN_WORKERS': 0,
+    # 응답 압축: 협상할 인코딩(선호 순서, 비우면 압축 안 함), 압축할 최소 본문 크기(바이트),
+    # 동적 응답의 gzip 레벨/brotli 품질 (미리 압축해 두는 JSON은 최고 압축률 사용)
+    'COMPRESS_ENCODINGS': ['br', 'gzip'],
+    'COMPRESS_MIN_SIZE': 1024,
+    'COMPRESS_GZIP_LEVEL': 6,
+    'COMPRESS_BROTLI_QUALITY': 5,
+    # API JSON 직렬화: 'auto'(orjson이 있으면 사용), 'orjson', 'json'(표준 라이브러리)
+    'JSON_ENCODER': 'auto',
+    # 정적 파일 빌드 결과 폴더 (python -m service.static_assets, 매니페스트가 없으면 원본 static 사용)
+    'STATIC_DIST_DIR': 'static/dist',
+    # 백그라운드 작업: 프로세스당 작업자 스레드 수 (0이면 웹 프로세스에서는 실행하지 않고
+    # python -m service.job_queue worker로 따로 실행), 대기열 확인 주기(초),
+    # heartbeat가 이 시간(초) 동안 없으면 실패 처리, 답변 내보내기 작업의 저장 폴더
+    'JOB_WORKERS': 1,
+    'JOB_POLL_INTERVAL': 2.0,
+    'JOB_STALE_SECONDS': 300.0,
+    'EXPORT_DIR': 'exports',
+}
+
+
+def load_config_from_env() -> Dict:
+    """환경 변수에서 서비스 설정을 읽습니다 (목록은 콤마로 구분)."""
+    config = {}
+    for key in ('IMAGES_FOLDER', 'IMAGE_CATALOG_PATH', 'DATABASE_PATH', 'WARMUP',
+                'LOG_LEVEL', 'LOG_FORMAT', 'LOG_FILE', 'LOG_ROTATE',
+                'ACTIVITY_ARCHIVE_DIR', 'ACTIVITY_ARCHIVE_FORMAT', 'BACKUP_DIR', 'JSON_ENCODER',
+                'STATIC_DIST_DIR', 'EXPORT_DIR'):
+        if key in os.environ:
+            config[key] = os.environ[key]
+    for key in ('DIAGNOSIS_MANIFESTS', 'FEATURES_FILES', 'ANALYTICS_READER_DATABASES', 'COMPRESS_ENCODINGS'):
+        if key in os.environ:
+            config[key] = [path.strip() for path in os.environ[key].split(',') if path.strip()]
+    for key in ('DATASET_WATCH_INTERVAL', 'SLOW_QUERY_MS', 'LOG_SAMPLE_RATE',
+                'SSE_POLL_INTERVAL', 'SSE_HEARTBEAT', 'SSE_MAX_STREAM_SECONDS', 'BACKUP_STEP_SLEEP',
+                'FEATURE_MATCH_THRESHOLD', 'JOB_POLL_INTERVAL', 'JOB_STALE_SECONDS', 'WARMUP_RETRY_SECONDS'):
+        if key in os.environ:
+            config[key] = float(os.environ[key])
+    for key in ('LOG_MAX_BYTES', 'LOG_BACKUP_COUNT', 'SSE_MAX_CLIENTS', 'ACTIVITY_RETENTION_DAYS',
+                'BACKUP_KEEP', 'BACKUP_PAGES_PER_STEP', 'ANALYTICS_TOP_FEATURES',
+                'DUPLICATE_MAX_DISTANCE', 'DUPLICATE_SCAN_WORKERS', 'COMPRESS_MIN_SIZE',
+                'COMPRESS_GZIP_LEVEL', 'COMPRESS_BROTLI_QUALITY', 'JOB_WORKERS'):
+        if key in os.environ:
+            config[key] = int(os.environ[key])
+    return config
+
+
+class ServiceContainer:
+    """앱 팩토리가 관리하는 서비스 컨테이너.
+
+    각 서비스는 처음 접근할 때 생성되므로, 블루프린트를 import하는 것만으로는 매니페스트 파싱이나
+    스키마 DDL이 실행되지 않습니다. warm_up()으로 미리(필요하면 백그라운드에서) 로드할 수 있습니다.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(config or {})
+        self._services: Dict[str, object] = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._warmup_lock = threading.Lock()
+        self._warmup_failed_at = 0.0
+        self.timings: Dict[str, float] = {}
+        self.warmup_error: Optional[str] = None
+
+    def _get(self, name: str, factory: Callable[[], object]):
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(name)
+                if service is None:
+                    started = time.perf_counter()
+                    service = factory()
+                    self.timings[f'{name}_init_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                    self._services[name] = service
+        return service
+
+    # -----------------------------
+    # 서비스
+    # -----------------------------
+    @property
+    def image(self):
+        from service.image_service import ImageService
+
+        return self._get('image', lambda: ImageService(
+            images_folder=self.config['IMAGES_FOLDER'],
+            catalog_path=self.config['IMAGE_CATALOG_PATH'],
+        ))
+
+    @property
+    def diagnosis(self):
+        from service.diagnosis_service import DiagnosisService
+
+        return self._get('diagnosis', lambda: DiagnosisService(
+            json_file_path=self.config['DIAGNOSIS_MANIFESTS'],
+            features_file_path=self.config['FEATURES_FILES'],
+        ))
+
+    @property
+    def database(self):
+        from service.database_service import DatabaseService
+
+        return self._get('database', lambda: DatabaseService(
+            db_path=self.config['DATABASE_PATH'],
+            slow_query_ms=self.config['SLOW_QUERY_MS'],
+        ))
+
+    @property
+    def archive(self):
+        from service.activity_archive import ActivityArchive
+
+        return self._get('archive', lambda: ActivityArchive(
+            self.database,
+            archive_dir=self.config['ACTIVITY_ARCHIVE_DIR'],
+            archive_format=self.config['ACTIVITY_ARCHIVE_FORMAT'],
+        ))
+
+    @property
+    def backup(self):
+        from service.backup_service import BackupService
+
+        return self._get('backup', lambda: BackupService(
+            self.config['DATABASE_PATH'],
+            backup_dir=self.config['BACKUP_DIR'],
+            keep=int(self.config['BACKUP_KEEP']),
+            pages_per_step=int(self.config['BACKUP_PAGES_PER_STEP']),
+            step_sleep=float(self.config['BACKUP_STEP_SLEEP']),
+        ))
+
+    @property
+    def search(self):
+        from service.search_service import SearchService
+
+        return self._get('search', lambda: SearchService(self.database, self.diagnosis, images=self.image))
+
+    @property
+    def vocabulary(self):
+        from service.feature_vocabulary import FeatureVocabulary
+
+        return self._get('vocabulary', lambda: FeatureVocabulary(
+            self.database,
+            self.diagnosis,
+            threshold=float(self.config['FEATURE_MATCH_THRESHOLD']),
+        ))
+
+    @property
+    def image_hashes(self):
+        from service.image_hash_service import ImageHashService
+
+        return self._get('image_hashes', lambda: ImageHashService(
+            self.database,
+            images_folder=self.config['IMAGES_FOLDER'],
+            max_distance=int(self.config['DUPLICATE_MAX_DISTANCE']),
+            workers=int(self.config['DUPLICATE_SCAN_WORKERS']),
+        ))
+
+    @property
+    def compression(self):
+        from service.response_compression import ResponseCompressor
+
+        return self._get('compression', lambda: ResponseCompressor(
+            encodings=self.config['COMPRESS_ENCODINGS'],
+            min_size=int(self.config['COMPRESS_MIN_SIZE']),
+            gzip_level=int(self.config['COMPRESS_GZIP_LEVEL']),
+            brotli_quality=int(self.config['COMPRESS_BROTLI_QUALITY']),
+        ))
+
+    @property
+    def assets(self):
+        from service.static_assets import StaticAssets
+
+        return self._get('assets', lambda: StaticAssets(dist_dir=self.config['STATIC_DIST_DIR']))
+
+    @property
+    def analytics(self):
+        from service.analytics_service import AnnotationAnalytics
+
+        return self._get('analytics', lambda: AnnotationAnalytics(
+            self.database,
+            self.diagnosis,
+            vocabulary=self.vocabulary,
+            reader_databases=self.config['ANALYTICS_READER_DATABASES'],
+            top_features=int(self.config['ANALYTICS_TOP_FEATURES']),
+        ))
+
+    @property
+    def jobs(self):
+        from service.job_queue import JobQueue, register_default_jobs
+
+        def create():
+            queue = JobQueue(
+                self.database,
+                services=self,
+                workers=int(self.config['JOB_WORKERS']),
+                poll_interval=float(self.config['JOB_POLL_INTERVAL']),
+                stale_seconds=float(self.config['JOB_STALE_SECONDS']),
+            )
+            register_default_jobs(queue)
+            return queue
+
+        return self._get('jobs', create)
+
+    @property
+    def reloader(self):
+        from service.reload_service import DatasetReloader
+
+        # 검색 인덱스와 특징 어휘는 진단 뷰를 읽으므로 diagnosis 다음에 갱신
+        return self._get('reloader', lambda: DatasetReloader({
+            'diagnosis': self.diagnosis,
+            'images': self.image,
+            'search': self.search,
+            'vocabulary': self.vocabulary,
+            'assets': self.assets,
+        }, interval=float(self.config['DATASET_WATCH_INTERVAL'])))
+
+    # -----------------------------
+    # 워밍업 / 상태
+    # -----------------------------
+    def warm_up(self, background: bool = True) -> None:
+        """서비스 생성과 데이터셋 인덱스 로드를 미리 수행합니다."""
+        if background:
+            threading.Thread(target=self._warm_up, name='service-warmup', daemon=True).start()
+        else:
+            self._warm_up()
+
+    def _warm_up(self) -> None:
+        # 재시도가 겹치면 먼저 시작한 워밍업만 진행
+        if not self._warmup_lock.acquire(blocking=False):
+            return
+        try:
+            started = time.perf_counter()
+            try:
+                self.database
+                for name, service in (('diagnosis', self.diagnosis), ('image', self.image),
+                                      ('search', self.search), ('vocabulary', self.vocabulary)):
+                    index_started = time.perf_counter()
+                    service.reload_changed()
+                    self.timings[f'{name}_index_ms'] = round((time.perf_counter() - index_started) * 1000, 2)
+            except Exception as e:
+                self.warmup_error = str(e)
+                self._warmup_failed_at = time.monotonic()
+                logger.exception("서비스 워밍업 오류: %s", e)
+                return
+            self.warmup_error = None
+            self.timings['warmup_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            self._ready.set()
+        finally:
+            # 워밍업 스레드(preload 시 gunicorn 마스터)에 SQLite 연결을 남기지 않음
+            if 'database' in self._services:
+                self.database.close_connection()
+            self._warmup_lock.release()
+
+    def is_ready(self) -> bool:
+        """워밍업이 끝났는지 반환합니다.
+
+        WARMUP=none이면 서비스를 첫 요청 때 로드하므로 처음부터 준비된 것으로 봅니다.
+        워밍업이 실패했으면 WARMUP_RETRY_SECONDS가 지날 때마다 백그라운드에서 다시 시도합니다.
+        """
+        if self._ready.is_set() or self.config['WARMUP'] == 'none':
+            return True
+        if (self.warmup_error is not None and not self._warmup_lock.locked()
+                and time.monotonic() - self._warmup_failed_at >= float(self.config['WARMUP_RETRY_SECONDS'])):
+            self._warmup_failed_at = time.monotonic()
+            logger.info("서비스 워밍업 재시도")
+            self.warm_up(background=True)
+        return False
+
+    def after_fork(self) -> None:
+        """pre-fork 서버의 워커에서 호출: 상속된 DB 연결을 버리고 로그/감시/작업 스레드를 새로 시작합니다."""
+        restart_listener()
+        if 'database' in self._services:
+            self.database.reset_connections()
+        self.reloader.start()
+        self.jobs.start()
@@ -1,23 +1,89 @@
+import json
+import logging
 import sqlite3
 import os
-from typing import Dict, List, Optional
+import threading
+from contextlib import closing
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
+from service.event_service import events
+from service.metrics_service import metrics
+from service.query_profiler import ProfiledConnection, QueryProfiler
+
+logger = logging.getLogger(__name__)
+
+
+def _count_statement(sql: str) -> None:
+    """실행되는 SQL 문마다 호출되어 문장 종류별 쿼리 수를 기록합니다."""
+    statement = sql.lstrip().split(None, 1)
+    metrics.inc('db_queries_total', statement=statement[0].upper() if statement else 'EMPTY')
 
 class DatabaseService:
-    def __init__(self, db_path: str = 'medical_features.db'):
+    def __init__(self, db_path: str = 'medical_features.db', busy_timeout: float = 5.0,
+                 slow_query_ms: Optional[float] = 100.0):
         self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        # 모든 쿼리의 메서드별 실행 시간 집계 및 느린 쿼리 기록
+        self.profiler = QueryProfiler(slow_query_ms=slow_query_ms)
+        self._local = threading.local()
         self._initialized = False
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """현재 프로세스/스레드 전용 연결을 반환합니다.
+        
+        연결은 스레드별로 재사용하며, fork 이후에는 부모 프로세스에서 만든 연결을 쓰지 않고 새로 엽니다.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, factory=ProfiledConnection)
+            conn.profiler = self.profiler
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.set_trace_callback(_count_statement)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _open_dedicated(self, isolation_level: Optional[str] = None) -> sqlite3.Connection:
+        """스레드 로컬 연결과 별도로 여는 전용 연결 (명시적 트랜잭션, 스냅샷 읽기, VACUUM 등).
+        
+        _connect()와 같은 프로파일러와 쿼리 수 집계를 붙이므로 쿼리 프로파일과 메트릭에 함께 잡힙니다.
+        호출한 쪽에서 closing()으로 닫습니다.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, factory=ProfiledConnection,
+                               isolation_level=isolation_level)
+        conn.profiler = self.profiler
+        conn.set_trace_callback(_count_statement)
+        return conn
+    
+    def reset_connections(self):
+        """fork 직후 워커에서 호출하여 상속된 스레드 로컬 연결 참조를 버립니다."""
+        self._local = threading.local()
+    
+    def close_connection(self):
+        """현재 스레드의 연결을 닫습니다 (워밍업을 마친 gunicorn 마스터처럼 연결을 남기지 않을 곳에서 호출)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+    
     def init_database(self):
         """데이터베이스와 테이블을 초기화합니다."""
         if self._initialized:
             return
             
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            # 초기화 연결은 바로 닫아서 (gunicorn preload 시) 마스터 프로세스에 연결이 남지 않게 함
+            with closing(self._open_dedicated(isolation_level='')) as conn, conn:
                 cursor = conn.cursor()
                 
+                # 새 DB는 삭제된 페이지를 나중에 조금씩 반환할 수 있도록 incremental auto_vacuum으로 생성
+                # (테이블이 이미 있는 DB에는 적용되지 않음: enable_incremental_vacuum() 참고)
+                cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                
+                # 여러 워커/스레드가 동시에 읽고 쓰도록 WAL 모드 사용
+                cursor.execute('PRAGMA journal_mode=WAL')
+                
                 # 특징 질문 답변 테이블 생성
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS feature_answers (
@@ -37,7 +103,40 @@ class DatabaseService:
                 columns = [column[1] for column in cursor.fetchall()]
                 if 'explanation' not in columns:
                     cursor.execute('ALTER TABLE feature_answers ADD COLUMN explanation TEXT')
-                    print("explanation 컬럼이 추가되었습니다.")
+                    logger.info("explanation 컬럼이 추가되었습니다.")
+                
+                # 변경분 동기화용 버전: 답변 저장/삭제마다 change_counter를 1씩 올려 부여하는 단조 증가 값
+                if 'version' not in columns:
+                    cursor.execute('ALTER TABLE feature_answers ADD COLUMN version INTEGER')
+                    logger.info("version 컬럼이 추가되었습니다.")
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_feature_answers_version ON feature_answers(version)')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS change_counter (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        version INTEGER NOT NULL
+                    )
+                ''')
+                # 삭제된 답변도 변경분으로 전달하기 위한 기록
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS feature_answer_tombstones (
+                        image_name TEXT NOT NULL,
+                        feature_id TEXT NOT NULL,
+                        version INTEGER NOT NULL,
+                        deleted_at DATETIME NOT NULL,
+                        PRIMARY KEY (image_name, feature_id)
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_feature_answer_tombstones_version ON feature_answer_tombstones(version)')
+                # 버전이 없는 기존 행은 id로 채우고, 카운터를 가장 큰 버전 이상으로 맞춤
+                cursor.execute('UPDATE feature_answers SET version = id WHERE version IS NULL')
+                cursor.execute('''
+                    INSERT OR REPLACE INTO change_counter (id, version)
+                    SELECT 1, MAX(
+                        COALESCE((SELECT version FROM change_counter WHERE id = 1), 0),
+                        COALESCE((SELECT MAX(version) FROM feature_answers), 0),
+                        COALESCE((SELECT MAX(version) FROM feature_answer_tombstones), 0)
+                    )
+                ''')
                 
                 # 사용자 행동 로그 테이블 생성
                 cursor.execute('''
@@ -54,86 +153,888 @@ class DatabaseService:
                         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
+                # 보관 작업의 기간 조회와 로그 페이지의 최신순 정렬용
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_answer_activity_logs_timestamp ON answer_activity_logs(timestamp)')
+                
+                self._init_search_index(cursor)
+                self._init_feature_vocabulary(cursor)
+                self._init_image_hashes(cursor)
+                self._init_jobs(cursor)
                 
                 conn.commit()
                 self._initialized = True
-                print(f"데이터베이스 초기화 완료: {self.db_path}")
+                logger.info("데이터베이스 초기화 완료: %s", self.db_path)
                 
         except Exception as e:
-            print(f"데이터베이스 초기화 오류: {e}")
+            logger.error("데이터베이스 초기화 오류: %s", e)
+    
+    @staticmethod
+    def _init_search_index(cursor: sqlite3.Cursor) -> None:
+        """FTS5 검색 인덱스를 만듭니다.
+        
+        - dataset_search: 매니페스트 rationale과 특징 라벨/설명 (SearchService가 데이터셋이 바뀔 때 통째로 교체)
+        - answer_search: feature_answers의 reason/explanation을 가리키는 external content 인덱스.
+          트리거로 저장/삭제와 같은 트랜잭션에서 갱신됩니다. INSERT OR REPLACE가 지우는 기존 행에는
+          DELETE 트리거가 실행되지 않으므로 BEFORE INSERT 트리거에서 같은 (image_name, feature_id) 행을 먼저 인덱스에서 뺍니다.
+        """
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS dataset_search USING fts5(
+                title, body,
+                image_name UNINDEXED, category_id UNINDEXED, diagnosis_id UNINDEXED,
+                source UNINDEXED, feature_id UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'answer_search'")
+        created = cursor.fetchone() is None
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS answer_search USING fts5(
+                reason, explanation,
+                content = 'feature_answers', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+        if created:
+            # 기존 답변으로 인덱스 채우기
+            cursor.execute("INSERT INTO answer_search(answer_search) VALUES ('rebuild')")
+            logger.info("답변 검색 인덱스가 생성되었습니다.")
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS feature_answers_search_replace BEFORE INSERT ON feature_answers BEGIN
+                INSERT INTO answer_search(answer_search, rowid, reason, explanation)
+                SELECT 'delete', id, reason, explanation FROM feature_answers
+                WHERE image_name = NEW.image_name AND feature_id = NEW.feature_id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS feature_answers_search_insert AFTER INSERT ON feature_answers BEGIN
+                INSERT INTO answer_search(rowid, reason, explanation) VALUES (NEW.id, NEW.reason, NEW.explanation);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS feature_answers_search_delete AFTER DELETE ON feature_answers BEGIN
+                INSERT INTO answer_search(answer_search, rowid, reason, explanation)
+                VALUES ('delete', OLD.id, OLD.reason, OLD.explanation);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS feature_answers_search_update AFTER UPDATE OF reason, explanation ON feature_answers BEGIN
+                INSERT INTO answer_search(answer_search, rowid, reason, explanation)
+                VALUES ('delete', OLD.id, OLD.reason, OLD.explanation);
+                INSERT INTO answer_search(rowid, reason, explanation) VALUES (NEW.id, NEW.reason, NEW.explanation);
+            END
+        ''')
+    
+    @staticmethod
+    def _init_feature_vocabulary(cursor: sqlite3.Cursor) -> None:
+        """특징 어휘 테이블을 만듭니다.
+        
+        - feature_vocabulary: 정규화 라벨(normalized)마다 하나인 canonical 특징. id는 재구성해도 유지됩니다.
+        - feature_vocabulary_map: (diagnosis_id, feature_id) → canonical_id. diagnosis_id는 문자열로 저장합니다.
+        - feature_vocabulary_meta: 반영한 데이터셋 지문과 어휘 버전 (쓰기마다 1씩 증가)
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feature_vocabulary (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                normalized TEXT NOT NULL UNIQUE,
+                label TEXT NOT NULL,
+                occurrences INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feature_vocabulary_map (
+                diagnosis_id TEXT NOT NULL,
+                feature_id TEXT NOT NULL,
+                canonical_id INTEGER NOT NULL REFERENCES feature_vocabulary(id),
+                label TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (diagnosis_id, feature_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_feature_vocabulary_map_canonical ON feature_vocabulary_map(canonical_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feature_vocabulary_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+    
+    @staticmethod
+    def _init_image_hashes(cursor: sqlite3.Cursor) -> None:
+        """이미지 지각 해시(perceptual hash) 인덱스 테이블을 만듭니다.
+        
+        - image_hashes: downloaded_images 아래 `카테고리/파일명`마다 크기/수정 시각(재스캔 판단용),
+          sha256, dHash/pHash(64비트, 16자리 hex)와 이미지 크기. 열지 못한 파일은 error만 기록합니다.
+        - image_hash_meta: 인덱스 버전 (바뀐 파일이 있는 스캔마다 1씩 증가)
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                path TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT,
+                dhash TEXT,
+                phash TEXT,
+                width INTEGER,
+                height INTEGER,
+                error TEXT,
+                scanned_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_hash_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+    
+    @staticmethod
+    def _init_jobs(cursor: sqlite3.Cursor) -> None:
+        """백그라운드 작업 큐 테이블을 만듭니다.
+        
+        status: queued → running → succeeded / failed / cancelled. params/result는 JSON 문자열이고,
+        실행 중인 작업은 heartbeat_at을 주기적으로 갱신합니다 (오래 갱신되지 않으면 작업자가 죽은 것으로 봄).
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress_done INTEGER NOT NULL DEFAULT 0,
+                progress_total INTEGER,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                heartbeat_at TEXT
+            )
+        ''')
+        # 작업자가 대기 중인 작업을 오래된 순으로 찾을 때 사용
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)')
     
     def save_feature_answer(self, image_name: str, feature_id: str, answer: str, reason: str = "", explanation: str = "") -> bool:
-        """특징 질문 답변을 저장합니다."""
+        """특징 질문 답변을 저장합니다 (버전 확인 없이 마지막 저장이 반영됨)."""
+        return self.save_feature_answer_versioned(image_name, feature_id, answer, reason, explanation)['status'] == 'saved'
+    
+    def save_feature_answer_versioned(self, image_name: str, feature_id: str, answer: str, reason: str = "",
+                                      explanation: str = "", expected_version: Optional[int] = None) -> Dict:
+        """클라이언트가 마지막으로 본 버전(expected_version)이 현재 행과 같을 때만 저장합니다.
+        
+        expected_version이 None이면 확인하지 않고, 0이면 아직 답변이 없어야 합니다.
+        반환값: {'status': 'saved', 'version': 새 버전}
+                {'status': 'conflict', 'current': 현재 답변 (삭제되었으면 None)}
+                {'status': 'invalid' | 'error'}
+        """
+        # 답변이나 해설 중 하나라도 있으면 저장
+        if not answer and not reason and not explanation:
+            logger.warning("저장 실패: %s - 모든 필드가 비어있음", feature_id,
+                           extra={'image_name': image_name})
+            return {'status': 'invalid'}
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                # 답변이나 해설 중 하나라도 있으면 저장
-                if not answer and not reason and not explanation:
-                    print(f"저장 실패: {feature_id} - 모든 필드가 비어있음")
-                    return False
+                # 카운터 UPDATE로 쓰기 잠금을 먼저 잡아 버전 확인과 저장 사이에 다른 쓰기가 끼지 않게 함
+                version = self._next_version(cursor)
+                
+                if expected_version is not None:
+                    cursor.execute('''
+                        SELECT answer, reason, explanation, timestamp, version
+                        FROM feature_answers
+                        WHERE image_name = ? AND feature_id = ?
+                    ''', (image_name, feature_id))
+                    row = cursor.fetchone()
+                    current_version = (row[4] or 0) if row else 0
+                    if current_version != expected_version:
+                        conn.rollback()
+                        current = None
+                        if row:
+                            current = {
+                                'answer': row[0],
+                                'reason': row[1] or '',
+                                'explanation': row[2] or '',
+                                'timestamp': row[3],
+                                'version': current_version
+                            }
+                        metrics.inc('answer_save_conflicts_total')
+                        return {'status': 'conflict', 'expected_version': expected_version, 'current': current}
                 
                 # UPSERT 방식으로 저장 (이미 있으면 업데이트, 없으면 삽입)
                 cursor.execute('''
                     INSERT OR REPLACE INTO feature_answers 
-                    (image_name, feature_id, answer, reason, explanation, timestamp) 
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (image_name, feature_id, answer, reason, explanation, datetime.now().isoformat()))
+                    (image_name, feature_id, answer, reason, explanation, timestamp, version) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (image_name, feature_id, answer, reason, explanation, datetime.now().isoformat(), version))
+                cursor.execute('DELETE FROM feature_answer_tombstones WHERE image_name = ? AND feature_id = ?',
+                               (image_name, feature_id))
                 
                 conn.commit()
-                return True
+                events.publish('answer', image_name=image_name, version=version)
+                return {'status': 'saved', 'version': version}
                 
         except Exception as e:
-            print(f"답변 저장 오류: {e}")
-            return False
+            logger.error("답변 저장 오류: %s", e)
+            return {'status': 'error'}
     
     def get_feature_answers(self, image_name: str) -> Dict[str, Dict]:
         """특정 이미지의 모든 특징 답변을 가져옵니다."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
-                    SELECT feature_id, answer, reason, explanation, timestamp 
+                    SELECT feature_id, answer, reason, explanation, timestamp, version 
                     FROM feature_answers 
                     WHERE image_name = ?
                 ''', (image_name,))
                 
                 answers = {}
                 for row in cursor.fetchall():
-                    feature_id, answer, reason, explanation, timestamp = row
+                    feature_id, answer, reason, explanation, timestamp, version = row
                     answers[feature_id] = {
                         'answer': answer,
                         'reason': reason or '',
                         'explanation': explanation or '',
-                        'timestamp': timestamp
+                        'timestamp': timestamp,
+                        # 저장 시 expected_version으로 다시 보내는 값
+                        'version': version or 0
                     }
                 
                 return answers
                 
         except Exception as e:
-            print(f"답변 로드 오류: {e}")
+            logger.error("답변 로드 오류: %s", e)
             return {}
     
     def delete_feature_answers(self, image_name: str) -> bool:
         """특정 이미지의 모든 특징 답변을 삭제합니다."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
+                version = self._next_version(cursor)
+                cursor.execute('''
+                    INSERT OR REPLACE INTO feature_answer_tombstones (image_name, feature_id, version, deleted_at)
+                    SELECT image_name, feature_id, ?, ? FROM feature_answers WHERE image_name = ?
+                ''', (version, datetime.now().isoformat(), image_name))
                 cursor.execute('DELETE FROM feature_answers WHERE image_name = ?', (image_name,))
                 conn.commit()
+                events.publish('answers_deleted', image_name=image_name, version=version)
                 
                 return True
                 
         except Exception as e:
-            print(f"답변 삭제 오류: {e}")
+            logger.error("답변 삭제 오류: %s", e)
+            return False
+    
+    @staticmethod
+    def _next_version(cursor: sqlite3.Cursor) -> int:
+        """쓰기 트랜잭션 안에서 변경 카운터를 올리고 새 버전을 반환합니다.
+        
+        UPDATE가 쓰기 잠금을 먼저 잡으므로 여러 워커에서도 커밋 순서대로 버전이 증가합니다.
+        """
+        cursor.execute('UPDATE change_counter SET version = version + 1 WHERE id = 1')
+        cursor.execute('SELECT version FROM change_counter WHERE id = 1')
+        return cursor.fetchone()[0]
+    
+    def get_current_version(self) -> int:
+        """마지막으로 커밋된 변경 버전."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT version FROM change_counter WHERE id = 1')
+                row = cursor.fetchone()
+                return row[0] if row else 0
+        except Exception as e:
+            logger.error("변경 버전 조회 오류: %s", e)
+            return 0
+    
+    def get_feature_answer_changes(self, since_version: int = 0, image_names: Optional[List[str]] = None,
+                                   since_timestamp: Optional[str] = None, limit: int = 1000) -> Optional[Dict]:
+        """since_version 이후에 저장/삭제된 답변을 버전 순으로 가져옵니다.
+        
+        image_names를 주면 해당 이미지들로 범위를 제한합니다. 반환된 'version'을 다음 요청의
+        since_version으로 넘기면 중복이나 누락 없이 이어서 받을 수 있습니다.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                
+                # 카운터를 먼저 읽음: 카운터와 행은 같은 트랜잭션에서 커밋되므로
+                # 이 값 이하의 버전은 모두 커밋된 상태
+                cursor.execute('SELECT version FROM change_counter WHERE id = 1')
+                row = cursor.fetchone()
+                current_version = row[0] if row else 0
+                
+                if since_timestamp:
+                    # 타임스탬프 기준 요청은 해당 시각 이후 첫 변경의 버전으로 변환 (timestamp 컬럼 스캔)
+                    cursor.execute('''
+                        SELECT MIN(version) FROM (
+                            SELECT MIN(version) AS version FROM feature_answers WHERE timestamp > ?
+                            UNION ALL
+                            SELECT MIN(version) FROM feature_answer_tombstones WHERE deleted_at > ?
+                        )
+                    ''', (since_timestamp, since_timestamp))
+                    first_version = cursor.fetchone()[0]
+                    since_version = (first_version - 1) if first_version is not None else current_version
+                
+                scope = ''
+                params: list = [since_version, current_version]
+                if image_names is not None:
+                    scope = 'AND image_name IN (SELECT value FROM json_each(?))'
+                    params.append(json.dumps(image_names))
+                
+                cursor.execute(f'''
+                    SELECT 'answer', image_name, feature_id, answer, reason, explanation, timestamp, version
+                    FROM feature_answers
+                    WHERE version > ? AND version <= ? {scope}
+                    UNION ALL
+                    SELECT 'deleted', image_name, feature_id, NULL, NULL, NULL, deleted_at, version
+                    FROM feature_answer_tombstones
+                    WHERE version > ? AND version <= ? {scope}
+                    ORDER BY version
+                    LIMIT ?
+                ''', params + params + [limit + 1])
+                rows = cursor.fetchall()
+                
+                has_more = len(rows) > limit
+                rows = rows[:limit]
+                answers = []
+                deleted = []
+                for kind, image_name, feature_id, answer, reason, explanation, timestamp, version in rows:
+                    if kind == 'answer':
+                        answers.append({
+                            'image_name': image_name,
+                            'feature_id': feature_id,
+                            'answer': answer,
+                            'reason': reason or '',
+                            'explanation': explanation or '',
+                            'timestamp': timestamp,
+                            'version': version
+                        })
+                    else:
+                        deleted.append({
+                            'image_name': image_name,
+                            'feature_id': feature_id,
+                            'deleted_at': timestamp,
+                            'version': version
+                        })
+                
+                return {
+                    'since': since_version,
+                    # 다음 요청의 since 값 (더 남아 있으면 이번에 받은 마지막 버전)
+                    'version': rows[-1][-1] if has_more else max(since_version, current_version),
+                    'current_version': current_version,
+                    'has_more': has_more,
+                    'answers': answers,
+                    'deleted': deleted
+                }
+                
+        except Exception as e:
+            logger.error("변경분 조회 오류: %s", e)
+            return None
+    
+    def get_search_meta(self, key: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT value FROM search_meta WHERE key = ?', (key,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error("검색 인덱스 정보 조회 오류: %s", e)
+            return None
+    
+    def replace_dataset_search_index(self, fingerprint: str, rows: Iterator[tuple], force: bool = False) -> Optional[int]:
+        """dataset_search를 rows로 교체하고 fingerprint를 기록합니다. 삽입한 행 수를 반환합니다.
+        
+        rows: (title, body, image_name, category_id, diagnosis_id, source, feature_id)
+        BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡고 fingerprint를 다시 확인하므로, 여러 워커가 동시에 시작해도 한 번만 재구성됩니다.
+        이미 같은 fingerprint로 만들어져 있으면 (force가 아닌 한) 0을 반환합니다.
+        """
+        try:
+            with closing(self._open_dedicated()) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute("SELECT value FROM search_meta WHERE key = 'dataset_fingerprint'").fetchone()
+                    if row and row[0] == fingerprint and not force:
+                        conn.execute('ROLLBACK')
+                        return 0
+                    conn.execute('DELETE FROM dataset_search')
+                    conn.executemany('''
+                        INSERT INTO dataset_search
+                        (title, body, image_name, category_id, diagnosis_id, source, feature_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+                    inserted = conn.execute('SELECT COUNT(*) FROM dataset_search').fetchone()[0]
+                    conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('dataset_fingerprint', ?)",
+                                 (fingerprint,))
+                    # 세그먼트를 하나로 합쳐 검색 시 읽을 b-tree 수를 줄임
+                    conn.execute("INSERT INTO dataset_search(dataset_search) VALUES ('optimize')")
+                    conn.execute('COMMIT')
+                    return inserted
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        except Exception as e:
+            logger.error("데이터셋 검색 인덱스 재구성 오류: %s", e)
+            return None
+    
+    def get_feature_vocabulary_meta(self, key: str) -> Optional[str]:
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT value FROM feature_vocabulary_meta WHERE key = ?', (key,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error("특징 어휘 정보 조회 오류: %s", e)
+            return None
+    
+    def get_feature_vocabulary(self) -> Optional[Dict]:
+        """canonical 특징 목록과 (diagnosis_id, feature_id) 매핑 전체를 같은 스냅샷에서 가져옵니다."""
+        try:
+            with closing(self._open_dedicated()) as conn:
+                conn.execute('BEGIN')
+                try:
+                    row = conn.execute("SELECT value FROM feature_vocabulary_meta WHERE key = 'version'").fetchone()
+                    canonicals = conn.execute(
+                        'SELECT id, normalized, label, occurrences FROM feature_vocabulary ORDER BY id'
+                    ).fetchall()
+                    mappings = conn.execute(
+                        'SELECT diagnosis_id, feature_id, canonical_id, label, normalized, score FROM feature_vocabulary_map'
+                    ).fetchall()
+                finally:
+                    conn.execute('ROLLBACK')
+            return {
+                'version': int(row[0]) if row else 0,
+                'canonicals': [
+                    {'id': canonical_id, 'normalized': normalized, 'label': label, 'occurrences': occurrences}
+                    for canonical_id, normalized, label, occurrences in canonicals
+                ],
+                'mappings': [
+                    {'diagnosis_id': diagnosis_id, 'feature_id': feature_id, 'canonical_id': canonical_id,
+                     'label': label, 'normalized': normalized, 'score': score}
+                    for diagnosis_id, feature_id, canonical_id, label, normalized, score in mappings
+                ],
+            }
+        except Exception as e:
+            logger.error("특징 어휘 조회 오류: %s", e)
+            return None
+    
+    def write_feature_vocabulary(self, fingerprint: str, canonicals: List[tuple], mappings: List[tuple],
+                                 replace: bool = False, force: bool = False) -> Optional[int]:
+        """특징 어휘에 추가(replace=False)하거나 매핑 전체를 교체(replace=True)하고 fingerprint를 기록합니다.
+        
+        canonicals: (normalized, label), mappings: (diagnosis_id, feature_id, label, normalized, canonical_normalized, score)
+        매핑은 canonical을 id가 아니라 정규화 라벨로 가리키므로, 여러 워커가 같은 추가를 동시에 계산해도
+        INSERT OR IGNORE로 한 번만 반영됩니다. 교체해도 계속 쓰이는 canonical의 id는 바뀌지 않습니다.
+        이미 같은 fingerprint가 기록되어 있으면 (replace/force가 아닌 한) 0을 반환합니다.
+        """
+        try:
+            with closing(self._open_dedicated()) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute("SELECT value FROM feature_vocabulary_meta WHERE key = 'fingerprint'").fetchone()
+                    if row and row[0] == fingerprint and not (replace or force):
+                        conn.execute('ROLLBACK')
+                        return 0
+                    if replace:
+                        conn.execute('DELETE FROM feature_vocabulary_map')
+                    conn.executemany('INSERT OR IGNORE INTO feature_vocabulary (normalized, label) VALUES (?, ?)',
+                                     canonicals)
+                    if replace:
+                        # 대표 라벨은 이번 재구성에서 가장 많이 쓰인 원래 라벨로 갱신
+                        conn.executemany('UPDATE feature_vocabulary SET label = ? WHERE normalized = ?',
+                                         [(label, normalized) for normalized, label in canonicals])
+                    before = conn.total_changes
+                    conn.executemany('''
+                        INSERT OR IGNORE INTO feature_vocabulary_map
+                        (diagnosis_id, feature_id, canonical_id, label, normalized, score)
+                        SELECT ?, ?, id, ?, ?, ? FROM feature_vocabulary WHERE normalized = ?
+                    ''', [(str(diagnosis_id), feature_id, label, normalized, score, canonical)
+                          for diagnosis_id, feature_id, label, normalized, canonical, score in mappings])
+                    written = conn.total_changes - before
+                    if replace:
+                        conn.execute('''
+                            DELETE FROM feature_vocabulary
+                            WHERE id NOT IN (SELECT canonical_id FROM feature_vocabulary_map)
+                        ''')
+                    conn.execute('''
+                        UPDATE feature_vocabulary SET occurrences = (
+                            SELECT COUNT(*) FROM feature_vocabulary_map WHERE canonical_id = feature_vocabulary.id
+                        )
+                    ''')
+                    conn.execute("INSERT OR REPLACE INTO feature_vocabulary_meta (key, value) VALUES ('fingerprint', ?)",
+                                 (fingerprint,))
+                    conn.execute('''
+                        INSERT INTO feature_vocabulary_meta (key, value) VALUES ('version', '1')
+                        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+                    ''')
+                    conn.execute('COMMIT')
+                    return written
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        except Exception as e:
+            logger.error("특징 어휘 저장 오류: %s", e)
+            return None
+    
+    def get_image_hash_version(self) -> int:
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT value FROM image_hash_meta WHERE key = 'version'")
+                row = cursor.fetchone()
+                return int(row[0]) if row else 0
+        except Exception as e:
+            logger.error("이미지 해시 버전 조회 오류: %s", e)
+            return 0
+    
+    def get_image_hashes(self) -> Optional[Dict]:
+        """이미지 해시 인덱스 전체와 버전을 같은 스냅샷에서 가져옵니다."""
+        try:
+            with closing(self._open_dedicated()) as conn:
+                conn.row_factory = sqlite3.Row
+                conn.execute('BEGIN')
+                try:
+                    row = conn.execute("SELECT value FROM image_hash_meta WHERE key = 'version'").fetchone()
+                    rows = conn.execute('''
+                        SELECT path, category, filename, size, mtime_ns, sha256, dhash, phash, width, height, error, scanned_at
+                        FROM image_hashes ORDER BY path
+                    ''').fetchall()
+                finally:
+                    conn.execute('ROLLBACK')
+            return {'version': int(row[0]) if row else 0, 'rows': [dict(r) for r in rows]}
+        except Exception as e:
+            logger.error("이미지 해시 조회 오류: %s", e)
+            return None
+    
+    def write_image_hashes(self, rows: List[Dict], removed_paths: List[str]) -> Optional[int]:
+        """스캔한 파일의 해시를 저장(덮어쓰기)하고 사라진 파일을 지운 뒤 인덱스 버전을 올립니다.
+        
+        Returns: 반영한 행 수 (오류 시 None)
+        """
+        if not rows and not removed_paths:
+            return 0
+        try:
+            with closing(self._open_dedicated()) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    before = conn.total_changes
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO image_hashes
+                        (path, category, filename, size, mtime_ns, sha256, dhash, phash, width, height, error, scanned_at)
+                        VALUES (:path, :category, :filename, :size, :mtime_ns, :sha256, :dhash, :phash,
+                                :width, :height, :error, :scanned_at)
+                    ''', rows)
+                    conn.executemany('DELETE FROM image_hashes WHERE path = ?', [(path,) for path in removed_paths])
+                    written = conn.total_changes - before
+                    conn.execute('''
+                        INSERT INTO image_hash_meta (key, value) VALUES ('version', '1')
+                        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+                    ''')
+                    conn.execute('COMMIT')
+                    return written
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        except Exception as e:
+            logger.error("이미지 해시 저장 오류: %s", e)
+            return None
+    
+    @staticmethod
+    def _job_row(row) -> Dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job['params'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+    
+    def enqueue_job(self, kind: str, params: Dict) -> Optional[int]:
+        """작업을 대기열에 넣고 작업 ID를 반환합니다 (오류 시 None)."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO jobs (kind, params, status, created_at) VALUES (?, ?, 'queued', ?)
+                ''', (kind, json.dumps(params, ensure_ascii=False), datetime.now().isoformat()))
+                conn.commit()
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error("작업 등록 오류: %s", e)
+            return None
+    
+    def claim_job(self, worker: str, kinds: List[str]) -> Optional[Dict]:
+        """가장 오래된 대기 작업 하나를 running으로 바꾸고 반환합니다 (없으면 None).
+        
+        BEGIN IMMEDIATE로 쓰기 잠금을 잡고 고르므로 여러 프로세스의 작업자가 같은 작업을 가져가지 않습니다.
+        대기 작업이 없는 평소의 폴링은 읽기만 하고 끝나도록, 쓰기 잠금은 대기 작업이 보일 때만 잡습니다.
+        """
+        try:
+            with self._connect() as conn:
+                queued = conn.execute('''
+                    SELECT 1 FROM jobs
+                    WHERE status = 'queued' AND kind IN (SELECT value FROM json_each(?))
+                    LIMIT 1
+                ''', (json.dumps(kinds),)).fetchone()
+            if queued is None:
+                return None
+            with closing(self._open_dedicated()) as conn:
+                conn.row_factory = sqlite3.Row
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute('''
+                        SELECT id FROM jobs
+                        WHERE status = 'queued' AND kind IN (SELECT value FROM json_each(?))
+                        ORDER BY id LIMIT 1
+                    ''', (json.dumps(kinds),)).fetchone()
+                    if row is None:
+                        conn.execute('ROLLBACK')
+                        return None
+                    now = datetime.now().isoformat()
+                    conn.execute('''
+                        UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?
+                        WHERE id = ?
+                    ''', (worker, now, now, row['id']))
+                    job = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+                    conn.execute('COMMIT')
+                    return self._job_row(job)
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        except Exception as e:
+            logger.error("작업 가져오기 오류: %s", e)
+            return None
+    
+    def update_job_progress(self, job_id: int, done: int, total: Optional[int], message: Optional[str]) -> bool:
+        """진행 상황과 heartbeat를 기록하고, 취소가 요청되었는지 반환합니다."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE jobs SET progress_done = ?, progress_total = ?, message = COALESCE(?, message),
+                                    heartbeat_at = ?
+                    WHERE id = ?
+                ''', (done, total, message, datetime.now().isoformat(), job_id))
+                cursor.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,))
+                row = cursor.fetchone()
+                conn.commit()
+                return bool(row and row[0])
+        except Exception as e:
+            logger.error("작업 진행 상황 기록 오류: %s", e)
+            return False
+    
+    def touch_jobs(self, job_ids: List[int]) -> None:
+        """실행 중인 작업들의 heartbeat_at을 갱신합니다."""
+        if not job_ids:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute('''
+                    UPDATE jobs SET heartbeat_at = ?
+                    WHERE status = 'running' AND id IN (SELECT value FROM json_each(?))
+                ''', (datetime.now().isoformat(), json.dumps(job_ids)))
+                conn.commit()
+        except Exception as e:
+            logger.error("작업 heartbeat 기록 오류: %s", e)
+    
+    def finish_job(self, job_id: int, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> bool:
+        """실행이 끝난 작업의 최종 상태(succeeded/failed/cancelled)와 결과를 기록합니다."""
+        try:
+            with self._connect() as conn:
+                conn.execute('''
+                    UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?
+                    WHERE id = ? AND status = 'running'
+                ''', (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                      error, datetime.now().isoformat(), job_id))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error("작업 완료 기록 오류: %s", e)
             return False
     
+    def request_job_cancel(self, job_id: int) -> Optional[str]:
+        """대기 중인 작업은 바로 취소하고, 실행 중인 작업에는 취소를 요청합니다.
+        
+        Returns: 요청 후 작업 상태 (작업이 없거나 오류면 None)
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ?
+                    WHERE id = ? AND status = 'queued'
+                ''', (datetime.now().isoformat(), job_id))
+                cursor.execute('''
+                    UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'
+                ''', (job_id,))
+                cursor.execute('SELECT status FROM jobs WHERE id = ?', (job_id,))
+                row = cursor.fetchone()
+                conn.commit()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error("작업 취소 요청 오류: %s", e)
+            return None
+    
+    def fail_stale_jobs(self, heartbeat_before: str) -> int:
+        """heartbeat가 기준 시각보다 오래된 실행 중 작업을 실패로 표시합니다 (작업자 프로세스가 죽은 경우)."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE jobs SET status = 'failed', error = '작업자가 응답하지 않아 중단된 것으로 처리했습니다',
+                                    finished_at = ?
+                    WHERE status = 'running' AND heartbeat_at < ?
+                ''', (datetime.now().isoformat(), heartbeat_before))
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("중단된 작업 정리 오류: %s", e)
+            return 0
+    
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+                columns = [column[0] for column in cursor.description]
+                row = cursor.fetchone()
+                return self._job_row(dict(zip(columns, row))) if row else None
+        except Exception as e:
+            logger.error("작업 조회 오류: %s", e)
+            return None
+    
+    def get_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[Dict]:
+        """최근 작업 목록 (최신순)."""
+        try:
+            with self._connect() as conn:
+                if status:
+                    cursor = conn.execute('SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?', (status, limit))
+                else:
+                    cursor = conn.execute('SELECT * FROM jobs ORDER BY id DESC LIMIT ?', (limit,))
+                columns = [column[0] for column in cursor.description]
+                return [self._job_row(dict(zip(columns, row))) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error("작업 목록 조회 오류: %s", e)
+            return []
+    
+    def search(self, match: str, sources: List[str], limit: int = 20, offset: int = 0) -> Dict:
+        """FTS5 MATCH 식으로 검색하여 bm25 순위(낮을수록 관련도 높음)로 정렬된 결과와 전체 개수를 반환합니다.
+        
+        sources: 'rationale', 'feature', 'answer' 중 검색할 대상
+        스니펫의 일치 구간은 \x02 ... \x03으로 표시됩니다.
+        """
+        dataset_sources = [source for source in sources if source in ('rationale', 'feature')]
+        parts = []
+        counts = []
+        params: List = []
+        count_params: List = []
+        if dataset_sources:
+            placeholders = ', '.join('?' * len(dataset_sources))
+            # 제목(특징 라벨)에 일치하면 본문보다 5배 가중
+            # UNION ALL 결과는 한쪽만 있어도 ORDER BY score가 되도록 모든 부분에서 같은 별칭을 씀
+            parts.append(f'''
+                SELECT source, image_name, category_id, diagnosis_id, feature_id, title,
+                       snippet(dataset_search, -1, char(2), char(3), '…', 16) AS snippet,
+                       bm25(dataset_search, 5.0, 1.0) AS score
+                FROM dataset_search
+                WHERE dataset_search MATCH ? AND source IN ({placeholders})
+            ''')
+            counts.append(f'SELECT COUNT(*) FROM dataset_search WHERE dataset_search MATCH ? AND source IN ({placeholders})')
+            params += [match] + dataset_sources
+            count_params += [match] + dataset_sources
+        if 'answer' in sources:
+            parts.append('''
+                SELECT 'answer' AS source, fa.image_name AS image_name, '' AS category_id, '' AS diagnosis_id,
+                       fa.feature_id AS feature_id, fa.answer AS title,
+                       snippet(answer_search, -1, char(2), char(3), '…', 16) AS snippet,
+                       bm25(answer_search) AS score
+                FROM answer_search
+                JOIN feature_answers fa ON fa.id = answer_search.rowid
+                WHERE answer_search MATCH ?
+            ''')
+            counts.append('SELECT COUNT(*) FROM answer_search WHERE answer_search MATCH ?')
+            params.append(match)
+            count_params.append(match)
+        if not parts:
+            return {'total': 0, 'results': []}
+        
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT ' + ' + '.join(f'({count})' for count in counts), count_params)
+                total = cursor.fetchone()[0]
+                cursor.execute(' UNION ALL '.join(parts) + ' ORDER BY score LIMIT ? OFFSET ?',
+                               params + [limit, offset])
+                results = [
+                    {
+                        'source': source,
+                        'image_name': image_name,
+                        'category_id': category_id,
+                        'diagnosis_id': diagnosis_id,
+                        'feature_id': feature_id,
+                        'title': title or '',
+                        'snippet': snippet or '',
+                        'score': round(score, 4)
+                    }
+                    for source, image_name, category_id, diagnosis_id, feature_id, title, snippet, score
+                    in cursor.fetchall()
+                ]
+                return {'total': total, 'results': results}
+        except sqlite3.OperationalError as e:
+            # 잘못된 MATCH 식 (SearchService가 정리하지만 방어적으로 처리)
+            logger.warning("검색 쿼리 오류: %s", e)
+            return {'total': 0, 'results': [], 'error': str(e)}
+        except Exception as e:
+            logger.error("검색 오류: %s", e)
+            return {'total': 0, 'results': [], 'error': str(e)}
+    
+    def get_answer_columns(self) -> Dict:
+        """분석용: 모든 답변을 열 단위 튜플 {'version', 'image_name', 'feature_id', 'answer'}로 한 번에 가져옵니다.
+        
+        행 단위 dict를 만들지 않고 세 열만 읽으며, 버전과 행을 같은 읽기 트랜잭션에서 읽으므로
+        반환된 'version' 이후의 변경은 get_feature_answer_changes()로 이어 받을 수 있습니다.
+        """
+        with closing(self._open_dedicated()) as conn:
+            return self.read_answer_columns(conn)
+    
+    @staticmethod
+    def read_answer_columns(conn: sqlite3.Connection) -> Dict:
+        """다른 판독자의 DB 연결(isolation_level=None)에도 같은 쿼리를 쓰기 위한 정적 메서드."""
+        try:
+            conn.execute('BEGIN')
+            try:
+                row = conn.execute('SELECT version FROM change_counter WHERE id = 1').fetchone()
+                rows = conn.execute('SELECT image_name, feature_id, answer FROM feature_answers').fetchall()
+            finally:
+                conn.execute('ROLLBACK')
+            image_names, feature_ids, answers = zip(*rows) if rows else ((), (), ())
+            return {'version': row[0] if row else 0,
+                    'image_name': image_names, 'feature_id': feature_ids, 'answer': answers}
+        except Exception as e:
+            logger.error("분석용 답변 조회 오류: %s", e)
+            return {'version': None, 'image_name': (), 'feature_id': (), 'answer': ()}
+    
     def get_all_answers(self) -> List[Dict]:
         """모든 답변 데이터를 가져옵니다 (관리자용)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -157,15 +1058,47 @@ class DatabaseService:
                 return results
                 
         except Exception as e:
-            print(f"전체 답변 로드 오류: {e}")
+            logger.error("전체 답변 로드 오류: %s", e)
             return []
     
+    def iter_feature_answers(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """모든 답변을 (image_name, feature_id) 순서로 하나씩 반환합니다 (내보내기용).
+        
+        get_all_answers()와 달리 목록을 만들지 않고 batch_size개씩 fetchmany하므로 메모리 사용량이 DB 크기와 무관합니다.
+        정렬은 UNIQUE(image_name, feature_id) 인덱스 순서라 별도 정렬 없이 읽습니다.
+        전용 연결에서 읽기 트랜잭션 하나로 읽으므로 내보내는 도중 저장된 답변이 섞이지 않는 스냅샷이 됩니다 (WAL이라 쓰기는 막지 않음).
+        """
+        with closing(self._open_dedicated()) as conn:
+            conn.execute('BEGIN')
+            try:
+                cursor = conn.execute('''
+                    SELECT image_name, feature_id, answer, reason, explanation, timestamp, version
+                    FROM feature_answers
+                    ORDER BY image_name, feature_id
+                ''')
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for image_name, feature_id, answer, reason, explanation, timestamp, version in rows:
+                        yield {
+                            'image_name': image_name,
+                            'feature_id': feature_id,
+                            'answer': answer,
+                            'reason': reason or '',
+                            'explanation': explanation or '',
+                            'timestamp': timestamp,
+                            'version': version or 0
+                        }
+            finally:
+                conn.execute('ROLLBACK')
+    
     def log_answer_activity(self, image_name: str, action: str, feature_id: str = None, 
                            answer: str = None, is_checked: bool = None, element_type: str = None,
                            form_id: str = None, form_action: str = None) -> bool:
         """답변 활동을 로그로 기록합니다."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # action이 'answer_delete'인 경우 특별 처리
@@ -185,16 +1118,17 @@ class DatabaseService:
                          form_id, form_action, datetime.now().isoformat()))
                 
                 conn.commit()
+                events.publish('activity', image_name=image_name, log_id=cursor.lastrowid)
                 return True
                 
         except Exception as e:
-            print(f"답변 활동 로그 기록 오류: {e}")
+            logger.error("답변 활동 로그 기록 오류: %s", e)
             return False
     
     def get_answer_activity_logs(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """답변 활동 로그를 가져옵니다 (관리자용)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -223,24 +1157,174 @@ class DatabaseService:
                 return logs
                 
         except Exception as e:
-            print(f"답변 활동 로그 로드 오류: {e}")
+            logger.error("답변 활동 로그 로드 오류: %s", e)
             return []
     
     def get_answer_logs_count(self) -> int:
         """전체 답변 활동 로그 개수를 반환합니다."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT COUNT(*) FROM answer_activity_logs')
                 return cursor.fetchone()[0]
         except Exception as e:
-            print(f"답변 활동 로그 개수 조회 오류: {e}")
+            logger.error("답변 활동 로그 개수 조회 오류: %s", e)
             return 0
     
+    def get_activity_logs_since(self, after_id: int, limit: int = 200) -> List[Dict]:
+        """after_id보다 큰 ID의 활동 로그를 오래된 순으로 가져옵니다 (실시간 스트림용)."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, image_name, action, feature_id, answer, is_checked, element_type, timestamp
+                    FROM answer_activity_logs
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (after_id, limit))
+                
+                return [
+                    {
+                        'id': log_id,
+                        'image_name': image_name,
+                        'action': action,
+                        'feature_id': feature_id,
+                        'answer': answer,
+                        'is_checked': bool(is_checked) if is_checked is not None else None,
+                        'element_type': element_type,
+                        'timestamp': timestamp
+                    }
+                    for log_id, image_name, action, feature_id, answer, is_checked, element_type, timestamp
+                    in cursor.fetchall()
+                ]
+        except Exception as e:
+            logger.error("활동 로그 변경분 조회 오류: %s", e)
+            return []
+    
+    def get_activity_logs_before(self, cutoff: str, limit: int = 5000) -> List[Dict]:
+        """timestamp가 cutoff보다 이른 활동 로그를 오래된 순으로 최대 limit개 가져옵니다 (보관 작업용)."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, image_name, action, feature_id, answer, is_checked,
+                           element_type, form_id, form_action, timestamp
+                    FROM answer_activity_logs
+                    WHERE timestamp < ?
+                    ORDER BY timestamp, id
+                    LIMIT ?
+                ''', (cutoff, limit))
+                
+                return [
+                    {
+                        'id': row[0],
+                        'image_name': row[1],
+                        'action': row[2],
+                        'feature_id': row[3],
+                        'answer': row[4],
+                        'is_checked': bool(row[5]) if row[5] is not None else None,
+                        'element_type': row[6],
+                        'form_id': row[7],
+                        'form_action': row[8],
+                        'timestamp': row[9]
+                    }
+                    for row in cursor.fetchall()
+                ]
+        except Exception as e:
+            logger.error("보관 대상 활동 로그 조회 오류: %s", e)
+            return []
+    
+    def delete_activity_logs(self, log_ids: List[int]) -> int:
+        """주어진 ID의 활동 로그를 한 트랜잭션에서 삭제하고 삭제된 행 수를 반환합니다."""
+        if not log_ids:
+            return 0
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    DELETE FROM answer_activity_logs
+                    WHERE id IN (SELECT value FROM json_each(?))
+                ''', (json.dumps(log_ids),))
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("활동 로그 삭제 오류: %s", e)
+            return 0
+    
+    def incremental_vacuum(self, max_pages: int = 0) -> Dict:
+        """빈 페이지를 파일 시스템에 반환합니다 (max_pages=0이면 전부).
+        
+        auto_vacuum=INCREMENTAL인 DB에서만 동작하며, 전체 VACUUM과 달리 DB를 다시 쓰지 않으므로 짧게 끝납니다.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                mode = cursor.execute('PRAGMA auto_vacuum').fetchone()[0]
+                before = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+                if mode != 2:
+                    return {'mode': mode, 'freelist_pages': before, 'freed_pages': 0}
+                # execute()는 한 단계만 실행해 한 페이지만 반환하므로 끝까지 실행되는 executescript() 사용
+                conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)})')
+                after = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+                return {'mode': mode, 'freelist_pages': after, 'freed_pages': before - after}
+        except Exception as e:
+            logger.error("incremental vacuum 오류: %s", e)
+            return {}
+    
+    def enable_incremental_vacuum(self) -> bool:
+        """기존 DB를 auto_vacuum=INCREMENTAL로 바꿉니다 (한 번만 필요).
+        
+        전체 VACUUM으로 DB를 다시 쓰는 동안 쓰기가 막히므로 작업이 없는 시간에 실행해야 합니다.
+        """
+        try:
+            with closing(self._open_dedicated()) as conn:
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                conn.execute('VACUUM')
+                return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+        except Exception as e:
+            logger.error("auto_vacuum 변경 오류: %s", e)
+            return False
+    
+    def get_change_marker(self) -> tuple:
+        """(답변 변경 버전, 마지막 활동 로그 ID). 두 값 모두 인덱스 한 번으로 읽습니다."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT (SELECT version FROM change_counter WHERE id = 1),
+                           (SELECT MAX(id) FROM answer_activity_logs)
+                ''')
+                version, last_log_id = cursor.fetchone()
+                return (version or 0, last_log_id or 0)
+        except Exception as e:
+            logger.error("변경 표식 조회 오류: %s", e)
+            return (0, 0)
+    
+    def get_progress_counts(self) -> Dict:
+        """대시보드 진행 현황: 전체 답변 수, 답변이 있는 이미지 수, 활동 로그 수."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT (SELECT COUNT(*) FROM feature_answers),
+                           (SELECT COUNT(DISTINCT image_name) FROM feature_answers),
+                           (SELECT COUNT(*) FROM answer_activity_logs)
+                ''')
+                total_answers, answered_images, total_logs = cursor.fetchone()
+                return {
+                    'total_answers': total_answers,
+                    'answered_images': answered_images,
+                    'total_logs': total_logs
+                }
+        except Exception as e:
+            logger.error("진행 현황 조회 오류: %s", e)
+            return {}
+    
     def get_image_answer_summary(self) -> List[Dict]:
         """이미지별 최종 답변 요약을 가져옵니다 (관리자용)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # 이미지별로 최종 답변을 그룹화하여 가져오기
@@ -300,7 +1384,7 @@ class DatabaseService:
                 return result
                 
         except Exception as e:
-            print(f"이미지별 답변 요약 로드 오류: {e}")
+            logger.error("이미지별 답변 요약 로드 오류: %s", e)
             return []
     
     def get_image_answer_summary_by_diagnosis(self, diagnosis_name: str = None) -> List[Dict]:
@@ -321,5 +1405,5 @@ class DatabaseService:
             return filtered_summaries
                 
         except Exception as e:
-            print(f"진단별 답변 요약 로드 오류: {e}")
+            logger.error("진단별 답변 요약 로드 오류: %s", e)
             return []
@@ -0,0 +1,419 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from service.download_images import category_folder_name, resolve_local_image_path
+from service.image_service import VALID_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+ORPHAN_POLICIES = ('quarantine', 'delete', 'keep')
+STATE_VERSION = 1
+
+
+def file_checksum(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일의 sha256 체크섬을 계산합니다."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(file_path: str, data) -> None:
+    """임시 파일에 쓴 뒤 교체하여 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class DatasetSyncService:
+    """매니페스트와 로컬 상태 파일을 비교하여 downloaded_images를 증분 동기화합니다.
+
+    상태 파일에는 `카테고리/파일명` 키별로 원본 경로, 체크섬, 카테고리 폴더가 기록됩니다.
+    변경이 없는 항목은 원본에 접근하지 않으므로, 큰 트리에 몇십 장을 추가하는 경우에도
+    새 항목만 내려받고 카탈로그는 차이만 반영합니다.
+    """
+
+    def __init__(self, images_folder: str = 'downloaded_images',
+                 state_path: str = 'dataset_sync_state.json',
+                 catalog_path: str = 'image_catalog.json',
+                 quarantine_folder: str = 'quarantined_images',
+                 checkpoint_every: int = 100):
+        self.images_folder = images_folder
+        self.state_path = state_path
+        self.catalog_path = catalog_path
+        self.quarantine_folder = quarantine_folder
+        self.checkpoint_every = checkpoint_every
+
+    # -----------------------------
+    # 상태 / 카탈로그 입출력
+    # -----------------------------
+    def load_state(self) -> Dict:
+        """동기화 상태 파일을 읽습니다. 없으면 빈 상태를 반환합니다."""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {'version': STATE_VERSION, 'entries': {}}
+
+    def save_state(self, state: Dict) -> None:
+        state['updated_at'] = datetime.now().isoformat()
+        write_json_atomic(self.state_path, state)
+
+    def load_catalog(self) -> Optional[Dict]:
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def scan_catalog(self) -> Dict:
+        """이미지 폴더 전체를 한 번 훑어 카탈로그를 새로 만듭니다."""
+        categories = {}
+        if os.path.isdir(self.images_folder):
+            for category_entry in os.scandir(self.images_folder):
+                if not category_entry.is_dir():
+                    continue
+                filenames = [
+                    entry.name for entry in os.scandir(category_entry.path)
+                    if entry.is_file() and Path(entry.name).suffix.lower() in VALID_EXTENSIONS
+                ]
+                categories[category_entry.name] = sorted(filenames)
+        return {'version': 0, 'categories': categories}
+
+    def rebuild_catalog(self) -> Dict:
+        """전체 스캔으로 카탈로그를 다시 생성하고 저장합니다."""
+        previous = self.load_catalog() or {}
+        catalog = self.scan_catalog()
+        catalog['version'] = previous.get('version', 0) + 1
+        catalog['generated_at'] = datetime.now().isoformat()
+        write_json_atomic(self.catalog_path, catalog)
+        return catalog
+
+    def _apply_catalog_changes(self, added: List[str], removed: List[str]) -> Dict:
+        """추가/삭제된 키만 기존 카탈로그에 반영합니다."""
+        catalog = self.load_catalog()
+        if catalog is None:
+            # 카탈로그가 처음 만들어지는 경우에만 전체 스캔
+            catalog = self.scan_catalog()
+            added = []
+            removed = []
+
+        categories = {name: set(files) for name, files in catalog.get('categories', {}).items()}
+        for key in added:
+            category, filename = key.split('/', 1)
+            categories.setdefault(category, set()).add(filename)
+        for key in removed:
+            category, filename = key.split('/', 1)
+            if category in categories:
+                categories[category].discard(filename)
+
+        catalog['categories'] = {name: sorted(files) for name, files in categories.items() if files}
+        catalog['version'] = catalog.get('version', 0) + 1
+        catalog['generated_at'] = datetime.now().isoformat()
+        write_json_atomic(self.catalog_path, catalog)
+        return catalog
+
+    def _checkpoint(self, state: Dict, added: List[str], removed: List[str]) -> None:
+        """지금까지의 카탈로그 차이를 반영한 뒤 상태 파일을 저장합니다 (반영한 목록은 비움).
+
+        카탈로그를 먼저 쓰므로 어느 시점에 중단되어도 상태 파일에 기록된 항목은 카탈로그에도 있습니다.
+        카탈로그에만 반영되고 상태에 없는 항목은 다음 동기화에서 adopted로 다시 기록됩니다.
+        """
+        if added or removed:
+            self._apply_catalog_changes(added, removed)
+            added.clear()
+            removed.clear()
+        self.save_state(state)
+
+    def _missing_from_catalog(self, keys: List[str]) -> List[str]:
+        """상태에는 있지만 카탈로그에 없는 키 (이전 버전에서 중단된 동기화가 남긴 항목)."""
+        catalog = self.load_catalog()
+        if catalog is None:
+            return []
+        listed = {f'{category}/{filename}'
+                  for category, filenames in catalog.get('categories', {}).items() for filename in filenames}
+        return [key for key in keys if key not in listed]
+
+    # -----------------------------
+    # 매니페스트 비교
+    # -----------------------------
+    def load_manifest_entries(self, manifest_paths: List[str]) -> Dict[str, Dict]:
+        """매니페스트들을 `카테고리/파일명` 키의 목표 상태로 변환합니다 (뒤의 매니페스트 우선).
+
+        폴더 스캔과 같이 VALID_EXTENSIONS가 아닌 파일은 제외합니다.
+        """
+        desired = {}
+        for manifest_path in manifest_paths:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+
+            for item in items:
+                source = item.get('hf_image') or item.get('image', '')
+                if not source:
+                    continue
+                category = category_folder_name(item.get('sampled_diagnosis', 'Unknown'))
+                filename = os.path.basename(source)
+                if not filename or Path(filename).suffix.lower() not in VALID_EXTENSIONS:
+                    continue
+                desired[f'{category}/{filename}'] = {
+                    'source': source,
+                    'category': category,
+                    'filename': filename,
+                    'manifest': os.path.basename(manifest_path),
+                }
+        return desired
+
+    def plan(self, manifest_paths: List[str], verify: bool = False,
+             keep_manifests: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """매니페스트와 상태 파일의 차이를 계산합니다."""
+        state = self.load_state()
+        return self._diff(self.load_manifest_entries(manifest_paths), state['entries'], verify,
+                          self._protected_keys(keep_manifests))
+
+    def _protected_keys(self, keep_manifests: Optional[List[str]]) -> Set[str]:
+        """이번에 동기화하지 않아도 정리하면 안 되는 (설정된 다른 매니페스트의) 이미지 키."""
+        existing = [path for path in keep_manifests or [] if os.path.isfile(path)]
+        return set(self.load_manifest_entries(existing))
+
+    def _diff(self, desired: Dict[str, Dict], entries: Dict[str, Dict], verify: bool,
+              protected: Set[str] = frozenset()) -> Dict[str, List[str]]:
+        plan = {'added': [], 'changed': [], 'adopted': [], 'unchanged': [], 'orphaned': []}
+
+        for key, target in desired.items():
+            local_path = os.path.join(self.images_folder, key)
+            entry = entries.get(key)
+
+            if entry is None:
+                # 예전 download_images.py로 이미 받아둔 파일은 다시 받지 않고 상태에만 등록
+                plan['adopted' if os.path.isfile(local_path) else 'added'].append(key)
+                continue
+
+            if entry.get('source') != target['source']:
+                plan['changed'].append(key)
+                continue
+
+            try:
+                stat = os.stat(local_path)
+            except FileNotFoundError:
+                plan['changed'].append(key)
+                continue
+
+            if verify and (stat.st_size != entry.get('size') or stat.st_mtime != entry.get('mtime')):
+                if stat.st_size != entry.get('size') or file_checksum(local_path) != entry.get('checksum'):
+                    plan['changed'].append(key)
+                    continue
+
+            plan['unchanged'].append(key)
+
+        plan['orphaned'] = [key for key in entries if key not in desired and key not in protected]
+        return plan
+
+    # -----------------------------
+    # 동기화 실행
+    # -----------------------------
+    def _fetch(self, source: str, output_path: str) -> str:
+        """원본을 임시 파일로 받아 체크섬을 계산한 뒤 제자리로 옮깁니다."""
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), prefix='.part-')
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                if source.startswith(('http://', 'https://')):
+                    import requests
+
+                    response = requests.get(source, stream=True, timeout=60)
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=8192):
+                        digest.update(chunk)
+                        out.write(chunk)
+                else:
+                    local_source = resolve_local_image_path(source)
+                    with open(local_source, 'rb') as src:
+                        for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                            digest.update(chunk)
+                            out.write(chunk)
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest.hexdigest()
+
+    def _record(self, entries: Dict[str, Dict], key: str, target: Dict, checksum: str) -> None:
+        stat = os.stat(os.path.join(self.images_folder, key))
+        entries[key] = {
+            'source': target['source'],
+            'checksum': checksum,
+            'category': target['category'],
+            'manifest': target['manifest'],
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+        }
+
+    def _remove_orphan(self, key: str, policy: str, quarantine_dir: str) -> None:
+        local_path = os.path.join(self.images_folder, key)
+        if not os.path.exists(local_path):
+            return
+        if policy == 'delete':
+            os.remove(local_path)
+        elif policy == 'quarantine':
+            destination = os.path.join(quarantine_dir, key)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(local_path, destination)
+
+    def sync(self, manifest_paths: List[str], orphan_policy: str = 'quarantine',
+             verify: bool = False, dry_run: bool = False,
+             progress: Optional[Callable[[int, int], None]] = None,
+             keep_manifests: Optional[List[str]] = None) -> Dict:
+        """매니페스트를 기준으로 이미지 트리, 상태 파일, 카탈로그를 한 번에 갱신합니다.
+
+        Args:
+            manifest_paths: 동기화할 매니페스트 목록 (합집합이 목표 상태)
+            orphan_policy: 매니페스트에 없는 파일 처리 방식 ('quarantine', 'delete', 'keep')
+            verify: 변경 없는 항목도 크기/수정시각을 확인하고 필요하면 체크섬을 재계산
+            dry_run: 계획만 계산하고 파일은 건드리지 않음
+            progress: 내려받을 항목을 하나 처리할 때마다 (처리한 수, 전체 수)로 호출 (예외를 던지면 중단)
+            keep_manifests: 이번에 동기화하지 않는 매니페스트 (보통 DIAGNOSIS_MANIFESTS 전체).
+                여기 있는 이미지는 manifest_paths에 없어도 정리하지 않음
+        """
+        if orphan_policy not in ORPHAN_POLICIES:
+            raise ValueError(f'알 수 없는 orphan_policy: {orphan_policy}')
+
+        state = self.load_state()
+        entries = state['entries']
+        desired = self.load_manifest_entries(manifest_paths)
+        plan = self._diff(desired, entries, verify, self._protected_keys(keep_manifests))
+
+        summary = {name: len(keys) for name, keys in plan.items()}
+        summary['failed'] = []
+        if dry_run:
+            summary['plan'] = plan
+            return summary
+
+        # 변경 없는 항목도 카탈로그에 빠져 있으면 함께 반영
+        added_to_catalog = self._missing_from_catalog(plan['unchanged'])
+        removed_from_catalog = []
+        processed = 0
+
+        for key in plan['adopted']:
+            local_path = os.path.join(self.images_folder, key)
+            self._record(entries, key, desired[key], file_checksum(local_path))
+            added_to_catalog.append(key)
+
+        to_fetch = plan['added'] + plan['changed']
+        try:
+            for key in to_fetch:
+                target = desired[key]
+                try:
+                    checksum = self._fetch(target['source'], os.path.join(self.images_folder, key))
+                    self._record(entries, key, target, checksum)
+                    added_to_catalog.append(key)
+                    logger.info("[%s] %s 동기화 완료", target['category'], target['filename'])
+                except Exception as e:
+                    logger.warning("[%s] %s 동기화 실패 - %s", target['category'], target['filename'], e)
+                    summary['failed'].append(key)
+
+                processed += 1
+                if processed % self.checkpoint_every == 0:
+                    # 중간에 중단되어도 이미 받은 항목은 다시 받지 않고 바로 보이도록 주기적으로 저장
+                    self._checkpoint(state, added_to_catalog, removed_from_catalog)
+                if progress:
+                    progress(processed, len(to_fetch))
+        except BaseException:
+            # 중단(취소 포함)되면 여기까지 받은 항목을 카탈로그와 상태에 기록하고 전파
+            self._checkpoint(state, added_to_catalog, removed_from_catalog)
+            raise
+
+        if orphan_policy != 'keep':
+            quarantine_dir = os.path.join(self.quarantine_folder, datetime.now().strftime('%Y%m%d_%H%M%S'))
+            for key in plan['orphaned']:
+                try:
+                    self._remove_orphan(key, orphan_policy, quarantine_dir)
+                    entries.pop(key, None)
+                    removed_from_catalog.append(key)
+                except Exception as e:
+                    logger.warning("%s 정리 실패 - %s", key, e)
+                    summary['failed'].append(key)
+
+        catalog = self._apply_catalog_changes(added_to_catalog, removed_from_catalog)
+        self.save_state(state)
+        summary['catalog_version'] = catalog['version']
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='매니페스트 기준으로 downloaded_images를 증분 동기화합니다.')
+    parser.add_argument('manifests', nargs='*', help='동기화할 매니페스트 JSON 파일들')
+    parser.add_argument('--images-folder', default='downloaded_images')
+    parser.add_argument('--state', default='dataset_sync_state.json')
+    parser.add_argument('--catalog', default='image_catalog.json')
+    parser.add_argument('--quarantine-folder', default='quarantined_images')
+    parser.add_argument('--orphans', choices=ORPHAN_POLICIES, default='quarantine',
+                        help='매니페스트에 없는 기존 이미지 처리 방식')
+    parser.add_argument('--keep-manifests', nargs='*',
+                        help='동기화하지 않아도 이미지를 정리하지 않을 매니페스트 (기본: DIAGNOSIS_MANIFESTS)')
+    parser.add_argument('--verify', action='store_true', help='변경 없는 항목도 파일 상태를 검증')
+    parser.add_argument('--dry-run', action='store_true', help='계획만 출력')
+    parser.add_argument('--rebuild-catalog', action='store_true', help='전체 스캔으로 카탈로그만 재생성')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    service = DatasetSyncService(
+        images_folder=args.images_folder,
+        state_path=args.state,
+        catalog_path=args.catalog,
+        quarantine_folder=args.quarantine_folder,
+    )
+
+    if args.rebuild_catalog:
+        catalog = service.rebuild_catalog()
+        total = sum(len(files) for files in catalog['categories'].values())
+        print(f"카탈로그 재생성 완료: {len(catalog['categories'])}개 카테고리, {total}개 이미지")
+        return
+
+    if not args.manifests:
+        parser.error('매니페스트 파일을 하나 이상 지정해야 합니다.')
+
+    keep_manifests = args.keep_manifests
+    if keep_manifests is None:
+        # 서버와 같은 환경 변수(DIAGNOSIS_MANIFESTS)의 매니페스트는 일부만 동기화해도 보존
+        from service.container import ServiceContainer, load_config_from_env
+
+        keep_manifests = ServiceContainer(load_config_from_env()).diagnosis.manifest_paths
+
+    summary = service.sync(args.manifests, orphan_policy=args.orphans,
+                           verify=args.verify, dry_run=args.dry_run, keep_manifests=keep_manifests)
+
+    print("\n=== 동기화 결과 ===")
+    for name in ('added', 'changed', 'adopted', 'unchanged', 'orphaned'):
+        print(f"{name}: {summary[name]}개")
+    print(f"실패: {len(summary['failed'])}개")
+    if args.dry_run:
+        for name in ('added', 'changed', 'orphaned'):
+            for key in summary['plan'][name]:
+                print(f"  {name}: {key}")
+    else:
+        print(f"카탈로그 버전: {summary['catalog_version']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,247 @@
+import glob
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
+from service.metrics_service import metrics
 
-class DiagnosisService:
-    def __init__(self, json_file_path: str = "sampled_by_diagnosis.json"):
-        self.json_file_path = json_file_path
-        self.diagnosis_data = self._load_diagnosis_data()
+DEFAULT_MANIFESTS = (
+    "sampled_by_diagnosis.json",
+    "secondary_sampled_by_diagnosis_*.json",
+)
+DEFAULT_FEATURES = (os.path.join(os.path.dirname(__file__), "extracted_features.json"),)
+CONFLICT_POLICIES = ("latest", "first")
+
+
+class JsonSource:
+    """JSON 파일 하나를 지연 로드하고, 파일이 바뀐 경우에만 다시 파싱합니다."""
+
+    def __init__(self, path: str, cache_name: str = "json"):
+        self.path = path
+        self.cache_name = cache_name
+        self.mtime: Optional[float] = None
+        self.items: List[Dict] = []
+        self.loaded = False
 
-    def _load_diagnosis_data(self) -> List[Dict]:
-        """JSON 파일에서 진단 데이터를 로드합니다."""
+    def current_mtime(self) -> Optional[float]:
         try:
-            with open(self.json_file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        return not self.loaded or self.current_mtime() != self.mtime
+
+    def load(self) -> List[Dict]:
+        """변경된 경우에만 파일을 읽어 항목 목록을 반환합니다."""
+        if not self.is_stale():
+            metrics.inc("cache_requests_total", cache=self.cache_name, result="hit")
+            return self.items
+
+        metrics.inc("cache_requests_total", cache=self.cache_name, result="miss")
+        mtime = self.current_mtime()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.items = data if isinstance(data, list) else []
         except FileNotFoundError:
-            # print(f"진단 데이터 파일을 찾을 수 없습니다: {self.json_file_path}")
-            return []
+            self.items = []
         except json.JSONDecodeError:
-            # print(f"JSON 파일 파싱 오류: {self.json_file_path}")
-            return []
+            # 쓰는 도중인 파일이면 이전 내용을 유지하고 다음 확인 때 다시 시도
+            if self.loaded:
+                return self.items
+            self.items = []
+        self.mtime = mtime
+        self.loaded = True
+        return self.items
+
+
+class DiagnosisView:
+    """여러 매니페스트와 특징 파일을 병합한 읽기 전용 인덱스.
+
+    한 번 만들어진 뒤에는 수정하지 않으며, 갱신 시에는 새 뷰를 만들어 참조만 교체합니다.
+    """
+
+    def __init__(self, manifests: Sequence[List[Dict]], features: Sequence[List[Dict]], conflict_policy: str):
+        # "latest"는 목록 뒤쪽 매니페스트(최신 샘플링 라운드)가 같은 id/파일명을 덮어씀
+        ordered = list(manifests) if conflict_policy == "latest" else list(reversed(manifests))
+
+        by_id: Dict = {}
+        by_filename: Dict[str, Dict] = {}
+        by_category_filename: Dict[Tuple[str, str], Dict] = {}
+        for items in ordered:
+            # 한 매니페스트 안에서는 파일명이 같으면 먼저 나온 항목 우선 (기존 선형 검색과 같은 결과)
+            manifest_by_filename: Dict[str, Dict] = {}
+            manifest_by_category_filename: Dict[Tuple[str, str], Dict] = {}
+            for item in items:
+                if "id" in item:
+                    by_id[item["id"]] = item
+                filename = os.path.basename(item.get("image", ""))
+                if not filename:
+                    continue
+                manifest_by_filename.setdefault(filename, item)
+                category = item.get("sampled_diagnosis") or item.get("revised_answer_final")
+                if category:
+                    manifest_by_category_filename.setdefault((category.replace(" ", "_"), filename), item)
+            by_filename.update(manifest_by_filename)
+            by_category_filename.update(manifest_by_category_filename)
+
+        features_by_id: Dict = {}
+        ordered_features = list(features) if conflict_policy == "latest" else list(reversed(features))
+        for items in ordered_features:
+            for item in items:
+                if "id" in item:
+                    features_by_id[item["id"]] = item
+
+        self.by_id = by_id
+        self.by_filename = by_filename
+        self.by_category_filename = by_category_filename
+        self.features_by_id = features_by_id
+        # 카테고리 ID → (이미지 파일명 튜플, 진단 ID 튜플). 뷰가 교체되면 함께 버려짐
+        self.category_ids: Dict[str, Tuple[tuple, tuple]] = {}
+        self.items = list(by_id.values())
+        self.diagnoses = sorted(
+            {item["revised_answer_final"] for item in self.items if "revised_answer_final" in item}
+        )
+
+
+class DiagnosisService:
+    """진단 매니페스트와 extracted_features 파일들을 병합하여 조회합니다.
+
+    - 매니페스트/특징 파일은 여러 개를 지정할 수 있고 glob 패턴도 허용합니다.
+    - 같은 id 또는 파일명이 여러 매니페스트에 있으면 conflict_policy에 따라 하나만 남깁니다.
+      ("latest": 목록의 뒤쪽 파일 우선, "first": 앞쪽 파일 우선)
+    - 파일은 처음 조회할 때 로드하며, 이후에는 reload_changed()가 수정된 파일만 다시 파싱합니다.
+      재구성은 DatasetReloader의 백그라운드 스레드에서 실행되고 조회는 기존 뷰를 그대로 사용합니다.
+    """
+
+    def __init__(
+        self,
+        json_file_path: Union[str, Sequence[str]] = DEFAULT_MANIFESTS,
+        features_file_path: Union[str, Sequence[str]] = DEFAULT_FEATURES,
+        conflict_policy: str = "latest",
+    ):
+        if conflict_policy not in CONFLICT_POLICIES:
+            raise ValueError(f"알 수 없는 conflict_policy: {conflict_policy}")
+
+        self.manifest_patterns = [json_file_path] if isinstance(json_file_path, str) else list(json_file_path)
+        self.features_patterns = (
+            [features_file_path] if isinstance(features_file_path, str) else list(features_file_path)
+        )
+        self.conflict_policy = conflict_policy
+
+        self._manifest_sources: Dict[str, JsonSource] = {}
+        self._features_sources: Dict[str, JsonSource] = {}
+        self._view: Optional[DiagnosisView] = None
+        self._reload_lock = threading.Lock()
+
+    # -----------------------------
+    # 로드 / 리로드
+    # -----------------------------
+    def _expand(self, patterns: List[str]) -> List[str]:
+        """glob 패턴을 펼쳐 파일 목록을 만듭니다 (패턴 내에서는 이름순)."""
+        paths = []
+        for pattern in patterns:
+            if glob.has_magic(pattern):
+                paths.extend(sorted(glob.glob(pattern)))
+            else:
+                paths.append(pattern)
+        return list(dict.fromkeys(paths))
 
+    def _sync_sources(
+        self, patterns: List[str], sources: Dict[str, JsonSource], cache_name: str
+    ) -> Dict[str, JsonSource]:
+        """현재 파일 목록에 맞춰 소스 딕셔너리를 새로 만듭니다 (기존 소스는 재사용)."""
+        return {path: sources.get(path) or JsonSource(path, cache_name) for path in self._expand(patterns)}
+
+    @property
+    def manifest_paths(self) -> List[str]:
+        return self._expand(self.manifest_patterns)
+
+    @property
+    def features_paths(self) -> List[str]:
+        return self._expand(self.features_patterns)
+
+    def fingerprint(self) -> str:
+        """매니페스트/특징 파일의 경로, 크기, 수정 시각과 conflict_policy로 만든 지문 (파일 내용은 읽지 않음).
+
+        데이터셋에서 파생된 DB 인덱스(검색, 특징 어휘)가 마지막으로 반영한 데이터셋과 같은지 비교하는 데 씁니다.
+        """
+        entries = []
+        for path in self.manifest_paths + self.features_paths:
+            try:
+                stat = os.stat(path)
+                entries.append([path, stat.st_size, stat.st_mtime_ns])
+            except OSError:
+                entries.append([path, None, None])
+        entries.append(self.conflict_policy)
+        return hashlib.sha1(json.dumps(entries).encode("utf-8")).hexdigest()
+
+    def has_changes(self) -> bool:
+        """다시 읽어야 할 파일이 있는지 stat만으로 확인합니다."""
+        if self._view is None:
+            return True
+        if self.manifest_paths != list(self._manifest_sources):
+            return True
+        if self.features_paths != list(self._features_sources):
+            return True
+        sources = list(self._manifest_sources.values()) + list(self._features_sources.values())
+        return any(source.is_stale() for source in sources)
+
+    def reload_changed(self, force: bool = False) -> bool:
+        """바뀐 매니페스트/특징 파일만 다시 파싱하고 병합 뷰를 교체합니다.
+
+        Returns:
+            bool: 뷰가 새로 만들어졌으면 True
+        """
+        with self._reload_lock:
+            manifest_sources = self._sync_sources(self.manifest_patterns, self._manifest_sources, "manifest")
+            features_sources = self._sync_sources(self.features_patterns, self._features_sources, "features")
+            manifests = list(manifest_sources.values())
+            features = list(features_sources.values())
+
+            changed = (
+                force
+                or self._view is None
+                or list(manifest_sources) != list(self._manifest_sources)
+                or list(features_sources) != list(self._features_sources)
+                or any(source.is_stale() for source in manifests + features)
+            )
+            if not changed:
+                return False
+
+            if force:
+                for source in manifests + features:
+                    source.mtime = None
+
+            view = DiagnosisView(
+                [source.load() for source in manifests],
+                [source.load() for source in features],
+                self.conflict_policy,
+            )
+            self._manifest_sources = manifest_sources
+            self._features_sources = features_sources
+            # 참조 교체 한 번으로 반영되므로 읽는 쪽은 항상 완성된 뷰만 봄
+            self._view = view
+            return True
+
+    def _get_view(self) -> DiagnosisView:
+        view = self._view
+        if view is None:
+            # 최초 1회만 요청 스레드에서 로드 (이후 갱신은 백그라운드에서)
+            self.reload_changed()
+            view = self._view
+        return view
+
+    @property
+    def diagnosis_data(self) -> List[Dict]:
+        return self._get_view().items
+
+    # -----------------------------
+    # 조회
+    # -----------------------------
     def _normalize_diagnosis_name(self, diagnosis_name: str) -> str:
         """진단명을 폴더명 형식으로 정규화합니다."""
         # "Choroidal Neovascularization (CNV)" -> "Choroidal_Neovascularization_(CNV)"
@@ -31,85 +253,63 @@ class DiagnosisService:
 
     def get_diagnosis_by_image(self, category_id: str, filename: str) -> Optional[Dict]:
         """이미지 파일명과 카테고리 ID로 진단 정보를 찾습니다."""
-        # print(f"🔍 진단 정보 검색: 카테고리={category_id}, 파일명={filename}")
-
-        # 먼저 파일명으로만 찾기 (더 정확함)
-        for item in self.diagnosis_data:
-            if self._extract_filename_from_path(item.get("image", "")) == filename:
-                # print(f"✅ 파일명으로 찾음: {filename}")
-                return item
-
-        # print(f"❌ 파일명으로 찾을 수 없음: {filename}")
-
-        # 파일명으로 못 찾으면 카테고리와 함께 찾기
-        # 카테고리 ID 정규화 (폴더명 -> 진단명)
-        normalized_category = (
-            category_id.replace("_", " ").replace("(", "").replace(")", "")
-        )
-        # print(f"🔍 정규화된 카테고리: '{normalized_category}'")
-
-        for item in self.diagnosis_data:
-            if (
-                item.get("revised_answer_final") == normalized_category
-                and self._extract_filename_from_path(item.get("image", "")) == filename
-            ):
-                # print(f"✅ 카테고리와 파일명으로 찾음")
-                return item
+        view = self._get_view()
 
-        # print(f"❌ 진단 정보를 찾을 수 없음")
-        return None
+        # 같은 파일명이 여러 카테고리에 샘플링된 경우가 있으므로 카테고리+파일명을 먼저 확인
+        item = view.by_category_filename.get((category_id, filename)) or view.by_filename.get(filename)
+        metrics.inc("cache_requests_total", cache="diagnosis_index", result="hit" if item else "miss")
+        return item
 
-    def get_diagnosis_by_filename(self, filename: str) -> Optional[Dict]:
-        """파일명으로만 진단 정보를 찾습니다."""
-        for item in self.diagnosis_data:
-            json_filename = self._extract_filename_from_path(item.get("image", ""))
+    def get_diagnosis_by_filename(self, filename: str, categories: Sequence[str] = ()) -> Optional[Dict]:
+        """파일명으로 진단 정보를 찾습니다.
 
-            if json_filename == filename:
-                return item
+        categories(이미지가 들어 있는 카테고리 ID들, ImageService.find_categories)를 주면 그 카테고리의
+        항목을 먼저 찾습니다. 같은 파일명이 여러 카테고리에 샘플링된 경우 파일명만으로는 먼저 나온 항목을 반환합니다.
+        """
+        view = self._get_view()
+        item = next(
+            (view.by_category_filename[key] for key in ((category, filename) for category in categories)
+             if key in view.by_category_filename),
+            None,
+        ) or view.by_filename.get(filename)
+        metrics.inc("cache_requests_total", cache="diagnosis_index", result="hit" if item else "miss")
+        return item
 
-        return None
+    def get_diagnosis_by_id(self, diagnosis_id) -> Optional[Dict]:
+        """진단 ID로 진단 정보를 찾습니다."""
+        return self._get_view().by_id.get(diagnosis_id)
 
     def get_extracted_features_by_diagnosis_id(
         self, diagnosis_id: int
     ) -> Optional[Dict]:
         """진단 ID로 extracted_features.json에서 특징 데이터를 가져옵니다."""
-        try:
-            # 현재 작업 디렉토리 기준으로 상대 경로 설정
-            features_file_path = os.path.join(
-                os.path.dirname(__file__), "extracted_features.json"
-            )
-            # print(f"특징 데이터 파일 경로: {features_file_path}")
-
-            with open(features_file_path, "r", encoding="utf-8") as f:
-                features_data = json.load(f)
-                # print(f"특징 데이터 파일 로드 성공: {len(features_data)}개 항목")
+        return self._get_view().features_by_id.get(diagnosis_id)
 
-                for item in features_data:
-                    if item.get("id") == diagnosis_id:
-                        # print(f"ID {diagnosis_id}에 대한 특징 데이터 찾음")
-                        return item
+    def get_diagnosis_ids(self, category_id: str, filenames: tuple) -> tuple:
+        """카테고리 이미지들의 진단 ID(없으면 None)를 filenames 순서대로 반환합니다.
 
-                # print(f"ID {diagnosis_id}에 대한 특징 데이터를 찾을 수 없습니다.")
-                return None
-        except Exception as e:
-            # print(f"extracted_features.json 읽기 오류: {e}")
-            import traceback
-
-            traceback.print_exc()
-            return None
+        이미지 스냅샷의 같은 파일명 튜플로 다시 부르면 뷰에 캐시된 결과를 그대로 돌려주므로,
+        썸네일 목록을 그릴 때마다 이미지별로 조회하지 않습니다.
+        """
+        view = self._get_view()
+        cached = view.category_ids.get(category_id)
+        if cached is not None and cached[0] is filenames:
+            return cached[1]
+        ids = tuple(
+            (view.by_category_filename.get((category_id, filename)) or view.by_filename.get(filename) or {}).get("id")
+            for filename in filenames
+        )
+        view.category_ids[category_id] = (filenames, ids)
+        return ids
 
     def get_all_diagnoses(self) -> List[str]:
         """모든 고유한 진단명을 반환합니다."""
-        diagnoses = set()
-        for item in self.diagnosis_data:
-            if "revised_answer_final" in item:
-                diagnoses.add(item["revised_answer_final"])
-        return sorted(list(diagnoses))
+        return list(self._get_view().diagnoses)
 
     def get_images_by_diagnosis(self, diagnosis_name: str) -> List[Dict]:
         """특정 진단명에 해당하는 모든 이미지 정보를 반환합니다."""
         images = []
-        for item in self.diagnosis_data:
+        for item in self._get_view().items:
             if item.get("revised_answer_final") == diagnosis_name:
                 images.append(
                     {
@@ -5,6 +5,54 @@ from urllib.parse import urlparse
 import shutil
 
 
+def resolve_local_image_path(image_path):
+    """
+    매니페스트의 서버 경로를 로컬에서 접근 가능한 경로로 변환
+
+    Args:
+        image_path (str): 매니페스트에 기록된 이미지 경로
+    """
+    # SSH 서버의 파일 경로를 로컬에서 접근 가능한 경로로 변환
+    # 예: /home/username/MATLAB/test_VQA/model_test/images/1.jpg
+    # -> test_VQA/model_test/images/1.jpg (상대경로)
+
+    # SSH 서버의 절대 경로를 현재 작업 디렉토리 기준의 상대 경로로 변환
+    local_image_path = image_path
+    if image_path.startswith("/"):
+        # /convei_nas2/bsw/LLaMA-Factory/data/ 부분을 제거하고 상대 경로로 변환
+        if "/convei_nas2/bsw/LLaMA-Factory/data/" in image_path:
+            # /convei_nas2/bsw/LLaMA-Factory/data/ 이후 부분만 추출
+            relative_path = image_path.split(
+                "/convei_nas2/bsw/LLaMA-Factory/data/"
+            )[-1]
+
+            # 현재 작업 디렉토리에서 data 폴더까지의 상대 경로 계산
+            current_dir = os.getcwd()
+            if "/convei_nas2/bsw/LLaMA-Factory/data/" in current_dir:
+                # 현재 위치가 data 폴더 안에 있음
+                current_relative = current_dir.split(
+                    "/convei_nas2/bsw/LLaMA-Factory/data/"
+                )[-1]
+                # 현재 위치에서 data 폴더까지 올라가기
+                up_levels = len(current_relative.split("/"))
+                up_path = "../" * up_levels
+                local_image_path = up_path + relative_path
+            else:
+                local_image_path = relative_path
+
+        elif "/MATLAB/" in image_path:
+            local_image_path = image_path.split("/MATLAB/")[-1]
+        else:
+            local_image_path = image_path.lstrip("/")
+
+    return local_image_path
+
+
+def category_folder_name(diagnosis):
+    """진단명을 downloaded_images 하위 폴더명으로 변환합니다."""
+    return diagnosis.replace(" ", "_")
+
+
 def download_images_from_sampled_data(json_file_path, output_dir="downloaded_images"):
     """
     샘플링된 데이터에서 image 경로를 읽어와서 이미지를 다운로드
@@ -44,7 +92,7 @@ def download_images_from_sampled_data(json_file_path, output_dir="downloaded_ima
                     filename = f"{diagnosis}_{i}.jpg"
 
                 # diagnosis별로 하위 디렉토리 생성
-                diagnosis_dir = os.path.join(output_dir, diagnosis.replace(" ", "_"))
+                diagnosis_dir = os.path.join(output_dir, category_folder_name(diagnosis))
                 if not os.path.exists(diagnosis_dir):
                     os.makedirs(diagnosis_dir)
 
@@ -65,38 +113,7 @@ def download_images_from_sampled_data(json_file_path, output_dir="downloaded_ima
                     downloaded_count += 1
 
                 else:
-                    # SSH 서버의 파일 경로를 로컬에서 접근 가능한 경로로 변환
-                    # 예: /home/username/MATLAB/test_VQA/model_test/images/1.jpg
-                    # -> test_VQA/model_test/images/1.jpg (상대경로)
-
-                    # SSH 서버의 절대 경로를 현재 작업 디렉토리 기준의 상대 경로로 변환
-                    local_image_path = image_path
-                    if image_path.startswith("/"):
-                        # /convei_nas2/bsw/LLaMA-Factory/data/ 부분을 제거하고 상대 경로로 변환
-                        if "/convei_nas2/bsw/LLaMA-Factory/data/" in image_path:
-                            # /convei_nas2/bsw/LLaMA-Factory/data/ 이후 부분만 추출
-                            relative_path = image_path.split(
-                                "/convei_nas2/bsw/LLaMA-Factory/data/"
-                            )[-1]
-
-                            # 현재 작업 디렉토리에서 data 폴더까지의 상대 경로 계산
-                            current_dir = os.getcwd()
-                            if "/convei_nas2/bsw/LLaMA-Factory/data/" in current_dir:
-                                # 현재 위치가 data 폴더 안에 있음
-                                current_relative = current_dir.split(
-                                    "/convei_nas2/bsw/LLaMA-Factory/data/"
-                                )[-1]
-                                # 현재 위치에서 data 폴더까지 올라가기
-                                up_levels = len(current_relative.split("/"))
-                                up_path = "../" * up_levels
-                                local_image_path = up_path + relative_path
-                            else:
-                                local_image_path = relative_path
-
-                        elif "/MATLAB/" in image_path:
-                            local_image_path = image_path.split("/MATLAB/")[-1]
-                        else:
-                            local_image_path = image_path.lstrip("/")
+                    local_image_path = resolve_local_image_path(image_path)
 
                     print(f"변환된 로컬 경로: {local_image_path}")
                     print(f"현재 작업 디렉토리: {os.getcwd()}")
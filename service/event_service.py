@@ -0,0 +1,72 @@
+import queue
+import threading
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+class EventBroker:
+    """프로세스 내 pub/sub.
+
+    DatabaseService의 쓰기 경로가 publish()하면 구독 중인 SSE 스트림이 즉시 깨어납니다.
+    구독자 큐가 가득 차면 이벤트를 버리는데, 스트림은 DB에서 버전/ID 순으로 변경분을 다시 읽으므로
+    누락되지 않습니다 (다른 워커 프로세스의 쓰기도 같은 방식으로 poll 주기마다 반영).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Set[queue.Queue] = set()
+
+    def subscribe(self, maxsize: int = 100, limit: Optional[int] = None) -> Optional[queue.Queue]:
+        """구독 큐를 등록합니다. 이미 limit개가 구독 중이면 등록하지 않고 None을 반환합니다.
+
+        개수 확인과 등록을 같은 잠금 안에서 하므로 동시에 연결해도 limit을 넘지 않습니다.
+        """
+        subscription = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, topic: str, **data) -> None:
+        """쓰기 스레드를 막지 않도록 put_nowait만 사용합니다."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait((topic, data))
+            except queue.Full:
+                pass
+
+
+class MarkerCache:
+    """변경 표식(marker)이 같으면 이전 계산 결과를 재사용합니다.
+
+    여러 관리자 페이지가 동시에 연결되어 있어도 진행 현황 집계는 변경이 있을 때 한 번만 실행됩니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry: Optional[Tuple[Hashable, Dict]] = None
+
+    def get(self, marker: Hashable, compute: Callable[[], Dict]) -> Dict:
+        entry = self._entry
+        if entry is not None and entry[0] == marker:
+            return entry[1]
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == marker:
+                return entry[1]
+            value = compute()
+            self._entry = (marker, value)
+            return value
+
+
+events = EventBroker()
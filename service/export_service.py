@@ -0,0 +1,191 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+# 내보내기 컬럼 (CSV 헤더 / JSONL 키 / Parquet 스키마 순서)
+EXPORT_FIELDS = (
+    'image_name', 'category_id', 'diagnosis_id', 'diagnosis',
+    'feature_id', 'feature_label', 'feature_description',
+    'answer', 'reason', 'explanation', 'timestamp', 'version',
+)
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class AnnotationExporter:
+    """feature_answers에 진단/특징 메타데이터를 붙여 행 단위로 내보냅니다.
+
+    답변은 DatabaseService.iter_feature_answers()가 image_name 순서로 batch_size개씩 읽어 오고,
+    메타데이터는 직전 이미지 것만 기억하므로 메모리 사용량은 DB 크기와 관계없이 일정합니다.
+    images(ImageService)를 주면 이미지가 들어 있는 카테고리의 진단을 먼저 찾습니다.
+    CSV/JSONL은 chunk_size행마다 문자열 조각을 만들어 그대로 응답 스트림에 쓸 수 있습니다.
+    exported_rows는 마지막 내보내기에서 지금까지 만든 행 수입니다.
+    """
+
+    def __init__(self, database, diagnosis, batch_size: int = 1000, images=None):
+        self.database = database
+        self.diagnosis = diagnosis
+        self.images = images
+        self.batch_size = batch_size
+        self.exported_rows = 0
+
+    def _image_metadata(self, image_name: str) -> Tuple[Dict, Dict[str, Dict]]:
+        """이미지의 진단 정보와 {feature_id: 특징} 목록을 찾습니다."""
+        categories = self.images.find_categories(image_name) if self.images is not None else ()
+        item = self.diagnosis.get_diagnosis_by_filename(image_name, categories)
+        if not item:
+            return {'category_id': '', 'diagnosis_id': '', 'diagnosis': ''}, {}
+        category = item.get('sampled_diagnosis') or item.get('revised_answer_final') or ''
+        info = {
+            'category_id': category.replace(' ', '_'),
+            'diagnosis_id': item.get('id', ''),
+            'diagnosis': item.get('revised_answer_final', ''),
+        }
+        extracted = self.diagnosis.get_extracted_features_by_diagnosis_id(item.get('id')) or {}
+        features = {
+            str(feature.get('id')): feature
+            for feature in (extracted.get('extracted_features') or {}).get('features', [])
+        }
+        return info, features
+
+    def iter_records(self) -> Iterator[Dict]:
+        """EXPORT_FIELDS 키를 가진 dict를 한 행씩 반환합니다."""
+        current_image = None
+        info: Dict = {}
+        features: Dict[str, Dict] = {}
+        self.exported_rows = 0
+        for row in self.database.iter_feature_answers(batch_size=self.batch_size):
+            if row['image_name'] != current_image:
+                current_image = row['image_name']
+                info, features = self._image_metadata(current_image)
+            feature = features.get(row['feature_id'], {})
+            self.exported_rows += 1
+            yield {
+                'image_name': row['image_name'],
+                'category_id': info['category_id'],
+                'diagnosis_id': info['diagnosis_id'],
+                'diagnosis': info['diagnosis'],
+                'feature_id': row['feature_id'],
+                'feature_label': feature.get('label', ''),
+                'feature_description': feature.get('description', ''),
+                'answer': row['answer'],
+                'reason': row['reason'],
+                'explanation': row['explanation'],
+                'timestamp': row['timestamp'],
+                'version': row['version'],
+            }
+
+    def iter_csv(self, chunk_size: int = 500) -> Iterator[str]:
+        """헤더를 포함한 CSV를 chunk_size행 단위 문자열로 반환합니다."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        pending = 0
+        for record in self.iter_records():
+            writer.writerow(record)
+            pending += 1
+            if pending >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue()
+
+    def iter_jsonl(self, chunk_size: int = 500) -> Iterator[str]:
+        """한 줄에 JSON 하나인 JSONL을 chunk_size행 단위 문자열로 반환합니다."""
+        lines: List[str] = []
+        for record in self.iter_records():
+            lines.append(json.dumps(record, ensure_ascii=False))
+            if len(lines) >= chunk_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    def iter_format(self, export_format: str, chunk_size: int = 500) -> Iterator[str]:
+        if export_format == 'csv':
+            return self.iter_csv(chunk_size)
+        if export_format == 'jsonl':
+            return self.iter_jsonl(chunk_size)
+        raise ValueError(f'스트리밍할 수 없는 형식: {export_format}')
+
+    def write_parquet(self, path: str, row_group_size: int = 10000) -> int:
+        """Parquet 파일로 저장하고 행 수를 반환합니다 (pyarrow 필요).
+
+        row_group_size행씩 모아 row group 하나로 쓰므로 메모리에는 한 row group만 올라갑니다.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError('Parquet 내보내기에는 pyarrow가 필요합니다: pip install pyarrow') from e
+
+        schema = pa.schema([
+            (field, pa.int64() if field == 'version' else pa.string())
+            for field in EXPORT_FIELDS
+        ])
+        total = 0
+        columns: Dict[str, List] = {field: [] for field in EXPORT_FIELDS}
+
+        def flush(writer):
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            for values in columns.values():
+                values.clear()
+
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for record in self.iter_records():
+                for field in EXPORT_FIELDS:
+                    value = record[field]
+                    columns[field].append(value if field == 'version' or value is None else str(value))
+                total += 1
+                if len(columns['version']) >= row_group_size:
+                    flush(writer)
+            if columns['version'] or total == 0:
+                flush(writer)
+        return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='판독 답변을 진단/특징 메타데이터와 함께 CSV/JSONL/Parquet로 내보냅니다.')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--output', '-o', help='저장 경로 (CSV/JSONL은 생략 시 표준 출력, Parquet은 필수)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='DB에서 한 번에 읽을 행 수')
+    parser.add_argument('--row-group-size', type=int, default=10000, help='Parquet row group 행 수')
+    args = parser.parse_args()
+
+    # 서버와 같은 환경 변수(DATABASE_PATH, DIAGNOSIS_MANIFESTS, FEATURES_FILES)를 사용
+    from service.container import ServiceContainer, load_config_from_env
+
+    services = ServiceContainer(load_config_from_env())
+    exporter = AnnotationExporter(services.database, services.diagnosis, batch_size=args.batch_size,
+                                  images=services.image)
+
+    if args.format == 'parquet':
+        if not args.output:
+            parser.error('Parquet은 --output이 필요합니다.')
+        try:
+            total = exporter.write_parquet(args.output, row_group_size=args.row_group_size)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print(f'{total}행 저장: {args.output}', file=sys.stderr)
+        return
+
+    if not args.output:
+        for chunk in exporter.iter_format(args.format):
+            sys.stdout.write(chunk)
+        return
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        for chunk in exporter.iter_format(args.format):
+            f.write(chunk)
+    print(f'저장 완료: {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 import os
 import json
 import re
-from typing import Dict, List
+import datetime
+from typing import Callable, Dict, List, Optional
 import openai
 
 from dotenv import load_dotenv
@@ -151,6 +152,85 @@ def check_environment():
     print("=" * 30)
 
 
+# -----------------------------
+# 항목별 feature 추출
+# -----------------------------
+def extract_features(data: List[Dict], progress: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+    """매니페스트 항목들의 rationale에서 특징을 추출합니다.
+
+    progress는 항목을 하나 처리할 때마다 (처리한 수, 전체 수)로 호출됩니다 (예외를 던지면 중단).
+    """
+    all_results = []
+
+    # 각 항목에 대해 처리
+    for i, item in enumerate(data):
+        if progress and i:
+            progress(i, len(data))
+        print(f"\n{'='*60}")
+        print(f"항목 {i+1}/{len(data)} 처리 중...")
+        print(f"Id: {item.get('id', 'N/A')}")
+        print(f"{'='*60}")
+
+        # rationale_o4_hf 내용 추출
+        rationale = item.get("rationale", "")
+        if not rationale:
+            print("rationale_o4_hf가 없어 건너뜁니다.")
+            continue
+
+        # (1) Image Analysis 부분만 추출
+        image_analysis_text = extract_image_analysis_part(rationale)
+        print(f"입력 텍스트 (Image Analysis 부분): {image_analysis_text[:100]}...")
+        print("-" * 50)
+
+        # LLM으로 특징 추출
+        result = query_llm(image_analysis_text)
+        if "error" in result:
+            print(f"LLM 호출 실패: {result['error']}")
+            continue
+
+        # JSON 파싱 시도
+        features_data = None
+        try:
+            features_data = json.loads(result["raw_response"])
+            if "features" in features_data:
+                print(f"총 {len(features_data['features'])}개의 특징을 찾았습니다.")
+            else:
+                print("특징 데이터를 찾을 수 없습니다.")
+                continue
+        except json.JSONDecodeError:
+            print("JSON 파싱 실패, 정리 후 재시도...")
+            cleaned_json = clean_json_response(result["raw_response"])
+            try:
+                features_data = json.loads(cleaned_json)
+                if "features" in features_data:
+                    print(
+                        f"정리된 JSON으로 {len(features_data['features'])}개의 특징을 찾았습니다."
+                    )
+                else:
+                    print("특징 데이터를 찾을 수 없습니다.")
+                    continue
+            except json.JSONDecodeError:
+                print("JSON 파싱 완전 실패")
+                continue
+
+        # 결과 저장용 데이터 구조
+        result_item = {
+            "id": item.get("id", ""),
+            "original_text": image_analysis_text,
+            "extracted_features": features_data,
+            "processing_timestamp": str(datetime.datetime.now()),
+        }
+
+        all_results.append(result_item)
+
+        print(f"항목 {i+1} 완료")
+        print("-" * 50)
+
+    if progress:
+        progress(len(data), len(data))
+    return all_results
+
+
 # -----------------------------
 # 메인: feature 추출 및 JSON 저장
 # -----------------------------
@@ -170,69 +250,7 @@ def main():
         print(f"JSON 파일 로드 성공: {len(data)}개 항목 발견")
 
         # 모든 결과를 저장할 리스트
-        all_results = []
-
-        # 각 항목에 대해 처리
-        for i, item in enumerate(data):
-            print(f"\n{'='*60}")
-            print(f"항목 {i+1}/{len(data)} 처리 중...")
-            print(f"Id: {item.get('id', 'N/A')}")
-            print(f"{'='*60}")
-
-            # rationale_o4_hf 내용 추출
-            rationale = item.get("rationale", "")
-            if not rationale:
-                print("rationale_o4_hf가 없어 건너뜁니다.")
-                continue
-
-            # (1) Image Analysis 부분만 추출
-            image_analysis_text = extract_image_analysis_part(rationale)
-            print(f"입력 텍스트 (Image Analysis 부분): {image_analysis_text[:100]}...")
-            print("-" * 50)
-
-            # LLM으로 특징 추출
-            result = query_llm(image_analysis_text)
-            if "error" in result:
-                print(f"LLM 호출 실패: {result['error']}")
-                continue
-
-            # JSON 파싱 시도
-            features_data = None
-            try:
-                features_data = json.loads(result["raw_response"])
-                if "features" in features_data:
-                    print(f"총 {len(features_data['features'])}개의 특징을 찾았습니다.")
-                else:
-                    print("특징 데이터를 찾을 수 없습니다.")
-                    continue
-            except json.JSONDecodeError:
-                print("JSON 파싱 실패, 정리 후 재시도...")
-                cleaned_json = clean_json_response(result["raw_response"])
-                try:
-                    features_data = json.loads(cleaned_json)
-                    if "features" in features_data:
-                        print(
-                            f"정리된 JSON으로 {len(features_data['features'])}개의 특징을 찾았습니다."
-                        )
-                    else:
-                        print("특징 데이터를 찾을 수 없습니다.")
-                        continue
-                except json.JSONDecodeError:
-                    print("JSON 파싱 완전 실패")
-                    continue
-
-            # 결과 저장용 데이터 구조
-            result_item = {
-                "id": item.get("id", ""),
-                "original_text": image_analysis_text,
-                "extracted_features": features_data,
-                "processing_timestamp": str(datetime.datetime.now()),
-            }
-
-            all_results.append(result_item)
-
-            print(f"항목 {i+1} 완료")
-            print("-" * 50)
+        all_results = extract_features(data)
 
         # 최종 결과를 JSON 파일로 저장
         output_filename = "extracted_features.json"
@@ -253,6 +271,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import datetime
-
     main()
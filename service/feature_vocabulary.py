@@ -0,0 +1,388 @@
+import argparse
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from service.event_service import MarkerCache
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+# 라벨에 자주 나오는 약어 → 풀어 쓴 형태 ("RPE changes"와 "changes in retinal pigment epithelium"을 같은 토큰으로)
+ABBREVIATIONS = {
+    'rpe': 'retinal pigment epithelium',
+    'rnfl': 'retinal nerve fiber layer',
+    'srf': 'subretinal fluid',
+    'irf': 'intraretinal fluid',
+    'cnv': 'choroidal neovascularization',
+    'ped': 'pigment epithelial detachment',
+    'erm': 'epiretinal membrane',
+    'onh': 'optic nerve head',
+    'cme': 'cystoid macular edema',
+    'dme': 'diabetic macular edema',
+    'cwp': 'cotton wool spot',
+}
+# 의미 없는 기능어와 정도/범위 수식어 ("mild retinal edema" → "retinal edema")
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'to', 'and', 'or', 'with', 'within',
+    'mild', 'subtle', 'slight', 'small', 'minor', 'early', 'localized', 'possible', 'some', 'presence', 'sign',
+}
+# 부정 소견은 같은 특징의 긍정 소견과 묶지 않음 ("absence of exudates" ≠ "exudates")
+NEGATIONS = {'absence', 'absent', 'no', 'without', 'lack'}
+
+_PARENTHESIS = re.compile(r'\(([^)]*)\)')
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def _stem(token: str) -> str:
+    """복수형만 단수로 줄이는 가벼운 어간 처리 (hemorrhages → hemorrhage, opacities → opacity)."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def normalize_label(label: str) -> str:
+    """특징 라벨을 비교용 정규형으로 바꿉니다.
+
+    소문자화, 괄호 안 약어 제거("Subretinal fluid (SRF)" → "subretinal fluid"), 약어 풀어 쓰기,
+    구두점/하이픈 제거, 불용어 제거, 복수형 정리를 거쳐 공백 하나로 이은 문자열을 반환합니다.
+    """
+    text = _NON_ALNUM.sub(' ', _PARENTHESIS.sub(' ', (label or '').lower()))
+    tokens = []
+    for token in text.split():
+        if token in ABBREVIATIONS:
+            tokens.extend(ABBREVIATIONS[token].split())
+        elif token not in STOPWORDS:
+            tokens.append(_stem(token))
+    return ' '.join(tokens)
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f' {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(first: Set[str], second: Set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+def label_similarity(first: str, second: str, token_threshold: float = 0.75) -> float:
+    """정규화된 두 라벨의 유사도 (0~1).
+
+    토큰 단위 Jaccard이되, 철자가 조금 다른 토큰(오타, hyperreflective/hyper-reflectivity 등)은 문자 3-gram
+    Dice가 token_threshold 이상이고 앞 4글자가 같으면 같은 토큰으로 봅니다. 앞부분 조건은
+    hyper-/hypo-, sub-/intra-처럼 접두어만 다른 의학 용어가 합쳐지지 않게 하기 위한 것입니다.
+    부정 여부가 다르면 0입니다.
+    """
+    if first == second:
+        return 1.0
+    if first.replace(' ', '') == second.replace(' ', ''):
+        # "cotton wool" / "cottonwool"
+        return 1.0
+    first_tokens = first.split()
+    second_tokens = second.split()
+    if any(token in NEGATIONS for token in first_tokens) != any(token in NEGATIONS for token in second_tokens):
+        return 0.0
+    first_tokens = [token for token in first_tokens if token not in NEGATIONS]
+    remaining = [token for token in second_tokens if token not in NEGATIONS]
+    if not first_tokens or not remaining:
+        return 0.0
+    total = len(first_tokens) + len(remaining)
+    matched = 0
+    for token in first_tokens:
+        if token in remaining:
+            remaining.remove(token)
+            matched += 1
+            continue
+        grams = _trigrams(token)
+        best, best_score = None, 0.0
+        for candidate in remaining:
+            if candidate[:4] != token[:4]:
+                continue
+            score = _dice(grams, _trigrams(candidate))
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is not None and best_score >= token_threshold:
+            remaining.remove(best)
+            matched += 1
+    return matched / (total - matched)
+
+
+class FeatureMatcher:
+    """정규화 라벨 → canonical 키 인덱스.
+
+    등록된 별칭(이미 매핑된 정규화 라벨)은 사전 조회로 바로 찾고, 처음 보는 라벨은 문자 3-gram 역색인으로
+    후보 별칭을 추린 뒤 label_similarity로 점수를 매겨 threshold 이상인 가장 가까운 canonical을 고릅니다.
+    """
+
+    def __init__(self, threshold: float = 0.75, max_candidates: int = 30):
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self._aliases: Dict[str, str] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def add(self, normalized: str, canonical: str) -> None:
+        if normalized in self._aliases:
+            return
+        self._aliases[normalized] = canonical
+        for gram in _trigrams(normalized):
+            self._postings[gram].add(normalized)
+
+    def match(self, normalized: str) -> Tuple[Optional[str], float]:
+        """(canonical 키, 점수). threshold를 넘는 후보가 없으면 (None, 최고 점수)."""
+        canonical = self._aliases.get(normalized)
+        if canonical is not None:
+            return canonical, 1.0
+        shared: Counter = Counter()
+        for gram in _trigrams(normalized):
+            shared.update(self._postings.get(gram, ()))
+        # 순서를 (공유 3-gram 수, 별칭)으로 고정해 프로세스가 달라도 같은 결과가 나오게 함
+        candidates = sorted(shared.items(), key=lambda kv: (-kv[1], kv[0]))[:self.max_candidates]
+        best, best_score = None, 0.0
+        for alias, _ in candidates:
+            score = label_similarity(normalized, alias)
+            if score > best_score:
+                best, best_score = alias, score
+        if best is not None and best_score >= self.threshold:
+            return self._aliases[best], best_score
+        return None, best_score
+
+
+class FeatureVocabulary:
+    """extracted_features의 자유 텍스트 라벨을 canonical 특징으로 묶는 어휘 인덱스.
+
+    - rebuild(): 모든 라벨을 빈도순으로 군집화해 매핑 전체를 다시 만듭니다. 자주 쓰인 라벨이 먼저 canonical이 되고,
+      그 뒤 라벨은 기존 canonical과 threshold 이상 비슷하면 거기에 붙습니다.
+    - reload_changed(): 특징 파일이 바뀌면 아직 매핑이 없는 (diagnosis_id, feature_id)만 기존 어휘에 맞춰 추가합니다.
+      새 추출 실행 결과가 기존 canonical id를 바꾸지 않으며, DatasetReloader가 특징 파일 변경 시 호출합니다.
+    - mapping(): 분석 등에서 정수 키 group-by에 쓸 {(diagnosis_id, feature_id): canonical_id} 스냅샷 (어휘 버전별 캐시).
+    """
+
+    def __init__(self, database, diagnosis, threshold: float = 0.75):
+        self.database = database
+        self.diagnosis = diagnosis
+        self.threshold = threshold
+        self._applied_fingerprint: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._cache = MarkerCache()
+
+    # -----------------------------
+    # 데이터셋
+    # -----------------------------
+    def _feature_rows(self) -> Iterator[Tuple[str, str, str]]:
+        """(diagnosis_id, feature_id, label)"""
+        for item in self.diagnosis.diagnosis_data:
+            diagnosis_id = item.get('id')
+            extracted = self.diagnosis.get_extracted_features_by_diagnosis_id(diagnosis_id) or {}
+            for feature in (extracted.get('extracted_features') or {}).get('features', []):
+                label = feature.get('label') or ''
+                if label.strip():
+                    yield str(diagnosis_id), str(feature.get('id', '')), label
+
+    @staticmethod
+    def _assign(rows: List[Tuple[str, str, str]], matcher: FeatureMatcher,
+                known_labels: Dict[str, str]) -> Tuple[List[tuple], List[tuple]]:
+        """rows를 matcher에 맞춰 canonical에 배정합니다. 맞는 것이 없는 라벨은 새 canonical이 됩니다.
+
+        라벨은 빈도순(같으면 이름순)으로 처리하므로 결과는 입력 순서와 무관하게 결정적입니다.
+        Returns: (canonicals [(normalized, label)], mappings [(diagnosis_id, feature_id, label, normalized, canonical, score)])
+        """
+        normalized_of = {label: normalize_label(label) for label in {label for _, _, label in rows}}
+        by_normalized: Dict[str, Counter] = defaultdict(Counter)
+        for _, _, label in rows:
+            by_normalized[normalized_of[label]][label] += 1
+        order = sorted(by_normalized, key=lambda key: (-sum(by_normalized[key].values()), key))
+
+        assigned: Dict[str, Tuple[str, float]] = {}
+        canonical_labels: Dict[str, Counter] = defaultdict(Counter)
+        for normalized in order:
+            if not normalized:
+                continue
+            canonical, score = matcher.match(normalized)
+            if canonical is None:
+                canonical, score = normalized, 1.0
+            matcher.add(normalized, canonical)
+            assigned[normalized] = (canonical, round(score, 4))
+            canonical_labels[canonical].update(by_normalized[normalized])
+
+        canonicals = [
+            (canonical, known_labels.get(canonical) or min(labels.items(), key=lambda kv: (-kv[1], kv[0]))[0])
+            for canonical, labels in canonical_labels.items()
+        ]
+        mappings = [
+            (diagnosis_id, feature_id, label, normalized_of[label]) + assigned[normalized_of[label]]
+            for diagnosis_id, feature_id, label in rows
+            if normalized_of[label] in assigned
+        ]
+        return canonicals, mappings
+
+    # -----------------------------
+    # 재구성 / 추가
+    # -----------------------------
+    def rebuild(self) -> Dict:
+        """매핑 전체를 현재 데이터셋으로 다시 만듭니다 (일괄 재구성)."""
+        with self._reload_lock:
+            started = time.perf_counter()
+            fingerprint = self.diagnosis.fingerprint()
+            rows = list(self._feature_rows())
+            canonicals, mappings = self._assign(rows, FeatureMatcher(self.threshold), {})
+            written = self.database.write_feature_vocabulary(fingerprint, canonicals, mappings, replace=True)
+            if written is None:
+                raise RuntimeError('특징 어휘를 저장하지 못했습니다')
+            self._applied_fingerprint = fingerprint
+            metrics.inc('feature_vocabulary_updates_total', mode='rebuild')
+            summary = {
+                'features': len(rows),
+                'labels': len({label for _, _, label in rows}),
+                'canonicals': len(canonicals),
+                'mapped': written,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            }
+            logger.info("특징 어휘 재구성: 라벨 %d개 → canonical %d개", summary['labels'], summary['canonicals'])
+            return summary
+
+    def has_changes(self) -> bool:
+        if self._applied_fingerprint is None:
+            self._applied_fingerprint = self.database.get_feature_vocabulary_meta('fingerprint') or ''
+        return self.diagnosis.fingerprint() != self._applied_fingerprint
+
+    def reload_changed(self, force: bool = False) -> bool:
+        """데이터셋이 바뀌었으면 새 (diagnosis_id, feature_id)만 어휘에 추가합니다. 추가했으면 True.
+
+        force여도 기존 매핑은 다시 군집화하지 않습니다 (그건 rebuild()).
+        """
+        with self._reload_lock:
+            fingerprint = self.diagnosis.fingerprint()
+            if not force and fingerprint == self._applied_fingerprint:
+                return False
+            added = self._add_new(fingerprint, force)
+            if added is None:
+                return False
+            self._applied_fingerprint = fingerprint
+            return added > 0
+
+    def _add_new(self, fingerprint: str, force: bool = False) -> Optional[int]:
+        vocabulary = self.database.get_feature_vocabulary()
+        if vocabulary is None:
+            return None
+        matcher = FeatureMatcher(self.threshold)
+        canonical_key = {canonical['id']: canonical['normalized'] for canonical in vocabulary['canonicals']}
+        # canonical 자신을 먼저, 그다음 매핑된 라벨들을 별칭으로 등록 (자주 쓰인 canonical이 동점에서 이김)
+        for canonical in sorted(vocabulary['canonicals'], key=lambda c: (-c['occurrences'], c['id'])):
+            matcher.add(canonical['normalized'], canonical['normalized'])
+        for mapping in vocabulary['mappings']:
+            matcher.add(mapping['normalized'], canonical_key[mapping['canonical_id']])
+
+        mapped = {(mapping['diagnosis_id'], mapping['feature_id']) for mapping in vocabulary['mappings']}
+        rows = [row for row in self._feature_rows() if (row[0], row[1]) not in mapped]
+        known_labels = {canonical['normalized']: canonical['label'] for canonical in vocabulary['canonicals']}
+        canonicals, mappings = self._assign(rows, matcher, known_labels)
+        written = self.database.write_feature_vocabulary(fingerprint, canonicals, mappings, force=force)
+        if written:
+            metrics.inc('feature_vocabulary_updates_total', mode='incremental')
+            logger.info("특징 어휘에 %d개 특징 추가 (새 canonical %d개)", written,
+                        len([key for key, _ in canonicals if key not in known_labels]))
+        return written
+
+    # -----------------------------
+    # 조회
+    # -----------------------------
+    def version(self) -> int:
+        return int(self.database.get_feature_vocabulary_meta('version') or 0)
+
+    def mapping(self) -> Dict:
+        """{'version', 'canonical_of': {(diagnosis_id, feature_id): canonical_id}, 'labels': {canonical_id: label}}"""
+        return self._cache.get(self.version(), self._load_mapping)
+
+    def _load_mapping(self) -> Dict:
+        vocabulary = self.database.get_feature_vocabulary() or {'version': 0, 'canonicals': [], 'mappings': []}
+        return {
+            'version': vocabulary['version'],
+            'canonical_of': {
+                (mapping['diagnosis_id'], mapping['feature_id']): mapping['canonical_id']
+                for mapping in vocabulary['mappings']
+            },
+            'labels': {canonical['id']: canonical['label'] for canonical in vocabulary['canonicals']},
+        }
+
+    def canonical_features(self) -> List[Dict]:
+        """canonical 특징 목록 (많이 쓰인 순)과 각 canonical로 묶인 원래 라벨들."""
+        vocabulary = self.database.get_feature_vocabulary() or {'canonicals': [], 'mappings': []}
+        aliases: Dict[int, Counter] = defaultdict(Counter)
+        for mapping in vocabulary['mappings']:
+            aliases[mapping['canonical_id']][mapping['label']] += 1
+        return [
+            dict(canonical, aliases=[label for label, _ in aliases[canonical['id']].most_common()])
+            for canonical in sorted(vocabulary['canonicals'], key=lambda c: (-c['occurrences'], c['id']))
+        ]
+
+    def match(self, label: str) -> Dict:
+        """라벨 하나가 현재 어휘의 어느 canonical에 붙을지 (저장하지 않음)."""
+        vocabulary = self.database.get_feature_vocabulary() or {'canonicals': [], 'mappings': []}
+        matcher = FeatureMatcher(self.threshold)
+        by_key = {canonical['normalized']: canonical for canonical in vocabulary['canonicals']}
+        id_to_key = {canonical['id']: canonical['normalized'] for canonical in vocabulary['canonicals']}
+        for key in by_key:
+            matcher.add(key, key)
+        for mapping in vocabulary['mappings']:
+            matcher.add(mapping['normalized'], id_to_key[mapping['canonical_id']])
+        normalized = normalize_label(label)
+        canonical, score = matcher.match(normalized)
+        return {
+            'label': label,
+            'normalized': normalized,
+            'canonical_id': by_key[canonical]['id'] if canonical else None,
+            'canonical_label': by_key[canonical]['label'] if canonical else None,
+            'score': round(score, 4),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='extracted_features 라벨의 canonical 특징 어휘를 만들고 조회합니다.')
+    parser.add_argument('--threshold', type=float, help='canonical에 붙일 최소 유사도 (기본: FEATURE_MATCH_THRESHOLD)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild', help='모든 라벨을 다시 군집화해 매핑 전체를 교체')
+    subparsers.add_parser('add', help='매핑이 없는 새 특징만 기존 어휘에 추가 (새 추출 실행 후)')
+    list_parser = subparsers.add_parser('list', help='canonical 특징 목록을 JSONL로 출력')
+    list_parser.add_argument('--limit', type=int)
+    match_parser = subparsers.add_parser('match', help='라벨이 어느 canonical에 붙을지 확인')
+    match_parser.add_argument('label')
+    args = parser.parse_args()
+
+    from service.container import ServiceContainer, load_config_from_env
+
+    config = load_config_from_env()
+    if args.threshold is not None:
+        config['FEATURE_MATCH_THRESHOLD'] = args.threshold
+    vocabulary = ServiceContainer(config).vocabulary
+
+    if args.command == 'rebuild':
+        try:
+            print(json.dumps(vocabulary.rebuild(), ensure_ascii=False, indent=2))
+        except RuntimeError as e:
+            print(f'재구성 실패: {e}', file=sys.stderr)
+            sys.exit(1)
+    elif args.command == 'add':
+        added = vocabulary.reload_changed(force=True)
+        print('새 특징을 추가했습니다.' if added else '추가할 새 특징이 없습니다.')
+    elif args.command == 'list':
+        for canonical in vocabulary.canonical_features()[:args.limit]:
+            sys.stdout.write(json.dumps(canonical, ensure_ascii=False) + '\n')
+    else:
+        print(json.dumps(vocabulary.match(args.label), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import combinations
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from service.event_service import MarkerCache
+from service.image_service import VALID_EXTENSIONS
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+_DCT_SIZE = 32
+# 32x32 DCT-II 행렬 (pHash는 저주파 8x8 계수만 사용)
+_DCT = np.cos(np.pi * (2 * np.arange(_DCT_SIZE) + 1)[None, :] * np.arange(_DCT_SIZE)[:, None] / (2 * _DCT_SIZE))
+_DCT[0] *= np.sqrt(0.5)
+
+
+def _load_pillow():
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError('중복 이미지 탐지에는 Pillow가 필요합니다: pip install Pillow') from e
+    return Image
+
+
+def _bits_to_hex(bits: np.ndarray) -> str:
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return f'{value:0{HASH_BITS // 4}x}'
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def compute_hashes(data: bytes) -> Dict:
+    """이미지 바이트의 sha256, dHash, pHash(각 64비트 hex)와 크기를 계산합니다.
+
+    - dHash: 9x8 흑백 축소 이미지에서 가로로 이웃한 픽셀의 밝기 증감
+    - pHash: 32x32 흑백 축소 이미지의 DCT 저주파 8x8 계수가 중앙값보다 큰지
+    재인코딩/크기 변경/밝기 보정에는 거의 변하지 않습니다. JPEG는 draft()로 축소 디코딩해 빠르게 읽습니다.
+    """
+    Image = _load_pillow()
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        image.draft('L', (_DCT_SIZE * 2, _DCT_SIZE * 2))
+        gray = image.convert('L')
+    small = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    pixels = np.asarray(gray.resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].ravel()
+    return {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'dhash': _bits_to_hex(small[:, 1:] > small[:, :-1]),
+        'phash': _bits_to_hex(low > np.median(low[1:])),
+        'width': width,
+        'height': height,
+    }
+
+
+def _hash_file(full_path: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """프로세스 풀 작업 단위. 실패해도 예외 대신 오류 메시지를 돌려 스캔 전체가 멈추지 않게 합니다."""
+    try:
+        with open(full_path, 'rb') as f:
+            return compute_hashes(f.read()), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+class MultiIndexHash:
+    """해밍 거리 검색용 multi-index hashing.
+
+    64비트 해시를 chunks개 조각으로 나눠 조각별 해시 테이블에 넣습니다. 거리가 r 이하인 두 해시는
+    비둘기집 원리로 적어도 한 조각이 r // chunks비트 이하로만 다르므로, 각 조각의 그 반경 안 값만
+    찾아보고 후보를 전체 거리로 확인하면 됩니다. 전체 쌍 비교(O(n²))나 해시가 고르게 퍼진 경우 거의 전부를
+    방문하는 BK-tree와 달리, 후보 수가 버킷 크기에만 비례합니다.
+    """
+
+    def __init__(self, chunks: int = 4, bits: int = HASH_BITS):
+        self.chunks = chunks
+        self.width = bits // chunks
+        self._mask = (1 << self.width) - 1
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self._values: List[Tuple[int, object]] = []
+        self._flips: Dict[int, List[int]] = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def _chunk(self, value: int, index: int) -> int:
+        return (value >> (index * self.width)) & self._mask
+
+    def add(self, value: int, item) -> None:
+        position = len(self._values)
+        self._values.append((value, item))
+        for index, table in enumerate(self._tables):
+            table.setdefault(self._chunk(value, index), []).append(position)
+
+    def _flip_masks(self, radius: int) -> List[int]:
+        """조각 하나에서 radius비트 이하를 뒤집는 XOR 마스크들."""
+        masks = self._flips.get(radius)
+        if masks is None:
+            masks = [
+                sum(1 << bit for bit in bits)
+                for count in range(radius + 1)
+                for bits in combinations(range(self.width), count)
+            ]
+            self._flips[radius] = masks
+        return masks
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, object]]:
+        """value와 해밍 거리가 radius 이하인 (거리, item) 목록."""
+        masks = self._flip_masks(radius // self.chunks)
+        seen = set()
+        found = []
+        for index, table in enumerate(self._tables):
+            key = self._chunk(value, index)
+            for mask in masks:
+                for position in table.get(key ^ mask, ()):
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    other, item = self._values[position]
+                    distance = hamming(value, other)
+                    if distance <= radius:
+                        found.append((distance, item))
+        return found
+
+
+class ImageHashService:
+    """downloaded_images의 지각 해시 인덱스를 유지하고 중복/유사 이미지를 찾습니다.
+
+    scan()은 파일 크기/수정 시각이 DB 기록과 다른 파일만 프로세스 풀에서 해시하므로, 큰 트리에 몇 장을
+    추가한 뒤의 재스캔은 새 파일만 읽습니다. find_duplicates()는 pHash multi-index hashing으로 후보를 찾고 dHash로 한 번 더
+    확인해 그룹을 만들며, 결과는 인덱스 버전이 바뀔 때만 다시 계산합니다.
+    """
+
+    def __init__(self, database, images_folder: str = 'downloaded_images', max_distance: int = 6,
+                 workers: int = 0, batch_size: int = 200):
+        self.database = database
+        self.images_folder = images_folder
+        self.max_distance = max_distance
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self._cache = MarkerCache()
+
+    # -----------------------------
+    # 스캔
+    # -----------------------------
+    def _walk(self) -> Iterator[Tuple[str, str, str, int, int]]:
+        """(path, category, filename, size, mtime_ns). path는 `카테고리/파일명`."""
+        if not os.path.isdir(self.images_folder):
+            return
+        for category_entry in os.scandir(self.images_folder):
+            if not category_entry.is_dir():
+                continue
+            for entry in os.scandir(category_entry.path):
+                if entry.is_file() and Path(entry.name).suffix.lower() in VALID_EXTENSIONS:
+                    stat = entry.stat()
+                    yield (f'{category_entry.name}/{entry.name}', category_entry.name, entry.name,
+                           stat.st_size, stat.st_mtime_ns)
+
+    def scan(self, force: bool = False, progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """새로 생기거나 바뀐 파일만 해시하고 사라진 파일은 인덱스에서 지웁니다 (force면 전부 다시 해시).
+
+        progress는 배치를 저장할 때마다 (해시한 파일 수, 해시할 전체 수)로 호출됩니다.
+        """
+        _load_pillow()
+        started = time.perf_counter()
+        index = self.database.get_image_hashes()
+        if index is None:
+            raise RuntimeError('이미지 해시 인덱스를 읽지 못했습니다')
+        stored = {row['path']: (row['size'], row['mtime_ns']) for row in index['rows']}
+
+        files = list(self._walk())
+        changed = [entry for entry in files if force or stored.get(entry[0]) != (entry[3], entry[4])]
+        removed = sorted(set(stored) - {entry[0] for entry in files})
+        summary = {'files': len(files), 'hashed': 0, 'failed': 0, 'removed': len(removed),
+                   'unchanged': len(files) - len(changed)}
+
+        def hash_results() -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+            full_paths = [os.path.join(self.images_folder, entry[0]) for entry in changed]
+            if self.workers <= 1 or len(changed) < 2 * self.workers:
+                # 몇 장 안 되면 프로세스를 띄우는 비용이 더 큼
+                yield from map(_hash_file, full_paths)
+                return
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                yield from executor.map(_hash_file, full_paths, chunksize=8)
+
+        batch: List[Dict] = []
+        for (path, category, filename, size, mtime_ns), (hashes, error) in zip(changed, hash_results()):
+            row = {'path': path, 'category': category, 'filename': filename, 'size': size, 'mtime_ns': mtime_ns,
+                   'sha256': None, 'dhash': None, 'phash': None, 'width': None, 'height': None,
+                   'error': error, 'scanned_at': datetime.now().isoformat(timespec='seconds')}
+            if hashes:
+                row.update(hashes)
+                summary['hashed'] += 1
+            else:
+                summary['failed'] += 1
+                logger.warning("이미지 해시 실패: %s (%s)", path, error)
+            batch.append(row)
+            # 중간에 멈춰도 이미 해시한 파일은 다음 스캔에서 다시 읽지 않도록 나눠서 저장
+            if len(batch) >= self.batch_size:
+                self._write(batch, [])
+                batch = []
+                if progress:
+                    progress(summary['hashed'] + summary['failed'], len(changed))
+        self._write(batch, removed)
+        if progress and changed:
+            progress(len(changed), len(changed))
+
+        for result in ('hashed', 'failed', 'removed'):
+            if summary[result]:
+                metrics.inc('image_hash_files_total', summary[result], result=result)
+        summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("이미지 해시 스캔: 파일 %d개 중 %d개 해시, %d개 실패, %d개 삭제",
+                    summary['files'], summary['hashed'], summary['failed'], summary['removed'])
+        return summary
+
+    def _write(self, rows: List[Dict], removed: List[str]) -> None:
+        if self.database.write_image_hashes(rows, removed) is None:
+            raise RuntimeError('이미지 해시를 저장하지 못했습니다')
+
+    # -----------------------------
+    # 중복 탐지
+    # -----------------------------
+    def find_duplicates(self, max_distance: Optional[int] = None) -> Dict:
+        """pHash 거리가 max_distance 이하이고 dHash 거리도 그 두 배 이하인 이미지끼리 묶은 그룹.
+
+        그룹은 여러 카테고리에 걸친 것, 큰 것 순으로 정렬합니다. exact는 모든 파일의 sha256이 같은 경우입니다.
+        """
+        radius = self.max_distance if max_distance is None else max_distance
+        marker = (self.database.get_image_hash_version(), radius)
+        return self._cache.get(marker, lambda: self._find_duplicates(radius))
+
+    def _find_duplicates(self, radius: int) -> Dict:
+        started = time.perf_counter()
+        index = self.database.get_image_hashes() or {'version': 0, 'rows': []}
+        rows = [row for row in index['rows'] if row['phash']]
+        phashes = [int(row['phash'], 16) for row in rows]
+        dhashes = [int(row['dhash'], 16) for row in rows]
+
+        index_by_phash = MultiIndexHash()
+        for position, value in enumerate(phashes):
+            index_by_phash.add(value, position)
+
+        parent = list(range(len(rows)))
+
+        def find(position: int) -> int:
+            while parent[position] != position:
+                parent[position] = parent[parent[position]]
+                position = parent[position]
+            return position
+
+        pairs = 0
+        for position, value in enumerate(phashes):
+            for distance, other in index_by_phash.search(value, radius):
+                if other <= position or hamming(dhashes[position], dhashes[other]) > 2 * radius:
+                    continue
+                pairs += 1
+                parent[find(other)] = find(position)
+
+        members: Dict[int, List[int]] = {}
+        for position in range(len(rows)):
+            members.setdefault(find(position), []).append(position)
+
+        groups = []
+        for positions in members.values():
+            if len(positions) < 2:
+                continue
+            first = positions[0]
+            group_members = [
+                dict(
+                    {key: rows[position][key] for key in ('path', 'category', 'filename', 'size', 'width', 'height')},
+                    phash_distance=hamming(phashes[first], phashes[position]),
+                    dhash_distance=hamming(dhashes[first], dhashes[position]),
+                    identical=rows[position]['sha256'] == rows[first]['sha256'],
+                )
+                for position in positions
+            ]
+            categories = sorted({member['category'] for member in group_members})
+            groups.append({
+                'members': group_members,
+                'categories': categories,
+                'cross_category': len(categories) > 1,
+                'exact': len({rows[position]['sha256'] for position in positions}) == 1,
+                'max_phash_distance': max(member['phash_distance'] for member in group_members),
+            })
+        groups.sort(key=lambda group: (not group['cross_category'], -len(group['members']), group['members'][0]['path']))
+
+        return {
+            'version': index['version'],
+            'max_distance': radius,
+            'files': len(index['rows']),
+            'failed': len(index['rows']) - len(rows),
+            'pairs': pairs,
+            'groups': groups,
+            'duplicate_files': sum(len(group['members']) - 1 for group in groups),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='downloaded_images의 지각 해시 인덱스를 갱신하고 중복 이미지를 찾습니다.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scan_parser = subparsers.add_parser('scan', help='새로 생기거나 바뀐 파일만 해시 (--force면 전부)')
+    scan_parser.add_argument('--force', action='store_true')
+    scan_parser.add_argument('--workers', type=int, help='해시 프로세스 수 (기본: DUPLICATE_SCAN_WORKERS, 0이면 CPU 수)')
+    report_parser = subparsers.add_parser('report', help='중복/유사 이미지 그룹을 JSONL로 출력')
+    report_parser.add_argument('--max-distance', type=int, help='pHash 해밍 거리 기준 (기본: DUPLICATE_MAX_DISTANCE)')
+    args = parser.parse_args()
+
+    from service.container import ServiceContainer, load_config_from_env
+
+    config = load_config_from_env()
+    if getattr(args, 'workers', None) is not None:
+        config['DUPLICATE_SCAN_WORKERS'] = args.workers
+    image_hashes = ServiceContainer(config).image_hashes
+
+    if args.command == 'scan':
+        try:
+            print(json.dumps(image_hashes.scan(force=args.force), ensure_ascii=False, indent=2))
+        except RuntimeError as e:
+            print(f'스캔 실패: {e}', file=sys.stderr)
+            sys.exit(1)
+    else:
+        report = image_hashes.find_duplicates(args.max_distance)
+        for group in report['groups']:
+            sys.stdout.write(json.dumps(group, ensure_ascii=False) + '\n')
+        print(f"파일 {report['files']}개 중 중복 그룹 {len(report['groups'])}개 (중복 파일 {report['duplicate_files']}개)",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,56 +1,161 @@
+import json
 import os
+import threading
 from pathlib import Path
 
+VALID_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
+
+
 class ImageService:
-    def __init__(self, images_folder='downloaded_images'):
+    """카테고리/이미지 목록을 제공합니다.
+
+    dataset_sync가 관리하는 카탈로그(image_catalog.json)가 있으면 그것을, 없으면 폴더 스캔 결과를
+    스냅샷으로 만들어 둡니다. 조회는 스냅샷만 읽고, 갱신은 reload_changed()가 새 스냅샷을 만든 뒤
+    참조를 교체하는 방식으로 이루어집니다.
+    """
+
+    def __init__(self, images_folder='downloaded_images', catalog_path='image_catalog.json'):
         self.images_folder = images_folder
-    
-    def get_categories(self):
-        """downloaded_images 폴더에서 카테고리 목록을 가져옵니다."""
-        if not os.path.exists(self.images_folder):
-            return []
-        
-        categories = []
+        self.catalog_path = catalog_path
+        self._snapshot = None
+        self._fingerprint = None
+        self._reload_lock = threading.Lock()
+
+    def _current_fingerprint(self):
+        """카탈로그 수정 시각, 또는 폴더/카테고리 폴더들의 수정 시각."""
+        if self.catalog_path and os.path.exists(self.catalog_path):
+            return ('catalog', os.stat(self.catalog_path).st_mtime_ns)
+        if not os.path.isdir(self.images_folder):
+            return ('missing',)
+        folder_mtimes = [os.stat(self.images_folder).st_mtime_ns]
+        for entry in os.scandir(self.images_folder):
+            if entry.is_dir():
+                folder_mtimes.append((entry.name, entry.stat().st_mtime_ns))
+        return ('scan', tuple(sorted(folder_mtimes, key=str)))
+
+    def _read_catalog(self):
+        with open(self.catalog_path, 'r', encoding='utf-8') as f:
+            categories = json.load(f).get('categories', {})
+        # 폴더 스캔과 같은 확장자만 노출 (이전 동기화로 카탈로그에 들어간 항목 포함)
+        return {
+            category: [filename for filename in filenames if Path(filename).suffix.lower() in VALID_EXTENSIONS]
+            for category, filenames in categories.items()
+        }
+
+    def _scan_folder(self):
+        categories = {}
+        if not os.path.isdir(self.images_folder):
+            return categories
         for item in os.listdir(self.images_folder):
             item_path = os.path.join(self.images_folder, item)
-            if os.path.isdir(item_path):
-                # 카테고리 이름을 읽기 쉽게 변환
-                # 언더스코어를 공백으로 변경하고, 괄호는 유지
-                category_name = item.replace('_', ' ')
-                categories.append({
-                    'id': item,
-                    'name': category_name,
-                    'path': item_path
-                })
-        
-        return sorted(categories, key=lambda x: x['name'])
-    
+            if not os.path.isdir(item_path):
+                continue
+            categories[item] = sorted(
+                filename for filename in os.listdir(item_path)
+                if Path(filename).suffix.lower() in VALID_EXTENSIONS
+                and os.path.isfile(os.path.join(item_path, filename))
+            )
+        return categories
+
+    def has_changes(self):
+        """스냅샷을 다시 만들어야 하는지 stat만으로 확인합니다."""
+        return self._snapshot is None or self._current_fingerprint() != self._fingerprint
+
+    def reload_changed(self, force=False):
+        """카탈로그나 폴더가 바뀐 경우 새 스냅샷을 만들어 교체합니다."""
+        with self._reload_lock:
+            fingerprint = self._current_fingerprint()
+            if not force and self._snapshot is not None and fingerprint == self._fingerprint:
+                return False
+
+            if fingerprint[0] == 'catalog':
+                try:
+                    category_files = self._read_catalog()
+                except (OSError, json.JSONDecodeError):
+                    # 카탈로그가 교체되는 중이면 기존 스냅샷 유지
+                    if self._snapshot is not None:
+                        return False
+                    category_files = self._scan_folder()
+            else:
+                category_files = self._scan_folder()
+
+            categories = sorted(
+                (
+                    {
+                        'id': item,
+                        # 카테고리 이름을 읽기 쉽게 변환
+                        # 언더스코어를 공백으로 변경하고, 괄호는 유지
+                        'name': item.replace('_', ' '),
+                        'path': os.path.join(self.images_folder, item)
+                    }
+                    for item in category_files
+                ),
+                key=lambda x: x['name']
+            )
+
+            # 파일명 → 그 파일이 있는 카테고리들 (카테고리 이름순)
+            category_of = {}
+            for category in categories:
+                for filename in category_files[category['id']]:
+                    category_of[filename] = category_of.get(filename, ()) + (category['id'],)
+
+            self._snapshot = {
+                'categories': categories,
+                'categories_by_id': {category['id']: category for category in categories},
+                'images': {item: tuple(files) for item, files in category_files.items()},
+                'category_of': category_of,
+                # 이전/다음 이미지 계산용 카테고리 내 순서
+                'positions': {
+                    item: {filename: index for index, filename in enumerate(files)}
+                    for item, files in category_files.items()
+                },
+            }
+            self._fingerprint = fingerprint
+            return True
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            # 최초 1회만 요청 스레드에서 로드 (이후 갱신은 백그라운드에서)
+            self.reload_changed()
+            snapshot = self._snapshot
+        return snapshot
+
+    def get_categories(self):
+        """downloaded_images 폴더에서 카테고리 목록을 가져옵니다."""
+        return [dict(category) for category in self._get_snapshot()['categories']]
+
     def get_images_in_category(self, category_id):
         """특정 카테고리의 이미지 목록을 가져옵니다."""
         category_path = os.path.join(self.images_folder, category_id)
-        if not os.path.exists(category_path):
-            return []
-        
-        images = []
-        valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-        
-        for filename in os.listdir(category_path):
-            file_path = os.path.join(category_path, filename)
-            if os.path.isfile(file_path):
-                file_ext = Path(filename).suffix.lower()
-                if file_ext in valid_extensions:
-                    images.append({
-                        'filename': filename,
-                        'path': f'/images/{category_id}/{filename}',
-                        'full_path': file_path
-                    })
-        
-        return images
-    
+        return [
+            {
+                'filename': filename,
+                'path': f'/images/{category_id}/{filename}',
+                'full_path': os.path.join(category_path, filename)
+            }
+            for filename in self._get_snapshot()['images'].get(category_id, ())
+        ]
+
     def get_category_by_id(self, category_id):
         """ID로 카테고리 정보를 가져옵니다."""
-        categories = self.get_categories()
-        for category in categories:
-            if category['id'] == category_id:
-                return category
-        return None
+        category = self._get_snapshot()['categories_by_id'].get(category_id)
+        return dict(category) if category else None
+
+    def get_neighbors(self, category_id, filename):
+        """카테고리 순서에서 이전/다음 이미지 파일명 (없으면 None)."""
+        snapshot = self._get_snapshot()
+        index = snapshot['positions'].get(category_id, {}).get(filename)
+        if index is None:
+            return None, None
+        files = snapshot['images'][category_id]
+        return (files[index - 1] if index > 0 else None,
+                files[index + 1] if index + 1 < len(files) else None)
+
+    def get_filenames(self, category_id):
+        """카테고리의 이미지 파일명 튜플 (스냅샷이 바뀌지 않는 한 같은 객체)."""
+        return self._get_snapshot()['images'].get(category_id, ())
+
+    def find_categories(self, filename):
+        """파일이 들어 있는 카테고리 ID들 (카테고리 이름순, 없으면 빈 튜플)."""
+        return self._get_snapshot()['category_of'].get(filename, ())
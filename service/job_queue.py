@@ -0,0 +1,449 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+class JobCancelled(Exception):
+    """실행 중인 작업에 취소가 요청되었을 때 JobContext가 던집니다."""
+
+
+class JobContext:
+    """작업 함수에 전달되어 진행 상황을 기록하고 취소 요청을 확인합니다.
+
+    진행 상황은 progress_interval초에 한 번만 DB에 쓰고(마지막 단계는 항상 기록), 그때 취소 요청이
+    있으면 JobCancelled를 던집니다. 작업 함수는 긴 루프 안에서 progress()나 check_cancelled()를 호출하면 됩니다.
+    """
+
+    def __init__(self, database, job: Dict, progress_interval: float = 0.5):
+        self.database = database
+        self.job_id = job['id']
+        self.params = job['params']
+        self.progress_interval = progress_interval
+        self._last_write = 0.0
+        self._cancel_requested = bool(job.get('cancel_requested'))
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if now - self._last_write >= self.progress_interval or (total is not None and done >= total):
+            self._last_write = now
+            self._cancel_requested = self.database.update_job_progress(self.job_id, done, total, message)
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_requested:
+            raise JobCancelled()
+
+
+def check_json_path(name: str, value: str, role: str, base_dir: str) -> None:
+    """작업 매개변수로 받은 파일 경로를 검사합니다 (요청 본문의 경로로 임의의 파일을 읽거나 덮어쓰지 않도록).
+
+    role이 'input'이면 base_dir 안의 .json 파일, 'output'이면 경로 없는 .json 파일 이름만 허용합니다
+    (출력 위치는 작업이 정함).
+    """
+    if not value.endswith('.json'):
+        raise ValueError(f'{name}: .json 파일만 지정할 수 있습니다')
+    if role == 'output':
+        if os.path.basename(value) != value or value.startswith('.'):
+            raise ValueError(f'{name}: 경로 없이 파일 이름만 지정할 수 있습니다')
+        return
+    resolved = os.path.realpath(os.path.join(base_dir, value))
+    if os.path.commonpath([resolved, base_dir]) != base_dir:
+        raise ValueError(f'{name}: 프로젝트 폴더 밖의 파일은 지정할 수 없습니다')
+
+
+class JobKind:
+    """등록된 작업 종류: 실행 함수와 받을 수 있는 매개변수의 기본값."""
+
+    def __init__(self, name: str, label: str, handler: Callable, defaults: Optional[Dict] = None,
+                 description: str = '', choices: Optional[Dict[str, tuple]] = None,
+                 paths: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.label = label
+        self.handler = handler
+        self.defaults = defaults or {}
+        self.description = description
+        self.choices = choices or {}
+        self.paths = paths or {}
+
+    def coerce_params(self, params: Dict, base_dir: str) -> Dict:
+        """기본값의 타입에 맞춰 매개변수를 변환합니다 (폼 입력 문자열 허용). 모르는 이름이나 허용하지 않는 값이면 ValueError."""
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f'{self.name} 작업에 없는 매개변수: {", ".join(sorted(unknown))}')
+        coerced = dict(self.defaults)
+        for key, value in params.items():
+            default = self.defaults[key]
+            if isinstance(default, bool):
+                coerced[key] = value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'on', 'yes')
+            elif isinstance(default, int):
+                coerced[key] = int(value)
+            elif isinstance(default, list):
+                coerced[key] = value if isinstance(value, list) else [v.strip() for v in str(value).split(',') if v.strip()]
+            else:
+                coerced[key] = value if value is None else str(value)
+        for key, allowed in self.choices.items():
+            if coerced[key] not in allowed:
+                raise ValueError(f'{key} 값은 {", ".join(allowed)} 중 하나여야 합니다')
+        for key, role in self.paths.items():
+            for value in coerced[key] if isinstance(coerced[key], list) else [coerced[key]]:
+                check_json_path(key, value or '', role, base_dir)
+        return coerced
+
+    def describe(self) -> Dict:
+        return {'name': self.name, 'label': self.label, 'description': self.description, 'defaults': self.defaults,
+                'choices': {key: list(allowed) for key, allowed in self.choices.items()}}
+
+
+class JobQueue:
+    """SQLite jobs 테이블을 대기열로 쓰는 백그라운드 작업 실행기.
+
+    - submit()은 행을 하나 넣기만 하므로 요청 스레드를 막지 않습니다.
+    - 작업자 스레드(workers개)가 BEGIN IMMEDIATE로 작업을 하나씩 가져가므로, gunicorn 워커 여러 개나
+      별도 작업자 프로세스(python -m service.job_queue worker)가 같은 DB를 봐도 한 작업은 한 번만 실행됩니다.
+    - 실행 중인 작업은 heartbeat를 주기적으로 갱신하고, stale_seconds 동안 갱신되지 않은 작업은
+      작업자가 죽은 것으로 보고 실패 처리합니다 (작업을 자동으로 다시 실행하지는 않음).
+    """
+
+    def __init__(self, database, services=None, workers: int = 1, poll_interval: float = 2.0,
+                 stale_seconds: float = 300.0, base_dir: Optional[str] = None):
+        self.database = database
+        # 입력 파일 매개변수가 가리킬 수 있는 범위 (기본: 현재 작업 디렉토리 = 프로젝트 폴더)
+        self.base_dir = os.path.realpath(base_dir or os.getcwd())
+        self.services = services
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.kinds: Dict[str, JobKind] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._running: Dict[int, str] = {}
+        self._running_lock = threading.Lock()
+
+    # -----------------------------
+    # 등록 / 제출 / 조회
+    # -----------------------------
+    def register(self, name: str, label: str, handler: Callable, defaults: Optional[Dict] = None,
+                 description: str = '', choices: Optional[Dict[str, tuple]] = None,
+                 paths: Optional[Dict[str, str]] = None) -> None:
+        """handler(context, services, **params) -> 결과 dict 를 작업 종류로 등록합니다.
+
+        choices에는 정해진 값만 받는 매개변수의 허용 값을, paths에는 파일 경로 매개변수와 역할
+        ('input' 또는 'output', check_json_path 참고)을 넘깁니다 (둘 다 submit()에서 검사).
+        """
+        self.kinds[name] = JobKind(name, label, handler, defaults, description, choices, paths)
+
+    def submit(self, kind: str, params: Optional[Dict] = None) -> int:
+        """작업을 대기열에 넣고 ID를 반환합니다. 모르는 종류나 매개변수면 ValueError."""
+        if kind not in self.kinds:
+            raise ValueError(f'알 수 없는 작업 종류: {kind}')
+        coerced = self.kinds[kind].coerce_params(params or {}, self.base_dir)
+        job_id = self.database.enqueue_job(kind, coerced)
+        if job_id is None:
+            raise RuntimeError('작업을 등록하지 못했습니다')
+        metrics.inc('jobs_total', kind=kind, status='queued')
+        logger.info("작업 등록: #%d %s", job_id, kind)
+        # 같은 프로세스의 작업자는 폴링 간격을 기다리지 않고 바로 가져감
+        self._wakeup.set()
+        return job_id
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        """대기 중이면 바로 취소하고, 실행 중이면 다음 진행 보고 때 중단되도록 요청합니다."""
+        status = self.database.request_job_cancel(job_id)
+        if status is not None:
+            logger.info("작업 취소 요청: #%d (%s)", job_id, status)
+        return status
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        return self.database.get_job(job_id)
+
+    def list(self, limit: int = 50, status: Optional[str] = None) -> List[Dict]:
+        return self.database.get_jobs(limit=limit, status=status)
+
+    def describe_kinds(self) -> List[Dict]:
+        return [kind.describe() for kind in self.kinds.values()]
+
+    # -----------------------------
+    # 실행
+    # -----------------------------
+    def _worker_name(self) -> str:
+        return f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+
+    def run_next(self) -> Optional[Dict]:
+        """대기 작업 하나를 가져와 현재 스레드에서 실행합니다. 대기 작업이 없으면 None."""
+        job = self.database.claim_job(self._worker_name(), list(self.kinds))
+        if job is None:
+            return None
+        kind = self.kinds[job['kind']]
+        context = JobContext(self.database, job)
+        with self._running_lock:
+            self._running[job['id']] = job['kind']
+        started = time.perf_counter()
+        logger.info("작업 시작: #%d %s", job['id'], job['kind'])
+        try:
+            context.check_cancelled()
+            result = kind.handler(context, self.services, **job['params'])
+            status, error = 'succeeded', None
+        except JobCancelled:
+            result, status, error = None, 'cancelled', None
+        except Exception as e:
+            logger.exception("작업 실행 오류: #%d %s: %s", job['id'], job['kind'], e)
+            result, status, error = None, 'failed', f'{type(e).__name__}: {e}'
+        finally:
+            with self._running_lock:
+                self._running.pop(job['id'], None)
+
+        elapsed = time.perf_counter() - started
+        self.database.finish_job(job['id'], status, result, error)
+        metrics.inc('jobs_total', kind=job['kind'], status=status)
+        metrics.observe('job_duration_seconds', elapsed, kind=job['kind'])
+        logger.info("작업 종료: #%d %s → %s (%.1fs)", job['id'], job['kind'], status, elapsed)
+        return dict(job, status=status, result=result, error=error)
+
+    def _heartbeat(self) -> None:
+        """실행 중인 작업의 heartbeat 갱신과, 응답 없는 작업 정리."""
+        with self._running_lock:
+            running = list(self._running)
+        self.database.touch_jobs(running)
+        cutoff = (datetime.now() - timedelta(seconds=self.stale_seconds)).isoformat()
+        stale = self.database.fail_stale_jobs(cutoff)
+        if stale:
+            logger.warning("응답 없는 작업 %d개를 실패로 처리했습니다", stale)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_next() is not None:
+                    continue
+            except Exception as e:
+                logger.exception("작업자 오류: %s", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _watch(self) -> None:
+        # 작업 함수가 진행 보고 없이 오래 걸려도 살아 있음을 알리도록 stale_seconds보다 자주 갱신
+        interval = max(1.0, self.stale_seconds / 4)
+        while not self._stop.wait(interval):
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.exception("작업 heartbeat 오류: %s", e)
+
+    def start(self) -> None:
+        """작업자 스레드를 시작합니다 (workers가 0이면 이 프로세스에서는 실행하지 않음)."""
+        if self.workers <= 0 or any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        self._heartbeat()
+        self._threads = [
+            threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+            for index in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._watch, name='job-heartbeat', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info("작업자 %d개 시작", self.workers)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def status(self) -> Dict:
+        with self._running_lock:
+            running = dict(self._running)
+        return {
+            'workers': self.workers,
+            'alive': sum(1 for thread in self._threads if thread.is_alive() and thread.name != 'job-heartbeat'),
+            'running_here': running,
+        }
+
+
+# -----------------------------
+# 기본 작업들
+# -----------------------------
+def _extract_features_job(context: JobContext, services, manifest: str, output: str) -> Dict:
+    from service.dataset_sync import write_json_atomic
+    from service.extract_feature import extract_features
+
+    # 앱이 읽는 FEATURES_FILES 중 파일 이름이 같은 것을 교체 (LLM 호출 전에 확인)
+    targets = {os.path.basename(path): path for path in services.diagnosis.features_paths}
+    if output not in targets:
+        raise ValueError(f'output은 FEATURES_FILES의 파일 이름 중 하나여야 합니다: {", ".join(targets)}')
+    path = targets[output]
+
+    with open(manifest, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    results = extract_features(items, progress=lambda done, total: context.progress(done, total))
+    # 취소되면 위에서 JobCancelled가 전파되므로 기존 특징 파일은 그대로 남음
+    write_json_atomic(path, results)
+    # 이 프로세스의 뷰와 DB의 검색 인덱스/특징 어휘를 바로 갱신 (웹 워커는 데이터셋 감시가 mtime으로 반영)
+    reloaded = services.reloader.reload(force=False)
+    return {'items': len(items), 'extracted': len(results), 'path': path, 'reloaded': reloaded}
+
+
+def _dataset_sync_job(context: JobContext, services, manifests: List[str], orphans: str, verify: bool) -> Dict:
+    from service.dataset_sync import DatasetSyncService
+
+    sync = DatasetSyncService(
+        images_folder=services.config['IMAGES_FOLDER'],
+        catalog_path=services.config['IMAGE_CATALOG_PATH'],
+    )
+    # 일부 매니페스트만 동기화해도 설정된 다른 매니페스트의 이미지는 정리하지 않음
+    summary = sync.sync(manifests or services.diagnosis.manifest_paths, orphan_policy=orphans, verify=verify,
+                        progress=lambda done, total: context.progress(done, total),
+                        keep_manifests=services.diagnosis.manifest_paths)
+    # 실패 목록은 길 수 있으므로 개수와 앞부분만 결과에 남김
+    failed = summary.pop('failed')
+    summary['failed'] = len(failed)
+    summary['failed_examples'] = failed[:20]
+    return summary
+
+
+def _export_answers_job(context: JobContext, services, format: str) -> Dict:
+    from service.export_service import AnnotationExporter
+
+    export_dir = services.config['EXPORT_DIR']
+    os.makedirs(export_dir, exist_ok=True)
+    filename = f"feature_answers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    path = os.path.join(export_dir, filename)
+    tmp_path = path + '.tmp'
+    exporter = AnnotationExporter(services.database, services.diagnosis, images=services.image)
+    # 진행률 분모: 시작 시점의 답변 수 (내보내는 동안 추가된 답변이 있으면 조금 넘을 수 있음)
+    total = services.database.get_progress_counts().get('total_answers')
+    try:
+        if format == 'parquet':
+            context.progress(0, total, f'{filename} 쓰는 중')
+            rows = exporter.write_parquet(tmp_path)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                for chunk in exporter.iter_format(format, chunk_size=500):
+                    f.write(chunk)
+                    context.progress(exporter.exported_rows, total, f'{filename} 쓰는 중')
+            rows = exporter.exported_rows
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {'filename': filename, 'path': path, 'bytes': os.path.getsize(path), 'rows': rows}
+
+
+def _backup_job(context: JobContext, services) -> Dict:
+    return services.backup.create_snapshot(blocking=True, progress=lambda done, total: context.progress(done, total))
+
+
+def _image_hash_scan_job(context: JobContext, services, force: bool) -> Dict:
+    return services.image_hashes.scan(force=force, progress=lambda done, total: context.progress(done, total))
+
+
+def _vocabulary_rebuild_job(context: JobContext, services) -> Dict:
+    return services.vocabulary.rebuild()
+
+
+def _analytics_job(context: JobContext, services) -> Dict:
+    started = time.perf_counter()
+    result = services.analytics.get()
+    return {
+        'annotators': result['annotators'],
+        'total_answers': result['total_answers'],
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def register_default_jobs(queue: JobQueue) -> None:
+    from service.dataset_sync import ORPHAN_POLICIES
+    from service.export_service import EXPORT_FORMATS
+
+    queue.register('extract_features', '특징 추출 (LLM)', _extract_features_job,
+                   {'manifest': 'sampled_by_diagnosis.json', 'output': 'extracted_features.json'},
+                   '매니페스트의 rationale에서 특징을 추출해 같은 이름의 FEATURES_FILES 파일을 교체 (OPENAI_API_KEY 필요)',
+                   paths={'manifest': 'input', 'output': 'output'})
+    queue.register('dataset_sync', '데이터셋 동기화', _dataset_sync_job,
+                   {'manifests': [], 'orphans': 'quarantine', 'verify': False},
+                   '매니페스트 기준으로 이미지 폴더와 카탈로그를 증분 동기화 (manifests를 비우면 DIAGNOSIS_MANIFESTS)',
+                   choices={'orphans': ORPHAN_POLICIES}, paths={'manifests': 'input'})
+    queue.register('export_answers', '답변 내보내기', _export_answers_job,
+                   {'format': 'csv'},
+                   'EXPORT_DIR에 csv/jsonl/parquet 파일로 저장', choices={'format': EXPORT_FORMATS})
+    queue.register('backup', 'DB 백업', _backup_job, {},
+                   '온라인 백업으로 DB 스냅샷 생성')
+    queue.register('image_hash_scan', '이미지 해시 스캔', _image_hash_scan_job, {'force': False},
+                   '중복 이미지 탐지용 지각 해시 인덱스 갱신')
+    queue.register('vocabulary_rebuild', '특징 어휘 재구성', _vocabulary_rebuild_job, {},
+                   '특징 라벨 → canonical 특징 매핑을 처음부터 다시 만듦')
+    queue.register('analytics', '답변 분석 재계산', _analytics_job, {},
+                   '답변 분석을 미리 계산 (작업을 실행한 프로세스의 캐시에 남음)')
+
+
+metrics.describe('jobs_total', '작업 종류/상태별 작업 수 (queued는 등록 시점)')
+metrics.describe('job_duration_seconds', '작업 종류별 실행 시간')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='백그라운드 작업 큐: 작업 등록/조회와 별도 작업자 프로세스 실행')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    worker_parser = subparsers.add_parser('worker', help='대기 작업을 계속 가져와 실행 (웹 프로세스는 JOB_WORKERS=0)')
+    worker_parser.add_argument('--workers', type=int, help='작업자 스레드 수 (기본: JOB_WORKERS, 최소 1)')
+    worker_parser.add_argument('--once', action='store_true', help='대기 작업을 모두 실행하고 종료')
+    submit_parser = subparsers.add_parser('submit', help='작업 등록')
+    submit_parser.add_argument('kind')
+    submit_parser.add_argument('params', nargs='*', metavar='KEY=VALUE')
+    list_parser = subparsers.add_parser('list', help='최근 작업 목록')
+    list_parser.add_argument('--limit', type=int, default=20)
+    cancel_parser = subparsers.add_parser('cancel', help='작업 취소')
+    cancel_parser.add_argument('job_id', type=int)
+    args = parser.parse_args()
+
+    from service.container import ServiceContainer, load_config_from_env
+
+    config = load_config_from_env()
+    if getattr(args, 'workers', None) is not None:
+        config['JOB_WORKERS'] = args.workers
+    services = ServiceContainer(config)
+    queue = services.jobs
+
+    if args.command == 'worker':
+        if args.once:
+            while queue.run_next() is not None:
+                pass
+            return
+        queue.workers = max(1, queue.workers)
+        queue.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print('작업자 종료 중 (실행 중인 작업이 끝나기를 기다립니다)', file=sys.stderr)
+            queue.stop()
+    elif args.command == 'submit':
+        try:
+            params = dict(param.split('=', 1) for param in args.params)
+            print(queue.submit(args.kind, params))
+        except ValueError as e:
+            print(f'등록 실패: {e}', file=sys.stderr)
+            sys.exit(1)
+    elif args.command == 'list':
+        for job in queue.list(limit=args.limit):
+            sys.stdout.write(json.dumps(job, ensure_ascii=False) + '\n')
+    else:
+        status = queue.cancel(args.job_id)
+        if status is None:
+            print(f'작업 #{args.job_id}을 찾을 수 없습니다', file=sys.stderr)
+            sys.exit(1)
+        print(status)
+
+
+if __name__ == '__main__':
+    main()
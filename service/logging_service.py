@@ -0,0 +1,138 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+# 요청마다 여러 번 발생하는 이벤트: LOG_SAMPLE_RATE 비율만 기록 (WARNING 이상은 항상 기록)
+SAMPLED_EVENTS = ('answer_saved', 'activity_logged', 'detail_viewed', 'features_missing')
+
+# LogRecord 기본 속성 (이외의 속성은 extra로 넘어온 구조화 필드로 취급)
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict:
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 하나 (timestamp, level, logger, message + extra 필드)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'message': record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽는 형식. extra 필드는 key=value로 뒤에 붙입니다."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return text
+
+
+class SamplingFilter(logging.Filter):
+    """extra={'event': ...}가 SAMPLED_EVENTS에 속하는 INFO 이하 레코드를 rate 비율만 통과시킵니다."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, 'event', None) not in SAMPLED_EVENTS:
+            return True
+        if self.rate >= 1:
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+def _build_output_handler(config: Dict) -> logging.Handler:
+    log_file = config.get('LOG_FILE')
+    if not log_file:
+        handler = logging.StreamHandler(sys.stdout)
+    elif config.get('LOG_ROTATE', 'size') == 'size':
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=int(config.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            backupCount=int(config.get('LOG_BACKUP_COUNT', 5)), encoding='utf-8',
+        )
+    else:
+        # 여러 워커가 같은 파일에 쓰는 경우: 회전은 logrotate에 맡기고 파일 교체만 감지
+        handler = logging.handlers.WatchedFileHandler(log_file, encoding='utf-8')
+    handler.setFormatter(JsonFormatter() if config.get('LOG_FORMAT') == 'json' else TextFormatter())
+    return handler
+
+
+def setup_logging(config: Dict) -> None:
+    """루트 로거에 QueueHandler를 달고, 실제 출력은 백그라운드 QueueListener 스레드가 담당하게 합니다.
+
+    요청 스레드는 큐에 레코드를 넣기만 하므로 stdout/파일 I/O를 기다리지 않습니다.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    root = logging.getLogger()
+    root.setLevel(str(config.get('LOG_LEVEL', 'INFO')).upper())
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(float(config.get('LOG_SAMPLE_RATE', 0.1))))
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, _build_output_handler(config), respect_handler_level=True)
+    _listener.start()
+
+
+def restart_listener() -> None:
+    """fork 직후 워커에서 호출: 리스너 스레드는 fork로 복제되지 않으므로 새 큐와 스레드로 다시 시작합니다."""
+    global _listener
+    if _listener is None or _queue_handler is None:
+        return
+    handlers = _listener.handlers
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """큐에 남은 레코드를 모두 출력하고 리스너를 멈춥니다."""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,143 @@
+import bisect
+import threading
+from typing import Dict, Tuple
+
+# 초 단위 히스토그램 버킷 (Prometheus 기본값과 동일)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsRegistry:
+    """프로세스 내 카운터/게이지/히스토그램 저장소.
+
+    갱신은 dict 연산과 짧은 락 하나로 끝나므로 운영 환경에서 켜 두어도 부담이 적습니다.
+    값은 프로세스(워커)별로 집계됩니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """카운터를 증가시킵니다."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def gauge_add(self, name: str, value: float, **labels) -> None:
+        """게이지를 value만큼 증감합니다 (진행 중 요청 수 등)."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def gauge_set(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> None:
+        """히스토그램에 관측값을 추가합니다."""
+        key = _label_key(labels)
+        with self._lock:
+            buckets = self._buckets.setdefault(name, buckets)
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                # [버킷별 개수..., +Inf 개수, 합계]
+                state = series[key] = [0] * (len(buckets) + 1) + [0.0]
+            state[bisect.bisect_left(buckets, value)] += 1
+            state[-1] += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': {name: dict(series) for name, series in self._counters.items()},
+                'gauges': {name: dict(series) for name, series in self._gauges.items()},
+                'histograms': {name: {key: list(state) for key, state in series.items()}
+                               for name, series in self._histograms.items()},
+                'buckets': dict(self._buckets),
+            }
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식으로 변환합니다."""
+        data = self.snapshot()
+        lines = []
+
+        def header(name, metric_type):
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        for name in sorted(data['counters']):
+            header(name, 'counter')
+            for key, value in sorted(data['counters'][name].items()):
+                lines.append(f'{name}{_format_labels(key)} {value:g}')
+
+        for name in sorted(data['gauges']):
+            header(name, 'gauge')
+            for key, value in sorted(data['gauges'][name].items()):
+                lines.append(f'{name}{_format_labels(key)} {value:g}')
+
+        for name in sorted(data['histograms']):
+            header(name, 'histogram')
+            buckets = data['buckets'][name]
+            for key, state in sorted(data['histograms'][name].items()):
+                cumulative = 0
+                for bound, count in zip(buckets, state):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(key, (("le", f"{bound:g}"),))} {cumulative}')
+                cumulative += state[len(buckets)]
+                lines.append(f'{name}_bucket{_format_labels(key, (("le", "+Inf"),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(key)} {state[-1]:.6f}')
+                lines.append(f'{name}_count{_format_labels(key)} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', '엔드포인트/메서드/상태 코드별 요청 수')
+metrics.describe('http_request_duration_seconds', '엔드포인트별 요청 처리 시간')
+metrics.describe('http_requests_in_flight', '처리 중인 요청 수')
+metrics.describe('db_queries_total', 'SQLite에서 실행된 SQL 문 수 (문장 종류별)')
+metrics.describe('answer_save_conflicts_total', 'expected_version이 맞지 않아 거부된 답변 저장 수')
+metrics.describe('activity_logs_archived_total', '보관 파일로 옮기고 삭제한 활동 로그 수')
+metrics.describe('db_backups_total', 'DB 스냅샷 백업 수 (ok/error)')
+metrics.describe('db_backup_duration_seconds', 'DB 스냅샷 백업 시간')
+metrics.describe('search_duration_seconds', '전문 검색 쿼리 시간')
+metrics.describe('analytics_compute_duration_seconds', '답변 분석 재계산 시간 (로드 포함)')
+metrics.describe('feature_vocabulary_updates_total', '특징 어휘 갱신 횟수 (rebuild/incremental)')
+metrics.describe('image_hash_files_total', '이미지 해시 스캔에서 처리한 파일 수 (hashed/failed/removed)')
+metrics.describe('cache_requests_total', '캐시 조회 수 (hit/miss)')
+metrics.describe('dataset_reloads_total', '데이터셋 인덱스 재구성 횟수')
+metrics.describe('dataset_reload_duration_seconds', '데이터셋 인덱스 재구성 시간')
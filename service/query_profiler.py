@@ -0,0 +1,217 @@
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+
+def normalize_sql(sql: str) -> str:
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def params_shape(parameters) -> str:
+    """파라미터 값 대신 개수와 타입만 기록합니다 (답변 내용이 로그에 남지 않도록)."""
+    if not parameters:
+        return '()'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in parameters.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+
+
+class QueryProfiler:
+    """DatabaseService의 SQL 실행 시간을 메서드/쿼리별로 집계하고 느린 쿼리를 기록합니다.
+
+    slow_query_ms 이상 걸린 쿼리는 SQL, 파라미터 형태, EXPLAIN QUERY PLAN 결과와 함께
+    로그로 남기고 최근 slow_log_size개를 보관합니다.
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0, slow_log_size: int = 100, explain: bool = True):
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict] = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+
+    def record(self, method: str, sql: str, parameters, elapsed: float,
+               connection: sqlite3.Connection, is_call: bool = True) -> None:
+        """실행(또는 fetch) 시간을 누적합니다."""
+        key = (method, normalize_sql(sql))
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = {
+                    'method': method,
+                    'sql': key[1],
+                    'calls': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'slow_count': 0,
+                    'plan': None,
+                }
+            if is_call:
+                stat['calls'] += 1
+            stat['total_ms'] += elapsed_ms
+            stat['max_ms'] = max(stat['max_ms'], elapsed_ms)
+        if is_call:
+            metrics.observe('db_query_duration_seconds', elapsed, method=method)
+
+    def check_slow(self, method: str, sql: str, parameters, elapsed: float,
+                   connection: sqlite3.Connection) -> None:
+        """임계값을 넘은 쿼리를 실행 계획과 함께 기록합니다."""
+        elapsed_ms = elapsed * 1000
+        if self.slow_query_ms is None or elapsed_ms < self.slow_query_ms:
+            return
+
+        normalized = normalize_sql(sql)
+        plan = self._explain(connection, sql, parameters) if self.explain else None
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'method': method,
+            'sql': normalized,
+            'params': params_shape(parameters),
+            'elapsed_ms': round(elapsed_ms, 2),
+            'plan': plan,
+        }
+        with self._lock:
+            self._slow_queries.append(entry)
+            stat = self._stats.get((method, normalized))
+            if stat is not None:
+                stat['slow_count'] += 1
+                stat['plan'] = plan
+        metrics.inc('db_slow_queries_total', method=method)
+        logger.warning('느린 쿼리 %.1fms [%s] %s params=%s plan=%s',
+                       elapsed_ms, method, normalized, entry['params'], plan)
+
+    def _explain(self, connection: sqlite3.Connection, sql: str, parameters) -> Optional[List[str]]:
+        statement = sql.lstrip().split(None, 1)
+        if not statement or statement[0].upper() not in _EXPLAINABLE:
+            return None
+        try:
+            # 프로파일링 대상이 아닌 기본 커서로 실행하여 재귀 기록을 피함
+            cursor = sqlite3.Cursor(connection)
+            rows = cursor.execute('EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+            return [row[-1] for row in rows]
+        except sqlite3.Error as e:
+            return [f'EXPLAIN 실패: {e}']
+
+    def top_queries(self, limit: int = 20, order_by: str = 'total_ms') -> List[Dict]:
+        """누적 시간(또는 다른 기준) 상위 쿼리를 반환합니다."""
+        with self._lock:
+            stats = [dict(stat) for stat in self._stats.values()]
+        for stat in stats:
+            stat['avg_ms'] = stat['total_ms'] / stat['calls'] if stat['calls'] else 0.0
+        stats.sort(key=lambda stat: stat.get(order_by, 0), reverse=True)
+        return stats[:limit]
+
+    def method_totals(self) -> List[Dict]:
+        """DatabaseService 메서드별 호출 수와 누적 시간."""
+        totals: Dict[str, Dict] = {}
+        with self._lock:
+            for stat in self._stats.values():
+                total = totals.setdefault(stat['method'], {'method': stat['method'], 'calls': 0, 'total_ms': 0.0})
+                total['calls'] += stat['calls']
+                total['total_ms'] += stat['total_ms']
+        return sorted(totals.values(), key=lambda total: total['total_ms'], reverse=True)
+
+    def slow_queries(self) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self._slow_queries))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """execute/fetch 시간을 연결에 붙은 QueryProfiler에 기록하는 커서."""
+
+    _profile = None
+
+    def execute(self, sql, parameters=()):
+        # 호출한 DatabaseService 메서드 이름
+        return self._execute(sys._getframe(1).f_code.co_name, sql, parameters)
+
+    def _execute(self, method: str, sql, parameters):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._profile = (method, sql, parameters, elapsed)
+            profiler = self.connection.profiler
+            profiler.record(method, sql, parameters, elapsed, self.connection)
+            profiler.check_slow(method, sql, parameters, elapsed, self.connection)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._executemany(sys._getframe(1).f_code.co_name, sql, seq_of_parameters)
+
+    def _executemany(self, method: str, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._profile = None
+            self.connection.profiler.record(method, sql, (), elapsed, self.connection)
+
+    def _record_fetch(self, started: float) -> None:
+        if self._profile is None:
+            return
+        method, sql, parameters, execute_elapsed = self._profile
+        elapsed = time.perf_counter() - started
+        profiler = self.connection.profiler
+        profiler.record(method, sql, parameters, elapsed, self.connection, is_call=False)
+        # 실행 자체는 빨랐지만 결과를 읽는 데 오래 걸린 쿼리도 느린 쿼리로 판단
+        threshold = profiler.slow_query_ms
+        if threshold is not None and execute_elapsed * 1000 < threshold:
+            profiler.check_slow(method, sql, parameters, execute_elapsed + elapsed, self.connection)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._record_fetch(started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size if size is not None else self.arraysize)
+        finally:
+            self._record_fetch(started)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """cursor()가 ProfiledCursor를 반환하는 연결 (profiler 속성은 생성 후 지정).
+
+    sqlite3.Connection.execute/executemany는 재정의한 cursor()를 거치지 않고 기본 커서를 만들므로,
+    conn.execute(...)로 실행한 쿼리도 기록되도록 직접 ProfiledCursor로 실행합니다.
+    """
+
+    profiler: QueryProfiler = None
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor()._execute(sys._getframe(1).f_code.co_name, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor()._executemany(sys._getframe(1).f_code.co_name, sql, seq_of_parameters)
+
+
+metrics.describe('db_query_duration_seconds', 'DatabaseService 메서드별 SQL 실행 시간')
+metrics.describe('db_slow_queries_total', '느린 쿼리 임계값을 넘은 실행 수')
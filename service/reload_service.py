@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetReloader:
+    """데이터셋 서비스들의 인덱스를 백그라운드에서 다시 만들어 교체합니다.
+
+    각 서비스는 has_changes()와 reload_changed(force)를 제공해야 합니다. 재구성은 항상 이 클래스의
+    스레드에서 실행되며, 서비스는 완성된 인덱스를 참조 한 번으로 교체하므로 요청 스레드는 기다리지 않습니다.
+    """
+
+    def __init__(self, services: Dict[str, object], interval: float = 2.0):
+        self.services = services
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._status = {
+            'in_progress': False,
+            'last_started': None,
+            'last_finished': None,
+            'last_duration_ms': None,
+            'last_reloaded': [],
+            'last_error': None,
+            'reload_count': 0,
+        }
+
+    # -----------------------------
+    # 파일 감시
+    # -----------------------------
+    def start(self) -> None:
+        """interval 초마다 변경 여부를 확인하는 감시 스레드를 시작합니다 (0이면 감시 안 함)."""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='dataset-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.reload(force=False, blocking=False)
+            except Exception as e:
+                logger.exception("데이터셋 변경 감시 오류: %s", e)
+
+    # -----------------------------
+    # 리로드
+    # -----------------------------
+    def request_reload(self, force: bool = True) -> bool:
+        """리로드를 백그라운드 스레드로 시작합니다. 이미 진행 중이면 False."""
+        if self._lock.locked():
+            return False
+        threading.Thread(
+            target=self.reload, kwargs={'force': force, 'blocking': False},
+            name='dataset-reload', daemon=True
+        ).start()
+        return True
+
+    def reload(self, force: bool = False, blocking: bool = True) -> bool:
+        """변경된(또는 force면 모든) 서비스의 인덱스를 다시 만듭니다."""
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            targets = [
+                name for name, service in self.services.items()
+                if force or service.has_changes()
+            ]
+            if not targets:
+                return False
+
+            started = time.perf_counter()
+            self._status.update({
+                'in_progress': True,
+                'last_started': datetime.now().isoformat(),
+            })
+            reloaded = []
+            error = None
+            for name in targets:
+                service_started = time.perf_counter()
+                try:
+                    if self.services[name].reload_changed(force=force):
+                        reloaded.append(name)
+                        metrics.inc('dataset_reloads_total', service=name, result='ok')
+                        metrics.observe('dataset_reload_duration_seconds',
+                                        time.perf_counter() - service_started, service=name)
+                except Exception as e:
+                    error = f"{name}: {e}"
+                    metrics.inc('dataset_reloads_total', service=name, result='error')
+                    logger.exception("데이터셋 리로드 오류 (%s): %s", name, e)
+
+            self._status.update({
+                'in_progress': False,
+                'last_finished': datetime.now().isoformat(),
+                'last_duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                'last_reloaded': reloaded,
+                'last_error': error,
+                'reload_count': self._status['reload_count'] + 1,
+            })
+            if reloaded:
+                logger.info("데이터셋 리로드 완료: %s", ', '.join(reloaded),
+                            extra={'event': 'dataset_reloaded', 'duration_ms': self._status['last_duration_ms']})
+            return bool(reloaded)
+        finally:
+            self._status['in_progress'] = False
+            self._lock.release()
+
+    def status(self) -> Dict:
+        status = dict(self._status)
+        status['watching'] = bool(self._thread and self._thread.is_alive())
+        status['interval'] = self.interval
+        return status
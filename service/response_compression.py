@@ -0,0 +1,227 @@
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence
+
+from flask import Response, current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+# 압축해서 보낼 응답 MIME 타입 (이미지처럼 이미 압축된 형식은 제외)
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'text/plain',
+    'text/javascript',
+}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify를 orjson으로 직렬화합니다.
+
+    orjson이 처리하지 못하는 값(날짜, Decimal 등)은 Flask 기본 변환을 거치고, 그래도 실패하면
+    표준 json으로 직렬화합니다. 키 순서는 정렬하지 않고 dict 순서를 그대로 둡니다.
+    """
+
+    def __init__(self, app, orjson_module):
+        super().__init__(app)
+        self._orjson = orjson_module
+        # 날짜는 Flask와 같은 HTTP 날짜 형식이 되도록 default로 넘김
+        self._options = orjson_module.OPT_NON_STR_KEYS | orjson_module.OPT_PASSTHROUGH_DATETIME
+
+    def _dumps_bytes(self, obj) -> Optional[bytes]:
+        options = self._options
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= self._orjson.OPT_INDENT_2
+        try:
+            return self._orjson.dumps(obj, default=self.default, option=options)
+        except TypeError:
+            # 64비트를 넘는 정수 등 orjson이 거부하는 값
+            return None
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        data = self._dumps_bytes(obj)
+        return data.decode('utf-8') if data is not None else super().dumps(obj)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        data = self._dumps_bytes(obj)
+        if data is None:
+            return super().response(obj)
+        return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+
+
+def create_json_provider(app, encoder: str = 'auto'):
+    """JSON_ENCODER 설정('auto', 'orjson', 'json')에 맞는 JSON provider를 만듭니다."""
+    if encoder == 'json':
+        return DefaultJSONProvider(app)
+    try:
+        import orjson
+    except ImportError as e:
+        if encoder == 'orjson':
+            raise RuntimeError('JSON_ENCODER=orjson에는 orjson이 필요합니다: pip install orjson') from e
+        return DefaultJSONProvider(app)
+    return FastJSONProvider(app, orjson)
+
+
+def dumps_bytes(obj) -> bytes:
+    """현재 앱의 JSON provider로 직렬화한 UTF-8 바이트."""
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        data = provider._dumps_bytes(obj)
+        if data is not None:
+            return data
+    return provider.dumps(obj).encode('utf-8')
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    # wbits=31: gzip 헤더 (mtime 0이라 같은 입력이면 같은 출력)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class _CompressedBody:
+    """한 번 직렬화한 본문과 인코딩별 압축 결과 (인코딩마다 처음 요청될 때 최고 압축률로 계산)."""
+
+    __slots__ = ('identity', 'encoded', 'lock')
+
+    def __init__(self, identity: bytes):
+        self.identity = identity
+        self.encoded: Dict[str, bytes] = {}
+        self.lock = threading.Lock()
+
+
+class ResponseCompressor:
+    """Accept-Encoding 협상에 따라 응답 본문을 brotli/gzip으로 압축합니다.
+
+    - 동적 응답: MIN_SIZE 이상이고 압축 가능한 MIME 타입이면 after_request에서 압축합니다.
+      스트리밍 응답(SSE, 내보내기)과 파일 전송은 건드리지 않습니다.
+    - 자주 바뀌지 않는 JSON(카테고리 목록 등): cached_json()이 변경 표식(marker)별로 직렬화와
+      압축 결과를 보관하므로, 표식이 같으면 요청마다 직렬화/압축하지 않습니다.
+    """
+
+    def __init__(self, encodings: Sequence[str] = ('br', 'gzip'), min_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5, max_cached: int = 256):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_cached = max_cached
+        self._brotli = None
+        if 'br' in encodings:
+            try:
+                import brotli
+                self._brotli = brotli
+            except ImportError:
+                logger.info("brotli 모듈이 없어 gzip만 사용합니다 (pip install brotli)")
+        self.encodings = tuple(
+            encoding for encoding in encodings
+            if encoding == 'gzip' or (encoding == 'br' and self._brotli is not None)
+        )
+        self._cache: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def negotiate(self, accept_encodings) -> Optional[str]:
+        """클라이언트가 받는 인코딩 중 설정 순서상 첫 번째 (없으면 None = 압축 안 함)."""
+        for encoding in self.encodings:
+            if accept_encodings[encoding] > 0:
+                return encoding
+        return None
+
+    def _compress(self, data: bytes, encoding: str, best: bool = False) -> bytes:
+        if encoding == 'br':
+            return self._brotli.compress(data, quality=11 if best else self.brotli_quality)
+        return _gzip(data, 9 if best else self.gzip_level)
+
+    def _record(self, encoding: str, raw_size: int, sent_size: int) -> None:
+        metrics.inc('http_compression_bytes_total', raw_size, encoding=encoding, stage='before')
+        metrics.inc('http_compression_bytes_total', sent_size, encoding=encoding, stage='after')
+
+    def compress_response(self, response: Response) -> Response:
+        """after_request 훅: 조건에 맞는 응답 본문을 협상된 인코딩으로 압축합니다."""
+        if (not self.encodings
+                or response.direct_passthrough
+                or response.is_streamed
+                or response.status_code < 200
+                or response.status_code in (204, 206, 304)
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        # 같은 URL이 인코딩에 따라 다른 본문을 가지므로 공유 캐시가 구분하도록
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        compressed = self._compress(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        self._record(encoding, len(data), len(compressed))
+        return response
+
+    def cached_json(self, key: Hashable, marker: Hashable, build: Callable[[], object]) -> Response:
+        """marker가 같으면 key의 직렬화/압축 결과를 재사용한 JSON 응답을 돌려줍니다.
+
+        marker에는 결과를 결정하는 스냅샷 객체(파일명 튜플 등)나 버전을 넘깁니다.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == marker:
+                self._cache.move_to_end(key)
+                body = entry[1]
+            else:
+                body = None
+        metrics.inc('cache_requests_total', cache='precompressed_json', result='miss' if body is None else 'hit')
+
+        if body is None:
+            body = _CompressedBody(dumps_bytes(build()) + b'\n')
+            with self._cache_lock:
+                self._cache[key] = (marker, body)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_cached:
+                    self._cache.popitem(last=False)
+
+        response = current_app.response_class(body.identity, mimetype='application/json')
+        if not self.encodings or len(body.identity) < self.min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        compressed = body.encoded.get(encoding)
+        if compressed is None:
+            with body.lock:
+                compressed = body.encoded.get(encoding)
+                if compressed is None:
+                    compressed = self._compress(body.identity, encoding, best=True)
+                    body.encoded[encoding] = compressed
+        if len(compressed) >= len(body.identity):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        self._record(encoding, len(body.identity), len(compressed))
+        return response
+
+
+metrics.describe('http_compression_bytes_total', '압축한 응답의 압축 전(before)/후(after) 바이트 수 (인코딩별)')
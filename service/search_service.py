@@ -0,0 +1,136 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from markupsafe import escape
+
+from service.metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SOURCES = ('rationale', 'feature', 'answer')
+
+# 큰따옴표로 묶은 구절 또는 공백으로 구분된 단어
+_QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+# FTS5 식 문법에 쓰이는 문자는 검색어에서 제거 (토크나이저도 구분자로 취급하므로 검색 결과에는 영향 없음)
+_FTS_SYNTAX = re.compile(r'["*^():{}\[\]+\-]')
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """사용자 입력을 FTS5 MATCH 식으로 바꿉니다.
+
+    - "subretinal fluid"처럼 따옴표로 묶으면 구절 검색
+    - 나머지 단어는 접두어 검색("artifact" → "artifact"*)으로, 모든 단어가 들어 있는 문서만 찾음 (AND)
+    - AND/OR/NOT/NEAR 같은 FTS 연산자는 일반 단어로 취급
+    """
+    terms = []
+    for phrase, word in _QUERY_TERM.findall(query or ''):
+        if phrase:
+            cleaned = ' '.join(_FTS_SYNTAX.sub(' ', phrase).split())
+            if cleaned:
+                terms.append(f'"{cleaned}"')
+        else:
+            for part in _FTS_SYNTAX.sub(' ', word).split():
+                terms.append(f'"{part}"*')
+    return ' '.join(terms) or None
+
+
+def highlight(snippet: str) -> str:
+    """DB 스니펫(\\x02/\\x03로 일치 구간 표시)을 HTML로 바꿉니다. 나머지 텍스트는 이스케이프합니다."""
+    return str(escape(snippet)).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+class SearchService:
+    """rationale, 특징 라벨/설명, 판독자 reason/explanation에 대한 FTS5 전문 검색.
+
+    답변 인덱스는 DB 트리거가 저장/삭제와 함께 갱신하고, 데이터셋 인덱스는 매니페스트/특징 파일이
+    바뀌었을 때 DatasetReloader가 reload_changed()를 호출해 통째로 교체합니다 (has_changes()는 stat만 확인).
+    """
+
+    def __init__(self, database, diagnosis, images=None):
+        self.database = database
+        self.diagnosis = diagnosis
+        # 답변 결과의 카테고리는 이미지가 들어 있는 카테고리(ImageService)를 먼저 확인
+        self.images = images
+        self._indexed_fingerprint: Optional[str] = None
+        self._reload_lock = threading.Lock()
+
+    # -----------------------------
+    # 데이터셋 인덱스
+    # -----------------------------
+    def has_changes(self) -> bool:
+        if self._indexed_fingerprint is None:
+            self._indexed_fingerprint = self.database.get_search_meta('dataset_fingerprint') or ''
+        return self.diagnosis.fingerprint() != self._indexed_fingerprint
+
+    def _dataset_rows(self) -> Iterator[tuple]:
+        """(title, body, image_name, category_id, diagnosis_id, source, feature_id) 행을 만듭니다."""
+        for item in self.diagnosis.diagnosis_data:
+            image_name = os.path.basename(item.get('image', ''))
+            if not image_name:
+                continue
+            category = (item.get('sampled_diagnosis') or item.get('revised_answer_final') or '').replace(' ', '_')
+            diagnosis_id = item.get('id')
+            if item.get('rationale'):
+                yield (item.get('revised_answer_final', ''), item['rationale'], image_name, category,
+                       diagnosis_id, 'rationale', None)
+            extracted = self.diagnosis.get_extracted_features_by_diagnosis_id(diagnosis_id) or {}
+            for feature in (extracted.get('extracted_features') or {}).get('features', []):
+                yield (feature.get('label', ''), feature.get('description', ''), image_name, category,
+                       diagnosis_id, 'feature', str(feature.get('id', '')))
+
+    def reload_changed(self, force: bool = False) -> bool:
+        """데이터셋 파일이 바뀌었으면 dataset_search를 다시 만듭니다. 다시 만들었으면 True."""
+        with self._reload_lock:
+            fingerprint = self.diagnosis.fingerprint()
+            if not force and fingerprint == self._indexed_fingerprint:
+                return False
+            started = time.perf_counter()
+            inserted = self.database.replace_dataset_search_index(fingerprint, self._dataset_rows(), force=force)
+            if inserted is None:
+                return False
+            # 0이면 다른 워커가 이미 같은 지문으로 만들어 둔 것
+            self._indexed_fingerprint = fingerprint
+            if inserted:
+                logger.info("데이터셋 검색 인덱스 재구성: %d개 문서, %.0fms", inserted,
+                            (time.perf_counter() - started) * 1000)
+            return inserted > 0
+
+    # -----------------------------
+    # 검색
+    # -----------------------------
+    def search(self, query: str, sources: Optional[List[str]] = None, page: int = 1, per_page: int = 20) -> Dict:
+        """검색 결과 한 페이지. 각 결과에는 HTML로 강조된 snippet_html과 상세 페이지 url이 붙습니다."""
+        sources = [source for source in (sources or SEARCH_SOURCES) if source in SEARCH_SOURCES]
+        match = build_match_query(query)
+        response = {'query': query, 'page': page, 'per_page': per_page, 'total': 0, 'total_pages': 0, 'results': []}
+        if not match or not sources:
+            return response
+
+        started = time.perf_counter()
+        found = self.database.search(match, sources, limit=per_page, offset=(page - 1) * per_page)
+        metrics.observe('search_duration_seconds', time.perf_counter() - started)
+
+        for result in found['results']:
+            if not result['category_id']:
+                # 답변 결과는 현재 페이지 항목만 매니페스트에서 카테고리를 찾음
+                categories = self.images.find_categories(result['image_name']) if self.images is not None else ()
+                item = self.diagnosis.get_diagnosis_by_filename(result['image_name'], categories) or {}
+                category = item.get('sampled_diagnosis') or item.get('revised_answer_final') or ''
+                result['category_id'] = category.replace(' ', '_')
+                result['diagnosis_id'] = item.get('id', '')
+            result['url'] = f"/image/{result['category_id']}/{result['image_name']}" if result['category_id'] else None
+            result['snippet_html'] = highlight(result['snippet'])
+            result['snippet'] = result['snippet'].replace('\x02', '').replace('\x03', '')
+
+        response.update({
+            'total': found['total'],
+            'total_pages': (found['total'] + per_page - 1) // per_page,
+            'results': found['results'],
+        })
+        if 'error' in found:
+            response['error'] = found['error']
+        return response
@@ -0,0 +1,393 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 빌드 대상 (static 폴더 기준 glob)
+ASSET_PATTERNS = ('js/*.js', 'css/*.css')
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+# 파일명에 내용 해시가 들어가므로 내용이 바뀌면 URL도 바뀜 → 재검증 없이 1년 캐시
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MIMETYPES = {'.js': 'text/javascript', '.css': 'text/css'}
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# 이 문자 뒤의 '/'는 나눗셈이 아니라 정규식 리터럴의 시작
+_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw', 'new'}
+# 양쪽 공백을 없애도 토큰이 붙어 뜻이 바뀌지 않는 구두점 (+, -, /, <, >, ! 는 제외: ++, //, <!-- 등)
+_TIGHT = set('{}()[];,=:?&|')
+# 줄바꿈을 지워도 자동 세미콜론 삽입(ASI) 결과가 같은 경우: 앞이 이 문자로 끝나거나 뒤가 이 문자로 시작
+_JOIN_AFTER = set('{([,;')
+_JOIN_BEFORE = set('})].,;')
+
+
+def _skip_string(source: str, start: int) -> int:
+    """start의 따옴표로 시작하는 문자열 리터럴 다음 위치."""
+    quote = source[start]
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote or char == '\n':
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_regex(source: str, start: int) -> int:
+    """start의 '/'로 시작하는 정규식 리터럴(플래그 포함) 다음 위치."""
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            return i
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '/':
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] == '_'):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def _skip_template(source: str, start: int) -> int:
+    """start의 백틱으로 시작하는 템플릿 리터럴 다음 위치 (${...} 안의 중첩 문자열/템플릿 포함)."""
+    i = start + 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '`':
+            return i + 1
+        if source.startswith('${', i):
+            depth = 1
+            i += 2
+            while i < len(source) and depth:
+                char = source[i]
+                if char in '\'"':
+                    i = _skip_string(source, i)
+                    continue
+                if char == '`':
+                    i = _skip_template(source, i)
+                    continue
+                if char == '{':
+                    depth += 1
+                elif char == '}':
+                    depth -= 1
+                i += 1
+            continue
+        i += 1
+    return i
+
+
+def _previous_token(out: List[str]) -> str:
+    """지금까지 출력한 코드의 마지막 비공백 토큰 (정규식/나눗셈 판별용)."""
+    text = ''.join(out[-8:]).rstrip()
+    if not text:
+        return ''
+    match = re.search(r'[A-Za-z_$][\w$]*$', text)
+    return match.group(0) if match else text[-1]
+
+
+def minify_js(source: str) -> str:
+    """주석과 불필요한 공백/줄바꿈을 지웁니다.
+
+    문자열, 템플릿 리터럴, 정규식 리터럴은 그대로 두고, 자동 세미콜론 삽입에 영향을 줄 수 있는
+    줄바꿈은 남기는 보수적인 방식입니다 (이름 줄이기 같은 변환은 하지 않음).
+    """
+    out: List[str] = []
+    i = 0
+    length = len(source)
+    while i < length:
+        char = source[i]
+        if char in '\'"':
+            end = _skip_string(source, i)
+            out.append(source[i:end])
+            i = end
+        elif char == '`':
+            end = _skip_template(source, i)
+            out.append(source[i:end])
+            i = end
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+            # 주석이 토큰 사이를 가르던 경우를 위해 공백 하나로 대체
+            out.append(' ')
+        elif char == '/':
+            previous = _previous_token(out)
+            if not previous or previous in _REGEX_PREFIX or previous in _REGEX_KEYWORDS:
+                end = _skip_regex(source, i)
+                out.append(source[i:end])
+                i = end
+            else:
+                out.append(char)
+                i += 1
+        elif char.isspace():
+            end = i
+            while end < length and source[end].isspace():
+                end += 1
+            out.append('\n' if '\n' in source[i:end] else ' ')
+            i = end
+        else:
+            end = i + 1
+            # 식별자/숫자는 한 번에 복사
+            while end < length and (source[end].isalnum() or source[end] in '_$'):
+                end += 1
+            out.append(source[i:end])
+            i = end
+    return _squeeze_whitespace(out)
+
+
+def _squeeze_whitespace(tokens: List[str]) -> str:
+    """공백 토큰(' ', '\\n') 중 지워도 되는 것을 지웁니다."""
+    result: List[str] = []
+    for index, token in enumerate(tokens):
+        if token not in (' ', '\n'):
+            result.append(token)
+            continue
+        previous = result[-1][-1] if result and result[-1] else ''
+        following = ''
+        for next_token in tokens[index + 1:]:
+            if next_token not in (' ', '\n'):
+                following = next_token[0]
+                break
+        if not previous or not following:
+            continue
+        if result[-1] in (' ', '\n'):
+            # 연속된 공백: 줄바꿈이 하나라도 있으면 줄바꿈 유지
+            if token == '\n':
+                result[-1] = '\n'
+            continue
+        if token == '\n':
+            # 숫자 뒤의 줄바꿈 + '.'은 붙이면 소수점이 되므로 유지
+            if previous in _JOIN_AFTER or (following in _JOIN_BEFORE and not (following == '.' and previous.isdigit())):
+                continue
+            result.append('\n')
+        elif previous in _TIGHT or following in _TIGHT:
+            continue
+        else:
+            result.append(' ')
+    return ''.join(result).strip() + '\n'
+
+
+def minify_css(source: str) -> str:
+    """주석을 지우고 공백을 줄입니다 (문자열은 그대로)."""
+    out: List[str] = []
+    i = 0
+    length = len(source)
+    while i < length:
+        char = source[i]
+        if char in '\'"':
+            end = _skip_string(source, i)
+            out.append(source[i:end])
+            i = end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = length if end < 0 else end + 2
+        elif char.isspace():
+            while i < length and source[i].isspace():
+                i += 1
+            out.append(' ')
+        else:
+            out.append(char)
+            i += 1
+    text = re.sub(r' {2,}', ' ', ''.join(out))
+    text = re.sub(r' ?([{};,>]) ?', r'\1', text)
+    return text.replace(';}', '}').strip() + '\n'
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime 0: 같은 입력이면 같은 .gz (빌드 재현성)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_assets(static_dir: str = 'static', dist_dir: str = 'static/dist') -> Dict:
+    """정적 파일을 최소화하고 내용 해시를 붙여 dist_dir에 쓰고, .gz/.br과 매니페스트를 만듭니다.
+
+    직전 빌드가 참조하던 파일은 이미 열린 페이지가 계속 받을 수 있도록 한 세대 남기고,
+    그보다 오래된 파일은 지웁니다.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        logger.info("brotli 모듈이 없어 .br 파일은 만들지 않습니다 (pip install brotli)")
+
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    previous = _read_manifest(manifest_path)
+    assets: Dict[str, Dict] = {}
+    totals = {'files': 0, 'source_bytes': 0, 'minified_bytes': 0, 'gzip_bytes': 0, 'br_bytes': 0}
+
+    for pattern in ASSET_PATTERNS:
+        for source_path in sorted(Path(static_dir).glob(pattern)):
+            logical = source_path.relative_to(static_dir).as_posix()
+            source = source_path.read_text(encoding='utf-8')
+            minified = (minify_js if source_path.suffix == '.js' else minify_css)(source).encode('utf-8')
+            digest = hashlib.sha256(minified).hexdigest()[:HASH_LENGTH]
+            hashed = f'{source_path.parent.relative_to(static_dir).as_posix()}/{source_path.stem}.{digest}{source_path.suffix}'
+
+            output_path = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            _write_atomic(output_path, minified)
+            encoded = {'gzip': _gzip(minified)}
+            if brotli is not None:
+                encoded['br'] = brotli.compress(minified, quality=11)
+            for encoding, data in encoded.items():
+                _write_atomic(output_path + ENCODING_SUFFIXES[encoding], data)
+
+            assets[logical] = {
+                'file': hashed,
+                'size': len(minified),
+                'encodings': sorted(encoded),
+            }
+            totals['files'] += 1
+            totals['source_bytes'] += len(source.encode('utf-8'))
+            totals['minified_bytes'] += len(minified)
+            totals['gzip_bytes'] += len(encoded['gzip'])
+            totals['br_bytes'] += len(encoded.get('br', b''))
+
+    manifest = {'built_at': datetime.now().isoformat(timespec='seconds'), 'assets': assets}
+    os.makedirs(dist_dir, exist_ok=True)
+    _write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    keep = {entry['file'] for entry in assets.values()}
+    keep.update(entry['file'] for entry in (previous or {}).get('assets', {}).values())
+    removed = 0
+    for path in Path(dist_dir).rglob('*'):
+        if not path.is_file() or path.name == MANIFEST_NAME:
+            continue
+        relative = path.relative_to(dist_dir).as_posix()
+        for suffix in ENCODING_SUFFIXES.values():
+            if relative.endswith(suffix):
+                relative = relative[:-len(suffix)]
+                break
+        if relative not in keep:
+            path.unlink()
+            removed += 1
+
+    totals['removed_files'] = removed
+    return dict(totals, manifest=manifest_path)
+
+
+def _read_manifest(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("정적 파일 매니페스트 읽기 오류: %s", e)
+        return None
+
+
+class StaticAssets:
+    """빌드 매니페스트로 정적 파일의 해시 URL을 찾고, 미리 압축된 파일을 고릅니다.
+
+    매니페스트가 없으면(빌드하지 않은 개발 환경) 원래 static 경로를 그대로 씁니다.
+    매니페스트가 바뀌면 DatasetReloader가 reload_changed()로 다시 읽습니다.
+    """
+
+    def __init__(self, dist_dir: str = 'static/dist'):
+        self.dist_dir = dist_dir
+        self.manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+        # (mtime, 원래 경로 → 해시 경로, 해시 경로 → 미리 압축된 인코딩들)
+        self._state: Optional[Tuple] = None
+        self._reload_lock = threading.Lock()
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def has_changes(self) -> bool:
+        return self._state is None or self._current_mtime() != self._state[0]
+
+    def reload_changed(self, force: bool = False) -> bool:
+        with self._reload_lock:
+            mtime = self._current_mtime()
+            if not force and self._state is not None and self._state[0] == mtime:
+                return False
+            manifest = _read_manifest(self.manifest_path) if mtime is not None else None
+            assets = (manifest or {}).get('assets', {})
+            self._state = (
+                mtime,
+                {logical: entry['file'] for logical, entry in assets.items()},
+                {entry['file']: tuple(entry.get('encodings', ())) for entry in assets.values()},
+            )
+            return True
+
+    def _get_state(self) -> Tuple:
+        state = self._state
+        if state is None:
+            self.reload_changed()
+            state = self._state
+        return state
+
+    def hashed_path(self, filename: str) -> Optional[str]:
+        """static 기준 경로(js/main.js)의 빌드 결과 경로 (빌드되지 않았으면 None)."""
+        return self._get_state()[1].get(filename)
+
+    def select(self, hashed: str, accept_encodings) -> Tuple[Optional[str], Optional[str]]:
+        """(dist_dir 기준 보낼 파일, Content-Encoding) — 매니페스트에 없는 파일이면 (None, None)."""
+        encodings = self._get_state()[2].get(hashed)
+        if encodings is None:
+            return None, None
+        for encoding in ('br', 'gzip'):
+            if encoding in encodings and accept_encodings[encoding] > 0:
+                return hashed + ENCODING_SUFFIXES[encoding], encoding
+        return hashed, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='정적 JS/CSS를 최소화하고 내용 해시를 붙여 미리 압축합니다.')
+    parser.add_argument('--static-dir', default='static', help='원본 정적 파일 폴더 (기본: static)')
+    parser.add_argument('--dist-dir', help='빌드 결과 폴더 (기본: STATIC_DIST_DIR)')
+    args = parser.parse_args()
+
+    from service.container import DEFAULT_CONFIG, load_config_from_env
+
+    dist_dir = args.dist_dir or load_config_from_env().get('STATIC_DIST_DIR', DEFAULT_CONFIG['STATIC_DIST_DIR'])
+    try:
+        result = build_assets(args.static_dir, dist_dir)
+    except OSError as e:
+        print(f'빌드 실패: {e}', file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
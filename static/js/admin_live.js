@@ -0,0 +1,86 @@
+/**
+ * 관리자 페이지 실시간 갱신 (Server-Sent Events)
+ * /admin/events 스트림을 구독하여 진행 현황 숫자와 실시간 활동 목록을 갱신합니다.
+ *
+ * - [data-live="total_answers" | "answered_images" | "total_logs"] 요소의 숫자를 갱신
+ * - #live-feed 목록에 최근 이벤트를 추가 (최대 20개)
+ * - #live-new-count에 페이지를 연 이후 들어온 답변 수를 표시
+ */
+
+class AdminLiveUpdates {
+    constructor() {
+        this.maxFeedItems = 20;
+        this.newAnswers = 0;
+        this.statusElement = document.getElementById('live-status');
+        this.feedElement = document.getElementById('live-feed');
+        this.newCountElement = document.getElementById('live-new-count');
+        this.connect();
+    }
+
+    connect() {
+        if (!window.EventSource) {
+            this.setStatus('미지원 브라우저', 'bg-gray-400');
+            return;
+        }
+
+        // 연결이 끊기면 EventSource가 Last-Event-ID로 자동 재연결
+        this.source = new EventSource('/admin/events');
+        this.source.onopen = () => this.setStatus('실시간', 'bg-green-500');
+        this.source.onerror = () => this.setStatus('재연결 중', 'bg-yellow-500');
+
+        this.source.addEventListener('progress', (event) => this.updateProgress(JSON.parse(event.data)));
+        this.source.addEventListener('answer', (event) => {
+            const data = JSON.parse(event.data);
+            this.addFeedItem(`${data.image_name} · ${data.feature_id} → ${data.answer || '(해설만)'}`, data.timestamp, 'text-green-700');
+            this.incrementNewAnswers();
+        });
+        this.source.addEventListener('answers_deleted', (event) => {
+            const data = JSON.parse(event.data);
+            this.addFeedItem(`${data.image_name} · ${data.feature_id} 삭제`, data.deleted_at, 'text-red-600');
+            this.incrementNewAnswers();
+        });
+        this.source.addEventListener('activity', (event) => {
+            const data = JSON.parse(event.data);
+            const detail = data.feature_id ? ` · ${data.feature_id}` : '';
+            this.addFeedItem(`${data.image_name} · ${data.action}${detail}`, data.timestamp, 'text-gray-600');
+        });
+    }
+
+    setStatus(text, colorClass) {
+        if (!this.statusElement) return;
+        this.statusElement.innerHTML = `<span class="inline-block w-2 h-2 rounded-full mr-1 ${colorClass}"></span>${text}`;
+    }
+
+    updateProgress(progress) {
+        ['total_answers', 'answered_images', 'total_logs'].forEach(key => {
+            if (progress[key] === undefined) return;
+            document.querySelectorAll(`[data-live="${key}"]`).forEach(element => {
+                element.textContent = progress[key];
+            });
+        });
+    }
+
+    incrementNewAnswers() {
+        if (!this.newCountElement) return;
+        this.newAnswers += 1;
+        this.newCountElement.textContent = this.newAnswers;
+        this.newCountElement.closest('[data-live-notice]')?.classList.remove('hidden');
+    }
+
+    addFeedItem(text, timestamp, colorClass) {
+        if (!this.feedElement) return;
+        const item = document.createElement('li');
+        item.className = `py-1 text-sm ${colorClass}`;
+        const time = timestamp ? new Date(timestamp).toLocaleTimeString() : '';
+        item.textContent = `${time} ${text}`;
+        this.feedElement.prepend(item);
+        while (this.feedElement.children.length > this.maxFeedItems) {
+            this.feedElement.lastElementChild.remove();
+        }
+        document.getElementById('live-feed-empty')?.remove();
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    window.adminLive = new AdminLiveUpdates();
+});
@@ -1,3 +1,11 @@
+// 특징별로 마지막으로 확인한 답변 버전 (낙관적 동시성 검사용, 0 = 아직 저장된 답변 없음)
+const featureVersions = {};
+// 이 탭이 저장에 성공한 마지막 버전 (충돌 상대가 자기 자신의 직전 저장인지 구분)
+const ownFeatureVersions = {};
+// 특징마다 저장 요청은 하나만 보냄: 진행 중에 또 저장하면 끝난 뒤 최신 입력으로 한 번 더 저장
+const featureSavesInFlight = new Set();
+const pendingFeatureSaves = new Set();
+
 document.addEventListener('DOMContentLoaded', function() {
     // 현재 이미지 정보 가져오기
     const currentImageName = document.getElementById('detail-image').alt;
@@ -5,6 +13,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // 특징 질문 답변 로드
     loadFeatureAnswers(currentImageName);
     
+    // 다음 이미지를 미리 받아 두기 (Link 헤더 prefetch를 지원하지 않는 브라우저용)
+    prefetchNextImage();
+    
     // 카테고리 변경 이벤트
     const categoryItems = document.querySelectorAll('.category-item');
     categoryItems.forEach(item => {
@@ -43,6 +54,7 @@ function showNotification(message, type = 'info') {
     notification.className = `fixed top-4 right-4 px-6 py-3 rounded-lg shadow-lg z-50 transition-all duration-300 ${
         type === 'success' ? 'bg-green-500 text-white' : 
         type === 'error' ? 'bg-red-500 text-white' : 
+        type === 'warning' ? 'bg-yellow-500 text-white' : 
         'bg-blue-500 text-white'
     }`;
     notification.textContent = message;
@@ -161,10 +173,18 @@ function saveFeatureAnswer(featureId) {
         return; // 아무것도 입력되지 않았으면 저장하지 않음
     }
     
+    // 같은 특징의 이전 저장이 아직 응답을 받지 않았으면, 같은 버전으로 보내 자기 저장과 충돌하지 않도록 대기
+    if (featureSavesInFlight.has(featureId)) {
+        pendingFeatureSaves.add(featureId);
+        return;
+    }
+    featureSavesInFlight.add(featureId);
+    
     const answerData = {
         answer: hasAnswer ? selectedValue.value : '',
         reason: reasonText,
         explanation: explanationText,
+        expected_version: featureVersions[featureId],
         timestamp: new Date().toISOString()
     };
     
@@ -184,14 +204,24 @@ function saveFeatureAnswer(featureId) {
     })
     .then(response => response.json())
     .then(data => {
+        updateFeatureVersions(data.versions);
         if (data.success) {
             console.log(`Feature ${featureId} 답변 자동 저장 완료`);
+        } else if (data.conflicts) {
+            resolveFeatureConflicts(data.conflicts);
         } else {
             console.error('답변 저장 실패:', data.error);
         }
     })
     .catch(error => {
         console.error('답변 저장 오류:', error);
+    })
+    .finally(() => {
+        featureSavesInFlight.delete(featureId);
+        // 기다리던 저장은 갱신된 버전과 현재 입력으로 다시 보냄
+        if (pendingFeatureSaves.delete(featureId)) {
+            saveFeatureAnswer(featureId);
+        }
     });
 }
 
@@ -212,6 +242,7 @@ function saveFeatureAnswers() {
             answer: selectedValue ? selectedValue.value : '',
             reason: reasonText,
             explanation: explanationText,
+            expected_version: featureVersions[featureId],
             timestamp: new Date().toISOString()
         };
     });
@@ -226,8 +257,11 @@ function saveFeatureAnswers() {
     })
     .then(response => response.json())
     .then(data => {
+        updateFeatureVersions(data.versions);
         if (data.success) {
             showNotification(`${data.saved_count}개 답변이 저장되었습니다.`, 'success');
+        } else if (data.conflicts) {
+            resolveFeatureConflicts(data.conflicts);
         } else {
             showNotification('답변 저장에 실패했습니다.', 'error');
         }
@@ -240,60 +274,137 @@ function saveFeatureAnswers() {
 
 // 특징 질문 답변 로드
 function loadFeatureAnswers(imageName) {
-    // SQLite 데이터베이스에서 답변 가져오기
-    fetch(`/api/feature-answers/${encodeURIComponent(imageName)}`)
-        .then(response => response.json())
-        .then(data => {
-            if (data.answers) {
-                Object.keys(data.answers).forEach(featureId => {
-                    const question = document.querySelector(`[data-feature-id="${featureId}"]`);
-                    if (question) {
-                        const answer = data.answers[featureId];
-                        
-                        // 라디오 버튼 선택
-                        const radioButton = question.querySelector(`input[name="feature_${featureId}"][value="${answer.answer}"]`);
-                        if (radioButton) {
-                            radioButton.checked = true;
-                        }
-                        
-                        // 이유 텍스트
-                        const reasonTextarea = question.querySelector(`[data-feature-reason="${featureId}"]`);
-                        if (reasonTextarea) {
-                            reasonTextarea.value = answer.reason || '';
-                        }
-
-                        // 해설 텍스트
-                        const explanationTextarea = question.querySelector(`[data-feature-explanation="${featureId}"]`);
-                        if (explanationTextarea) {
-                            explanationTextarea.value = answer.explanation || '';
-                        }
-                        
-                        // 이미지 라벨 일치 여부 질문의 경우, No일 때 다른 병명 입력란 표시
-                        if (featureId === 'image_label_match' && answer.answer === 'no') {
-                            const alternativeDiagnosisDiv = document.getElementById('alternative-diagnosis');
-                            if (alternativeDiagnosisDiv) {
-                                alternativeDiagnosisDiv.style.display = 'block';
-                            }
-                        }
-                        
-                        // feature 질문의 경우, 기타일 때 입력란 표시
-                        // 기타 입력란 표시/숨김 로직은 제거되었으므로, 해설 입력란만 표시
-                        if (featureId !== 'image_label_match') {
-                            const explanationTextarea = question.querySelector(`[data-feature-explanation="${featureId}"]`);
-                            if (explanationTextarea) {
-                                explanationTextarea.style.display = 'block';
-                            }
-                        }
-                    }
-                });
-                console.log('답변 로드 완료');
-            }
-        })
+    // 답변은 페이지와 함께 렌더링되어 있음. 페이지가 프리페치된 것이었을 수 있으므로
+    // 렌더링 시점의 version 이후 변경분만 한 번 더 받아 최신 상태로 맞춤
+    const data = JSON.parse(document.getElementById('image-detail-data').textContent);
+    
+    // 아직 답변이 없는 특징은 버전 0 (저장 시 "새 답변"으로 검사)
+    document.querySelectorAll('[data-feature-id]').forEach(question => {
+        featureVersions[question.dataset.featureId] = 0;
+    });
+    Object.keys(data.answers || {}).forEach(featureId => {
+        featureVersions[featureId] = data.answers[featureId].version || 0;
+        applyFeatureAnswer(featureId, data.answers[featureId]);
+    });
+    console.log('답변 로드 완료');
+    
+    applyAnswerChangesSince(imageName, data.version)
         .catch(error => {
-            console.error('답변 로드 오류:', error);
+            console.error('답변 변경분 로드 오류:', error);
         });
 }
 
+// since 버전 이후 이 이미지의 답변 변경분만 반영 (저장은 다시 그리고, 삭제는 비움)
+function applyAnswerChangesSince(imageName, since) {
+    const params = new URLSearchParams({ since: since || 0, image: imageName });
+    return fetch(`/api/feature-answers/changes?${params}`, { cache: 'no-store' })
+        .then(response => response.json())
+        .then(changes => {
+            (changes.answers || []).forEach(answer => {
+                if ((featureVersions[answer.feature_id] || 0) < answer.version) {
+                    featureVersions[answer.feature_id] = answer.version;
+                    applyFeatureAnswer(answer.feature_id, answer);
+                }
+            });
+            (changes.deleted || []).forEach(deleted => {
+                if ((featureVersions[deleted.feature_id] || 0) < deleted.version) {
+                    featureVersions[deleted.feature_id] = 0;
+                    applyFeatureAnswer(deleted.feature_id, { answer: '', reason: '', explanation: '' });
+                }
+            });
+        });
+}
+
+// 다음 이미지를 브라우저가 한가할 때 미리 받아 둠
+function prefetchNextImage() {
+    const nextLink = document.getElementById('next-image-link');
+    if (!nextLink) return;
+    
+    const prefetch = () => {
+        new Image().src = nextLink.dataset.imageUrl;
+    };
+    if (window.requestIdleCallback) {
+        window.requestIdleCallback(prefetch, { timeout: 2000 });
+    } else {
+        setTimeout(prefetch, 500);
+    }
+}
+
+// 답변 하나를 화면에 반영
+function applyFeatureAnswer(featureId, answer) {
+    const question = document.querySelector(`[data-feature-id="${featureId}"]`);
+    if (!question) return;
+    
+    // 라디오 버튼 선택 (다른 사용자가 바꾼 값으로 갱신될 수 있으므로 먼저 해제)
+    question.querySelectorAll(`input[name="feature_${featureId}"]`).forEach(radio => radio.checked = false);
+    const radioButton = question.querySelector(`input[name="feature_${featureId}"][value="${answer.answer}"]`);
+    if (radioButton) {
+        radioButton.checked = true;
+    }
+    
+    // 이유 텍스트
+    const reasonTextarea = question.querySelector(`[data-feature-reason="${featureId}"]`);
+    if (reasonTextarea) {
+        reasonTextarea.value = answer.reason || '';
+    }
+
+    // 해설 텍스트
+    const explanationTextarea = question.querySelector(`[data-feature-explanation="${featureId}"]`);
+    if (explanationTextarea) {
+        explanationTextarea.value = answer.explanation || '';
+    }
+    
+    // 이미지 라벨 일치 여부 질문의 경우, No일 때 다른 병명 입력란 표시
+    if (featureId === 'image_label_match' && answer.answer === 'no') {
+        const alternativeDiagnosisDiv = document.getElementById('alternative-diagnosis');
+        if (alternativeDiagnosisDiv) {
+            alternativeDiagnosisDiv.style.display = 'block';
+        }
+    }
+    
+    // feature 질문의 경우, 기타일 때 입력란 표시
+    // 기타 입력란 표시/숨김 로직은 제거되었으므로, 해설 입력란만 표시
+    if (featureId !== 'image_label_match' && explanationTextarea) {
+        explanationTextarea.style.display = 'block';
+    }
+}
+
+// 저장 응답의 버전을 반영
+function updateFeatureVersions(versions) {
+    if (!versions) return;
+    Object.keys(versions).forEach(featureId => {
+        featureVersions[featureId] = versions[featureId];
+        ownFeatureVersions[featureId] = versions[featureId];
+    });
+}
+
+// 다른 사용자가 먼저 저장한 특징(409): 해당 특징만 서버의 현재 값으로 갱신
+function resolveFeatureConflicts(conflicts) {
+    let foreignConflicts = 0;
+    Object.keys(conflicts).forEach(featureId => {
+        const current = conflicts[featureId].current;
+        if (current && current.version === ownFeatureVersions[featureId]) {
+            // 이 탭의 직전 저장(예: 수동 저장과 겹친 자동 저장)과의 충돌: 화면의 입력을 새 버전 기준으로 다시 저장
+            featureVersions[featureId] = current.version;
+            saveFeatureAnswer(featureId);
+            return;
+        }
+        foreignConflicts += 1;
+        // 서버 값으로 덮어쓰므로 기다리던 자동 저장은 버림
+        pendingFeatureSaves.delete(featureId);
+        if (current) {
+            featureVersions[featureId] = current.version;
+            applyFeatureAnswer(featureId, current);
+        } else {
+            // 그 사이에 삭제됨: 다음 저장은 새 답변으로 처리
+            featureVersions[featureId] = 0;
+        }
+    });
+    if (foreignConflicts) {
+        showNotification(`다른 사용자가 먼저 수정한 답변 ${foreignConflicts}개를 최신 내용으로 갱신했습니다. 확인 후 다시 저장해 주세요.`, 'warning');
+    }
+}
+
 // 특징 질문 답변 초기화
 function clearFeatureAnswers() {
     const imageName = document.getElementById('detail-image').alt;
@@ -318,6 +429,7 @@ function clearFeatureAnswers() {
             
             featureQuestions.forEach(question => {
                 const featureId = question.dataset.featureId;
+                featureVersions[featureId] = 0;
                 
                 // 라디오 버튼 초기화
                 const radioButtons = question.querySelectorAll(`input[name="feature_${featureId}"]`);
@@ -0,0 +1,57 @@
+"""여러 테스트가 함께 쓰는 임시 데이터셋과 앱."""
+import json
+
+import pytest
+
+from app import create_app
+
+# 두 카테고리, 세 이미지의 최소 매니페스트 (Cat B의 190.png는 카테고리가 다른 같은 파일명)
+MANIFEST = [
+    {'id': 1, 'image': 'src/Cat_A/100.jpg', 'sampled_diagnosis': 'Cat A', 'revised_answer_final': 'Cat A',
+     'rationale': 'Subretinal fluid beneath the macula suggests neovascular disease.'},
+    {'id': 2, 'image': 'src/Cat_A/190.png', 'sampled_diagnosis': 'Cat A', 'revised_answer_final': 'Cat A',
+     'rationale': 'Optic disc cupping is enlarged.'},
+    {'id': 3, 'image': 'src/Cat_B/190.png', 'sampled_diagnosis': 'Cat B', 'revised_answer_final': 'Cat B',
+     'rationale': 'Cupping with rim thinning.'},
+]
+FEATURES = [
+    {'id': 1, 'extracted_features': {'features': [
+        {'id': 1, 'label': 'Subretinal fluid', 'description': 'Fluid collection under the retina'},
+        {'id': 2, 'label': 'Drusen', 'description': 'Yellow deposits near the macula'},
+    ]}},
+    {'id': 2, 'extracted_features': {'features': [
+        {'id': 1, 'label': 'Optic disc cupping', 'description': 'Enlarged cup to disc ratio'},
+    ]}},
+    {'id': 3, 'extracted_features': {'features': [
+        {'id': 1, 'label': 'Rim thinning', 'description': 'Neuroretinal rim loss'},
+    ]}},
+]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    features = tmp_path / 'features.json'
+    manifest.write_text(json.dumps(MANIFEST), encoding='utf-8')
+    features.write_text(json.dumps(FEATURES), encoding='utf-8')
+    return {'manifest': str(manifest), 'features': str(features)}
+
+
+@pytest.fixture
+def app(tmp_path, dataset):
+    return create_app({
+        'DATABASE_PATH': str(tmp_path / 'answers.db'),
+        'IMAGES_FOLDER': str(tmp_path / 'images'),
+        'IMAGE_CATALOG_PATH': str(tmp_path / 'image_catalog.json'),
+        'EXPORT_DIR': str(tmp_path / 'exports'),
+        'DIAGNOSIS_MANIFESTS': [dataset['manifest']],
+        'FEATURES_FILES': [dataset['features']],
+        'WARMUP': 'sync',
+        'JOB_WORKERS': 0,
+        'LOG_LEVEL': 'WARNING',
+    }, start_watcher=False)
+
+
+@pytest.fixture
+def services(app):
+    return app.extensions['services']
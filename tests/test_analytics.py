@@ -0,0 +1,47 @@
+"""판독자 간 일치도: kappa 함수와, 판독자 DB를 붙인 AnnotationAnalytics의 결과를 알려진 값과 비교합니다."""
+import numpy as np
+import pytest
+
+from service.analytics_service import AnnotationAnalytics, cohen_kappa, fleiss_kappa
+from service.database_service import DatabaseService
+
+
+def test_cohen_kappa_known_values():
+    # 두 평가자가 50개 항목에 yes/no: p_o = 35/50 = 0.7, p_e = 0.5·0.6 + 0.5·0.4 = 0.5 → 0.4
+    assert cohen_kappa(np.array([[20, 5], [10, 15]])) == pytest.approx(0.4)
+    assert cohen_kappa(np.array([[3, 0], [0, 2]])) == pytest.approx(1.0)
+    assert cohen_kappa(np.array([[0, 0], [0, 0]])) is None
+
+
+def test_fleiss_kappa_known_values():
+    # Fleiss(1971) 예제: 항목 10개, 평가자 14명, 범주 5개 → kappa ≈ 0.210
+    counts = np.array([
+        [0, 0, 0, 0, 14], [0, 2, 6, 4, 2], [0, 0, 3, 5, 6], [0, 3, 9, 2, 0], [2, 2, 8, 1, 1],
+        [7, 7, 0, 0, 0], [3, 2, 6, 3, 0], [2, 5, 3, 2, 2], [6, 5, 2, 1, 0], [0, 2, 2, 3, 7],
+    ])
+    assert fleiss_kappa(counts) == pytest.approx(0.20993, abs=1e-5)
+    assert fleiss_kappa(np.array([[2, 0], [0, 2]])) == pytest.approx(1.0)
+    assert fleiss_kappa(np.zeros((0, 2))) is None
+
+
+def test_agreement_between_primary_and_reader_database(tmp_path, services):
+    reader = DatabaseService(db_path=str(tmp_path / 'reader2.db'))
+    for image_name, primary, second in (('100.jpg', 'yes', 'yes'), ('101.jpg', 'yes', 'no'),
+                                        ('102.jpg', 'no', 'no'), ('103.jpg', 'no', 'no')):
+        services.database.save_feature_answer(image_name, '1', primary)
+        reader.save_feature_answer(image_name, '1', second)
+
+    analytics = AnnotationAnalytics(services.database, services.diagnosis,
+                                    reader_databases=[str(tmp_path / 'reader2.db')])
+    agreement = analytics.get()['agreement']
+    assert agreement['annotators'] == ['primary', 'reader2']
+    scope = agreement['scopes']['all']
+    [pair] = scope['pairs']
+    # p_o = 3/4, p_e = 1/2 → 0.5
+    assert pair['items'] == 4 and pair['agreement'] == 0.75 and pair['cohen_kappa'] == 0.5
+    # P̄ = 3/4, P_e = (3/8)² + (5/8)² → 0.4667
+    assert scope['items_all_rated'] == 4 and scope['fleiss_kappa'] == pytest.approx(0.4667)
+
+    # 답변이 바뀌면 변경분만 반영해 다시 계산
+    services.database.save_feature_answer('101.jpg', '1', 'no')
+    assert analytics.get()['agreement']['scopes']['all']['pairs'][0]['cohen_kappa'] == 1.0
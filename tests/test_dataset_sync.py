@@ -0,0 +1,55 @@
+"""매니페스트 기준 증분 동기화: 일부 매니페스트만 동기화할 때의 정리 대상."""
+import json
+import os
+
+import pytest
+
+from service.dataset_sync import DatasetSyncService
+
+
+@pytest.fixture
+def manifests(tmp_path, monkeypatch):
+    # 로컬 원본 경로는 작업 디렉토리 기준으로 해석됨
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('src')
+    paths = []
+    for name, filename in (('first.json', 'a.jpg'), ('second.json', 'b.jpg')):
+        (tmp_path / 'src' / filename).write_bytes(filename.encode())
+        (tmp_path / name).write_text(json.dumps([
+            {'image': f'src/{filename}', 'sampled_diagnosis': 'Cat A'},
+            {'image': f'src/{filename[0]}.tif', 'sampled_diagnosis': 'Cat A'},
+        ]), encoding='utf-8')
+        paths.append(name)
+    return paths
+
+
+@pytest.fixture
+def sync(tmp_path):
+    return DatasetSyncService(images_folder=str(tmp_path / 'images'), state_path=str(tmp_path / 'state.json'),
+                              catalog_path=str(tmp_path / 'catalog.json'),
+                              quarantine_folder=str(tmp_path / 'quarantine'))
+
+
+def _catalog(sync):
+    with open(sync.catalog_path, encoding='utf-8') as f:
+        return json.load(f)['categories']
+
+
+def test_partial_sync_keeps_images_of_configured_manifests(sync, manifests):
+    summary = sync.sync(manifests)
+    # 이미지가 아닌 확장자는 계획에 들어가지 않음
+    assert summary['added'] == 2 and summary['failed'] == []
+    assert _catalog(sync) == {'Cat_A': ['a.jpg', 'b.jpg']}
+
+    summary = sync.sync(manifests[:1], keep_manifests=manifests)
+    assert summary['orphaned'] == 0
+    assert _catalog(sync) == {'Cat_A': ['a.jpg', 'b.jpg']}
+    assert os.path.isfile(os.path.join(sync.images_folder, 'Cat_A', 'b.jpg'))
+
+
+def test_images_outside_every_manifest_are_quarantined(sync, manifests):
+    sync.sync(manifests)
+    summary = sync.sync(manifests[:1], keep_manifests=manifests[:1])
+    assert summary['orphaned'] == 1
+    assert _catalog(sync) == {'Cat_A': ['a.jpg']}
+    assert not os.path.exists(os.path.join(sync.images_folder, 'Cat_A', 'b.jpg'))
@@ -0,0 +1,43 @@
+"""같은 파일명이 여러 카테고리에 샘플링된 경우의 진단 조회."""
+import json
+
+from service.diagnosis_service import DiagnosisService
+from service.export_service import AnnotationExporter
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def test_filename_lookup_keeps_first_match_within_manifest(dataset):
+    service = DiagnosisService(dataset['manifest'], dataset['features'])
+    assert service.get_diagnosis_by_filename('190.png')['id'] == 2
+    assert service.get_diagnosis_by_filename('190.png', ['Cat_B'])['id'] == 3
+    # 카테고리에 항목이 없으면 파일명으로 찾음
+    assert service.get_diagnosis_by_filename('190.png', ['Other'])['id'] == 2
+    assert service.get_diagnosis_by_image('Cat_B', '190.png')['id'] == 3
+
+
+def test_later_manifest_wins_across_manifests(tmp_path, dataset):
+    newer = _write(tmp_path / 'newer.json', [
+        {'id': 9, 'image': 'src/Cat_C/190.png', 'sampled_diagnosis': 'Cat C', 'revised_answer_final': 'Cat C'},
+    ])
+    latest = DiagnosisService([dataset['manifest'], newer], dataset['features'])
+    assert latest.get_diagnosis_by_filename('190.png')['id'] == 9
+    first = DiagnosisService([dataset['manifest'], newer], dataset['features'], conflict_policy='first')
+    assert first.get_diagnosis_by_filename('190.png')['id'] == 2
+
+
+def test_export_and_search_use_catalog_category(tmp_path, services):
+    # 카탈로그에서 190.png는 Cat_B에만 있음
+    _write(tmp_path / 'image_catalog.json', {'version': 1, 'categories': {'Cat_A': ['100.jpg'], 'Cat_B': ['190.png']}})
+    services.image.reload_changed(force=True)
+    services.database.save_feature_answer('190.png', '1', 'yes', explanation='thinning of the rim')
+
+    exporter = AnnotationExporter(services.database, services.diagnosis, images=services.image)
+    [record] = list(exporter.iter_records())
+    assert (record['category_id'], record['diagnosis_id'], record['feature_label']) == ('Cat_B', 3, 'Rim thinning')
+
+    [result] = services.search.search('thinning', ['answer'])['results']
+    assert (result['category_id'], result['diagnosis_id']) == ('Cat_B', 3)
@@ -0,0 +1,136 @@
+"""한 탭에서 같은 특징을 연달아 저장할 때 자기 저장과 충돌(409)하지 않는지 확인합니다.
+
+image_detail.js를 node에서 실행하고, 스크립트가 보내는 저장 요청을 실제 Flask 앱으로 전달합니다.
+"""
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from app import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_NAME = 'sample.jpg'
+FEATURE_ID = 'feature_1'
+
+# DOM/fetch를 최소한으로 흉내 내고, fetch 요청을 한 줄 JSON으로 내보낸 뒤 표준 입력의 응답을 기다림
+NODE_HARNESS = r"""
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+const replies = [];
+readline.createInterface({input: process.stdin}).on('line', line => replies.shift()(JSON.parse(line)));
+const send = message => process.stdout.write(JSON.stringify(message) + '\n');
+
+const explanation = {value: ''};
+const question = {
+    querySelector(selector) {
+        if (selector.endsWith(':checked')) return {value: 'yes'};
+        if (selector.startsWith('[data-feature-explanation')) return explanation;
+        return null;
+    }
+};
+const notifications = [];
+const context = {
+    notifications,
+    console: {log() {}, error: (...args) => process.stderr.write(args.join(' ') + '\n')},
+    document: {
+        addEventListener() {},
+        getElementById: () => ({alt: process.argv[3]}),
+        querySelector: () => question,
+    },
+    setTimeout, clearTimeout,
+    fetch(url, options) {
+        return new Promise(resolve => {
+            replies.push(reply => resolve({json: () => Promise.resolve(reply)}));
+            send({type: 'request', url, body: JSON.parse(options.body)});
+        });
+    },
+};
+vm.createContext(context);
+const run = code => vm.runInContext(code, context);
+run(fs.readFileSync(process.argv[2], 'utf8'));
+run('showNotification = (message, type) => notifications.push(type);');
+// 스크립트의 최상위 const는 전역 객체 속성이 아니므로 같은 컨텍스트에서 평가해 꺼냄
+const featureVersions = run('featureVersions');
+
+const featureId = process.argv[4];
+featureVersions[featureId] = 0;
+// 라디오 선택 직후 자동 저장, 응답을 받기 전에 해설을 입력해 두 번째 자동 저장
+context.saveFeatureAnswer(featureId);
+explanation.value = 'typed before the first save returned';
+context.saveFeatureAnswer(featureId);
+
+// 대기 중인 저장이 모두 끝나면 상태를 보고
+(function waitIdle() {
+    setTimeout(() => {
+        if (replies.length) return waitIdle();
+        send({type: 'done', explanation: explanation.value, notifications, version: featureVersions[featureId]});
+        process.exit(0);
+    }, 50);
+})();
+"""
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({
+        'DATABASE_PATH': str(tmp_path / 'answers.db'),
+        'DIAGNOSIS_MANIFESTS': [],
+        'FEATURES_FILES': [],
+        'WARMUP': 'none',
+        'LOG_LEVEL': 'WARNING',
+    }, start_watcher=False)
+    return app.test_client()
+
+
+def test_same_version_second_save_conflicts_with_first(client):
+    """서버는 같은 expected_version으로 두 번 저장하면 두 번째를 409로 거절하고, 첫 저장의 버전을 돌려준다."""
+    url = f'/api/feature-answers/{IMAGE_NAME}'
+    first = client.post(url, json={'answers': {FEATURE_ID: {'answer': 'yes', 'expected_version': 0}}})
+    assert first.status_code == 200
+    version = first.get_json()['versions'][FEATURE_ID]
+
+    second = client.post(url, json={'answers': {FEATURE_ID: {'answer': 'yes', 'explanation': 'more',
+                                                             'expected_version': 0}}})
+    assert second.status_code == 409
+    assert second.get_json()['conflicts'][FEATURE_ID]['current']['version'] == version
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node가 필요합니다')
+def test_back_to_back_autosaves_from_one_tab_do_not_conflict(client, tmp_path):
+    harness = tmp_path / 'harness.js'
+    harness.write_text(NODE_HARNESS, encoding='utf-8')
+    process = subprocess.Popen(
+        ['node', str(harness), os.path.join(ROOT, 'static', 'js', 'image_detail.js'), IMAGE_NAME, FEATURE_ID],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    statuses = []
+    expected_versions = []
+    try:
+        for line in process.stdout:
+            message = json.loads(line)
+            if message['type'] == 'done':
+                break
+            body = message['body']
+            expected_versions.append(body['answers'][FEATURE_ID]['expected_version'])
+            response = client.post(message['url'], json=body)
+            statuses.append(response.status_code)
+            process.stdin.write(json.dumps(response.get_json()) + '\n')
+            process.stdin.flush()
+    finally:
+        process.stdin.close()
+        process.wait(timeout=10)
+
+    # 두 번째 저장은 첫 저장이 끝난 뒤 갱신된 버전으로 전송됨
+    assert statuses == [200, 200]
+    assert expected_versions[0] == 0 and expected_versions[1] > 0
+    assert message['explanation'] == 'typed before the first save returned'
+    assert 'warning' not in message['notifications']
+
+    saved = client.get(f'/api/feature-answers/{IMAGE_NAME}').get_json()
+    assert saved['answers'][FEATURE_ID]['explanation'] == 'typed before the first save returned'
+    assert saved['answers'][FEATURE_ID]['version'] == message['version']
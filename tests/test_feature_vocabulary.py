@@ -0,0 +1,77 @@
+"""특징 라벨 정규화와 canonical 특징 매칭."""
+import pytest
+
+from service.feature_vocabulary import FeatureMatcher, FeatureVocabulary, label_similarity, normalize_label
+
+
+@pytest.mark.parametrize('label, expected', [
+    ('Subretinal fluid (SRF)', 'subretinal fluid'),
+    ('SRF', 'subretinal fluid'),
+    ('RPE changes', 'retinal pigment epithelium change'),
+    ('Mild retinal hemorrhages', 'retinal hemorrhage'),
+    ('Corneal opacities', 'corneal opacity'),
+    ('Hyper-reflective foci', 'hyper reflective foci'),
+    ('Absence of exudates', 'absence exudate'),
+    ('', ''),
+    (None, ''),
+])
+def test_normalize_label(label, expected):
+    assert normalize_label(label) == expected
+
+
+@pytest.mark.parametrize('first, second, same', [
+    ('RPE changes', 'Changes in the retinal pigment epithelium', True),
+    ('Cotton wool spots', 'Cotton-wool spots', True),
+    ('Microaneurysms', 'Microaneurisms', True),
+    ('Neovascularization', 'Neovascularisation', True),
+    # 접두어만 다른 의학 용어와 부정 소견은 합치지 않음
+    ('Hyperreflective foci', 'Hyporeflective foci', False),
+    ('Subretinal fluid', 'Intraretinal fluid', False),
+    ('Absence of exudates', 'Exudates', False),
+])
+def test_label_similarity(first, second, same):
+    score = label_similarity(normalize_label(first), normalize_label(second))
+    assert (score >= 0.75) is same
+
+
+def test_feature_matcher():
+    matcher = FeatureMatcher(threshold=0.75)
+    matcher.add('subretinal fluid', 'subretinal fluid')
+    matcher.add('retinal pigment epithelium change', 'retinal pigment epithelium change')
+    assert len(matcher) == 2
+
+    assert matcher.match('subretinal fluid') == ('subretinal fluid', 1.0)
+    canonical, score = matcher.match(normalize_label('Changes in the retinal pigment epithelium'))
+    assert canonical == 'retinal pigment epithelium change' and score == 1.0
+    assert matcher.match(normalize_label('Intraretinal fluid'))[0] is None
+    assert matcher.match(normalize_label('Absence of subretinal fluid')) == (None, 0.0)
+    assert matcher.match('optic disc cupping') == (None, 0.0)
+
+
+def test_assign_groups_labels_deterministically():
+    rows = [
+        ('1', '1', 'Subretinal fluid (SRF)'), ('2', '1', 'SRF'), ('3', '1', 'Subretinal fluid'),
+        ('4', '2', 'Microaneurysms'), ('5', '2', 'Microaneurisms'), ('6', '2', 'Microaneurysms'),
+        ('7', '3', 'Absence of subretinal fluid'),
+    ]
+    canonicals, mappings = FeatureVocabulary._assign(rows, FeatureMatcher(), {})
+    assert sorted(canonicals) == [
+        ('absence subretinal fluid', 'Absence of subretinal fluid'),
+        ('microaneurysm', 'Microaneurysms'),
+        ('subretinal fluid', 'SRF'),
+    ]
+    canonical_of = {(diagnosis_id, feature_id): canonical for diagnosis_id, feature_id, _, _, canonical, _ in mappings}
+    assert canonical_of[('5', '2')] == 'microaneurysm'
+    assert canonical_of[('7', '3')] == 'absence subretinal fluid'
+    # 입력 순서와 무관하게 같은 결과
+    reordered_canonicals, reordered_mappings = FeatureVocabulary._assign(list(reversed(rows)), FeatureMatcher(), {})
+    assert sorted(reordered_canonicals) == sorted(canonicals)
+    assert sorted(reordered_mappings) == sorted(mappings)
+
+
+def test_rebuild_and_mapping(services):
+    summary = services.vocabulary.rebuild()
+    assert summary['labels'] == 4 and summary['canonicals'] == 4
+    mapping = services.vocabulary.mapping()
+    assert sorted(mapping['labels'].values()) == ['Drusen', 'Optic disc cupping', 'Rim thinning', 'Subretinal fluid']
+    assert mapping['canonical_of'][('1', '1')] != mapping['canonical_of'][('1', '2')]
@@ -0,0 +1,63 @@
+"""지각 해시 인덱스: multi-index 검색을 전체 비교(brute force) 결과와 비교합니다."""
+import random
+
+import pytest
+
+from service.image_hash_service import HASH_BITS, MultiIndexHash, hamming
+
+
+@pytest.fixture(scope='module')
+def hashes():
+    rng = random.Random(1234)
+    values = [rng.getrandbits(HASH_BITS) for _ in range(300)]
+    # 가까운 이웃이 있도록 일부 해시에서 1~20비트를 뒤집은 변형을 추가
+    for base in values[:100]:
+        variant = base
+        for bit in rng.sample(range(HASH_BITS), rng.randint(1, 20)):
+            variant ^= 1 << bit
+        values.append(variant)
+    values.append(values[0])  # 완전히 같은 해시
+    return values
+
+
+@pytest.mark.parametrize('chunks', [4, 8])
+@pytest.mark.parametrize('radius', [0, 1, 3, 6, 10, 16])
+def test_search_matches_brute_force(hashes, chunks, radius):
+    index = MultiIndexHash(chunks=chunks)
+    for position, value in enumerate(hashes):
+        index.add(value, position)
+    assert len(index) == len(hashes)
+
+    for query in hashes[::7]:
+        expected = sorted((hamming(query, value), position) for position, value in enumerate(hashes)
+                          if hamming(query, value) <= radius)
+        assert sorted(index.search(query, radius)) == expected
+
+
+@pytest.mark.parametrize('value, status', [
+    ('0', 200), ('16', 200), ('17', 400), ('-1', 400), ('abc', 400),
+])
+def test_duplicates_routes_bound_max_distance(app, value, status):
+    client = app.test_client()
+    response = client.get(f'/api/duplicates?max_distance={value}')
+    assert response.status_code == status
+    if status == 200:
+        assert response.get_json()['max_distance'] == int(value)
+    assert client.get(f'/admin/duplicates?max_distance={value}').status_code == status
+
+
+def test_scan_groups_reencoded_copies(tmp_path, services):
+    Image = pytest.importorskip('PIL.Image')
+    images = tmp_path / 'images'
+    (images / 'Cat_A').mkdir(parents=True)
+    (images / 'Cat_B').mkdir(parents=True)
+    gradient = Image.linear_gradient('L').resize((128, 128)).convert('RGB')
+    gradient.save(images / 'Cat_A' / 'gradient.png')
+    gradient.save(images / 'Cat_B' / 'gradient.jpg', quality=70)
+    gradient.rotate(90).save(images / 'Cat_B' / 'rotated.png')
+
+    summary = services.image_hashes.scan()
+    assert (summary['files'], summary['hashed'], summary['failed']) == (3, 3, 0)
+    [group] = services.image_hashes.find_duplicates()['groups']
+    assert sorted(member['path'] for member in group['members']) == ['Cat_A/gradient.png', 'Cat_B/gradient.jpg']
+    assert group['cross_category'] and not group['exact']
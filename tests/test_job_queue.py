@@ -0,0 +1,94 @@
+"""작업 큐: 임시 DB에서 등록 → 가져가기(claim) → 완료/실패/취소 흐름을 확인합니다."""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def queue(services):
+    return services.jobs
+
+
+def test_export_job_is_claimed_and_completed(services, queue):
+    services.database.save_feature_answer('100.jpg', '1', 'yes')
+    services.database.save_feature_answer('100.jpg', '2', 'no')
+
+    job_id = queue.submit('export_answers', {'format': 'jsonl'})
+    job = queue.get(job_id)
+    assert (job['status'], job['params'], job['started_at']) == ('queued', {'format': 'jsonl'}, None)
+
+    finished = queue.run_next()
+    assert (finished['id'], finished['status'], finished['error']) == (job_id, 'succeeded', None)
+
+    job = queue.get(job_id)
+    assert job['status'] == 'succeeded'
+    assert job['worker'] and job['started_at'] and job['finished_at']
+    assert (job['progress_done'], job['progress_total']) == (2, 2)
+    assert job['result']['rows'] == 2
+    assert os.path.dirname(job['result']['path']) == services.config['EXPORT_DIR']
+    with open(job['result']['path'], encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 2
+    # 끝난 작업은 다시 가져가지 않음
+    assert queue.run_next() is None
+
+
+def test_claim_takes_oldest_queued_job_once(services, queue):
+    first = queue.submit('backup')
+    second = queue.submit('vocabulary_rebuild')
+
+    assert services.database.claim_job('w1', ['vocabulary_rebuild'])['id'] == second
+    claimed = services.database.claim_job('w2', list(queue.kinds))
+    assert (claimed['id'], claimed['status'], claimed['worker']) == (first, 'running', 'w2')
+    assert services.database.claim_job('w3', list(queue.kinds)) is None
+
+
+def test_failed_and_cancelled_jobs(queue):
+    def fail(context, services):
+        raise RuntimeError('boom')
+
+    def cancel_self(context, services):
+        assert queue.cancel(context.job_id) == 'running'
+        context.progress(1, 10)
+        return {'unreachable': True}
+
+    queue.register('test_fail', 'fail', fail)
+    queue.register('test_cancel', 'cancel', cancel_self)
+
+    failed = queue.submit('test_fail')
+    assert queue.run_next()['status'] == 'failed'
+    assert queue.get(failed)['error'] == 'RuntimeError: boom'
+
+    running = queue.submit('test_cancel')
+    assert queue.run_next()['status'] == 'cancelled'
+    assert queue.get(running)['result'] is None
+
+    queued = queue.submit('test_fail')
+    assert queue.cancel(queued) == 'cancelled'
+    assert queue.run_next() is None
+    assert queue.cancel(queued + 100) is None
+
+
+@pytest.mark.parametrize('kind, params', [
+    ('no_such_job', {}),
+    ('export_answers', {'fmt': 'csv'}),
+    ('export_answers', {'format': 'xlsx'}),
+    ('extract_features', {'manifest': '../outside.json'}),
+    ('extract_features', {'output': 'notes.txt'}),
+])
+def test_submit_rejects_bad_requests(queue, kind, params):
+    with pytest.raises(ValueError):
+        queue.submit(kind, params)
+    assert queue.list() == []
+
+
+def test_jobs_api_submits_and_reports(app, queue):
+    client = app.test_client()
+    response = client.post('/api/jobs', json={'kind': 'export_answers', 'params': {'format': 'csv'}})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    assert response.get_json()['status'] == 'queued'
+
+    queue.run_next()
+    assert client.get(f'/api/jobs/{job_id}').get_json()['status'] == 'succeeded'
+    assert client.post('/api/jobs', json={'kind': 'export_answers', 'params': {'format': 'xlsx'}}).status_code == 400
+    assert client.get(f'/api/jobs/{job_id + 100}').status_code == 404
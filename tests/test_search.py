@@ -0,0 +1,40 @@
+"""FTS5 검색: 검색 대상별, 그리고 여러 대상을 섞은 검색."""
+import pytest
+
+
+@pytest.fixture
+def search(services):
+    services.database.save_feature_answer('100.jpg', '1', 'yes', reason='fluid clearly visible',
+                                          explanation='large pocket of fluid')
+    return services.search
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('rationale', {('rationale', '100.jpg', None)}),
+    ('feature', {('feature', '100.jpg', '1')}),
+    ('answer', {('answer', '100.jpg', '1')}),
+])
+def test_search_single_source(search, source, expected):
+    result = search.search('fluid', [source])
+    assert 'error' not in result
+    assert {(item['source'], item['image_name'], item['feature_id']) for item in result['results']} == expected
+    assert result['total'] == len(expected)
+    assert all('<mark>' in item['snippet_html'] for item in result['results'])
+
+
+def test_search_mixed_sources_sorted_by_score(search):
+    result = search.search('fluid')
+    assert 'error' not in result
+    assert {item['source'] for item in result['results']} == {'rationale', 'feature', 'answer'}
+    assert result['total'] == 3
+    scores = [item['score'] for item in result['results']]
+    assert scores == sorted(scores)
+    # 답변 결과도 매니페스트에서 카테고리를 찾아 상세 페이지 URL이 붙음
+    answer = next(item for item in result['results'] if item['source'] == 'answer')
+    assert answer['category_id'] == 'Cat_A' and answer['url'] == '/image/Cat_A/100.jpg'
+
+
+def test_api_search_answer_only(app, search):
+    response = app.test_client().get('/api/search?q=pocket&source=answer')
+    assert response.status_code == 200
+    assert [item['source'] for item in response.get_json()['results']] == ['answer']
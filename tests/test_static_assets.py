@@ -0,0 +1,56 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from service.static_assets import minify_js
+
+JS_FILES = sorted((Path(__file__).resolve().parent.parent / 'static' / 'js').glob('*.js'))
+NODE = shutil.which('node')
+
+needs_node = pytest.mark.skipif(NODE is None, reason='node가 없으면 구문/동작 비교를 건너뜀')
+
+
+def _node(*args, source):
+    return subprocess.run([NODE, *args], input=source, capture_output=True, text=True, timeout=30)
+
+
+def test_repo_has_js_files():
+    assert JS_FILES
+
+
+@pytest.mark.parametrize('path', JS_FILES, ids=lambda path: path.name)
+def test_minify_js_shrinks_and_is_idempotent(path):
+    source = path.read_text(encoding='utf-8')
+    minified = minify_js(source)
+    assert len(minified) < len(source)
+    assert minify_js(minified) == minified
+
+
+@needs_node
+@pytest.mark.parametrize('path', JS_FILES, ids=lambda path: path.name)
+def test_minified_repo_js_still_parses(path):
+    minified = minify_js(path.read_text(encoding='utf-8'))
+    result = _node('--check', '-', source=minified)
+    assert result.returncode == 0, result.stderr
+
+
+@needs_node
+@pytest.mark.parametrize('source', [
+    # 나눗셈과 정규식 리터럴 구분, 정규식 안의 '//' 와 '/*'
+    "const a = 10 / 2 / 5; const re = /\\/\\/[a-z/]*\\/*/g;\nconsole.log(a, 'x//y/*z*/'.replace(re, '-'), re.source);",
+    "function f(s) { return /a+b/i.test(s) }\nconsole.log(f('AAB'), typeof /x/)",
+    # 템플릿 리터럴 안의 중첩 문자열/주석 모양 텍스트
+    "const n = 3; console.log(`n = ${n > 1 ? `${n}개 // 주석 아님` : '/* 하나 */'}`)",
+    # 자동 세미콜론 삽입에 기대는 줄바꿈, 숫자 뒤의 줄바꿈 + '.'
+    "let x = 1\nlet y = x\n++x\nconsole.log(x, y)\nconsole.log(1\n.toString())",
+    "function g() {\n  return\n  42\n}\nconsole.log(g())",
+    # 주석이 토큰 사이를 가르던 경우
+    "const a = 1; const b = a/* 주석 */+/* 주석 */a; console.log(b) // 끝",
+], ids=['regex-division', 'regex-keyword', 'template', 'asi', 'return-newline', 'block-comment'])
+def test_minified_snippet_behaves_the_same(source):
+    expected = _node('-', source=source)
+    actual = _node('-', source=minify_js(source))
+    assert expected.returncode == 0, expected.stderr
+    assert (actual.returncode, actual.stdout) == (0, expected.stdout), actual.stderr
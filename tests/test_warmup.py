@@ -0,0 +1,13 @@
+"""워밍업: preload한 gunicorn 마스터처럼 워밍업한 스레드에 SQLite 연결이 남지 않는지 확인합니다."""
+
+
+def test_warm_up_closes_its_thread_connection(services):
+    database = services.database
+    database.get_progress_counts()
+    assert database._local.conn is not None
+
+    services.warm_up(background=False)
+    assert services.is_ready()
+    assert database._local.conn is None
+    # 닫은 뒤에도 다음 조회는 새 연결을 엶
+    assert database.get_progress_counts()['total_answers'] == 0
@@ -0,0 +1,19 @@
+"""gunicorn 등 WSGI 서버용 엔트리 포인트
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import os
+
+from app import create_app
+
+config = {'WARMUP': 'sync'}
+# 무거운 백그라운드 작업이 웹 워커의 스레드/CPU를 쓰지 않도록 작업자는 별도 프로세스로 실행
+# (python -m service.job_queue worker). JOB_WORKERS 환경 변수를 지정하면 그 값을 따름
+if 'JOB_WORKERS' not in os.environ:
+    config['JOB_WORKERS'] = 0
+
+# preload_app=True이면 마스터에서 한 번만 인덱스를 만들고, 워커들은 copy-on-write로 공유
+# 워밍업이 끝나면 마스터의 SQLite 연결은 닫히므로 워커는 각자 새 연결을 엶
+# 파일 감시 스레드는 fork 이후 각 워커에서 시작 (gunicorn.conf.py의 post_fork)
+app = create_app(config, start_watcher=False)
+services = app.extensions['services']